@@ -0,0 +1,125 @@
+"""
+Images loaded on first use, converted to the display format and pre-scaled.
+
+Each registered image is decoded once and converted with convert() or
+convert_alpha(), so blits are plain copies instead of per-pixel format
+conversions. Scaled copies are cached per target size in an LRU, so the
+variants for earlier window sizes survive a VIDEORESIZE and going back to a
+size costs nothing; prepare() builds the variants for a new size ahead of
+the first frame that needs them.
+
+With a cache directory, every converted variant is also written there as
+raw pixels, keyed by the source file's size and modification time; a cold
+start then reads those bytes back instead of decoding the PNG and scaling.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import pygame
+
+
+class AssetCache:
+    def __init__(self, cache_dir=None, max_variants=32):
+        self.cache_dir = cache_dir or None
+        self.max_variants = max_variants
+        self._sources = {}  # name -> (path, alpha)
+        self._variants = OrderedDict()  # (name, size or None) -> converted surface
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def register(self, name, path, alpha=False):
+        self._sources[name] = (path, alpha)
+
+    def image(self, name):
+        """The full-size image, converted to the display format"""
+        return self._get(name, None)
+
+    def scaled(self, name, size):
+        """The image smooth-scaled to exactly size"""
+        return self._get(name, (int(size[0]), int(size[1])))
+
+    def fit(self, name, box):
+        """The image scaled to fit inside box, keeping its aspect ratio"""
+        return self.scaled(name, self.fit_size(name, box))
+
+    def fit_size(self, name, box):
+        width, height = self.image(name).get_size()
+        ratio = min(box[0] / width, box[1] / height)
+        return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+    def prepare(self, boxes):
+        """Build the fit() variants for {name: box} now, e.g. after a resize (any thread)"""
+        for name, box in boxes.items():
+            self.fit(name, box)
+
+    def stats(self):
+        return {"variants": len(self._variants), "hits": self.hits, "misses": self.misses,
+                "disk_hits": self.disk_hits}
+
+    def _get(self, name, size):
+        key = (name, size)
+        with self._lock:
+            surface = self._variants.get(key)
+            if surface is not None:
+                self._variants.move_to_end(key)
+                self.hits += 1
+                return surface
+            self.misses += 1
+
+        surface = self._load_cached(name, size)
+        if surface is None:
+            if size is None:
+                path, alpha = self._sources[name]
+                surface = pygame.image.load(path)
+                surface = surface.convert_alpha() if alpha else surface.convert()
+            else:
+                surface = pygame.transform.smoothscale(self.image(name), size)
+            self._store_cached(name, size, surface)
+
+        with self._lock:
+            self._variants[key] = surface
+            self._variants.move_to_end(key)
+            while len(self._variants) > self.max_variants:
+                self._variants.popitem(last=False)
+        return surface
+
+    def _cache_path(self, name, size):
+        path, alpha = self._sources[name]
+        stat = os.stat(path)
+        variant = f"{size[0]}x{size[1]}" if size else "full"
+        fmt = "RGBA" if alpha else "RGB"
+        return os.path.join(self.cache_dir, f"{name}-{variant}-{stat.st_size}-{int(stat.st_mtime)}.{fmt.lower()}"), fmt
+
+    def _load_cached(self, name, size):
+        if not self.cache_dir:
+            return None
+        cache_path, fmt = self._cache_path(name, size)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as file:
+                width, height = (int(value) for value in file.readline().split())
+                surface = pygame.image.frombytes(file.read(), (width, height), fmt)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring corrupt image cache {cache_path}: {e}")
+            return None
+        self.disk_hits += 1
+        return surface.convert_alpha() if fmt == "RGBA" else surface.convert()
+
+    def _store_cached(self, name, size, surface):
+        if not self.cache_dir:
+            return
+        cache_path, fmt = self._cache_path(name, size)
+        try:
+            # Write then rename, so a crash never leaves a half-written variant
+            with open(cache_path + ".tmp", 'wb') as file:
+                file.write(f"{surface.get_width()} {surface.get_height()}\n".encode())
+                file.write(pygame.image.tobytes(surface, fmt))
+            os.replace(cache_path + ".tmp", cache_path)
+        except OSError as e:
+            print(f"Could not write image cache {cache_path}: {e}")
@@ -0,0 +1,155 @@
+"""
+Low-latency sound effects: clips decoded up front, played on a channel pool.
+
+Every clip is decoded into a pygame.mixer.Sound buffer by load() (run it off
+the render thread at startup), so playing one is a memcpy into the mixer
+rather than an MP3 decode from disk. The mixer runs with a small buffer
+(call pre_init() before pygame.init()); a clip is heard roughly one buffer
+after play().
+
+Clips are played on a fixed pool of channels. When every channel is busy a
+clip takes over the channel with the lowest priority below its own (the
+oldest one among equals), otherwise it is dropped. schedule() plays a clip
+at a given moment, started one output buffer early so it is heard on time;
+update() must be called every frame to start the clips that are due.
+
+Each play records its trigger-to-sound latency (from the moment the clip
+was due to the end of the mixer buffer it was queued into) into the
+audio_latency_seconds histogram.
+"""
+import collections
+import threading
+import time
+
+import pygame
+
+import metrics
+from punch_trace import LATENCY_BUCKETS, percentile
+
+metrics.describe("audio_latency_seconds", "Clip due (trigger) to audible, estimated from the mixer buffer",
+                 LATENCY_BUCKETS)
+metrics.describe("audio_load_seconds", "Time to decode each sound clip at startup")
+
+
+class AudioManager:
+    def __init__(self, clips, frequency=44100, buffer=256, channels=8, history=200):
+        self.paths = dict(clips)  # name -> file
+        self.frequency = frequency
+        self.buffer = buffer      # samples per mixer buffer
+        self.sounds = {}          # name -> pygame.mixer.Sound, filled by load()
+        self.channels = channels
+        self.ready = False
+        self.available = False    # False without an audio device; every call is then a no-op
+        self.output_latency = 0.0
+        self.dropped = 0
+        self.recent = collections.deque(maxlen=history)  # (latency, offset from its mark or None) in seconds
+        self._playing = {}        # channel index -> (priority, started)
+        self._pending = []        # (due perf_counter time, name, priority)
+        self._lock = threading.Lock()
+
+    def pre_init(self):
+        """Ask for the small mixer buffer; must run before pygame.init()"""
+        pygame.mixer.pre_init(self.frequency, -16, 2, self.buffer)
+
+    def load(self):
+        """Open the channel pool and decode every clip (blocking; run in a background thread)"""
+        if not pygame.mixer.get_init():
+            try:
+                pygame.mixer.init()
+            except pygame.error as e:
+                print(f"No audio device, sound disabled: {e}")
+                return
+        frequency, _, _ = pygame.mixer.get_init()
+        # SDL does not report the buffer it settled on; assume the size asked for
+        self.output_latency = self.buffer / frequency
+        pygame.mixer.set_num_channels(self.channels)
+        self.available = True
+        for name, path in self.paths.items():
+            started = time.perf_counter()
+            try:
+                sound = pygame.mixer.Sound(path)
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"Could not load sound {path}: {e}")
+                continue
+            metrics.observe("audio_load_seconds", time.perf_counter() - started, clip=name)
+            self.sounds[name] = sound
+        self.ready = True
+        print(f"Audio ready: {len(self.sounds)}/{len(self.paths)} clips, {self.channels} channels, "
+              f"~{self.output_latency * 1000:.1f} ms output buffer")
+
+    def play(self, name, priority=0, due=None):
+        """
+        Play a clip now on a free (or lower-priority) channel; returns False if
+        it was not played. due is the perf_counter() time a scheduled clip
+        should have started.
+        """
+        if not self.available:
+            return False
+        sound = self.sounds.get(name)
+        if sound is None:
+            print(f"Sound {name} not loaded yet, skipped")
+            return False
+        index = self._pick_channel(priority)
+        if index is None:
+            self.dropped += 1
+            print(f"Sound {name} dropped: no channel free below priority {priority}")
+            return False
+        started = time.perf_counter()
+        pygame.mixer.Channel(index).play(sound)
+        audible = time.perf_counter() + self.output_latency
+        self._playing[index] = (priority, started)
+        trigger = started if due is None else due
+        offset = None if due is None else audible - (due + self.output_latency)
+        self.recent.append((audible - trigger, offset))
+        metrics.observe("audio_latency_seconds", audible - trigger, clip=name)
+        return True
+
+    def schedule(self, name, delay, priority=0):
+        """Play a clip `delay` seconds from now, timed so it is heard then"""
+        due = time.perf_counter() + delay - self.output_latency
+        with self._lock:
+            self._pending.append((due, name, priority))
+            self._pending.sort()
+
+    def cancel(self):
+        with self._lock:
+            self._pending.clear()
+
+    def update(self):
+        """Start every scheduled clip that is due (call once per frame)"""
+        if not self._pending:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            due = [clip for clip in self._pending if clip[0] <= now]
+            self._pending = [clip for clip in self._pending if clip[0] > now]
+        for when, name, priority in due:
+            self.play(name, priority, when)
+
+    def next_due(self):
+        """Seconds until the next scheduled clip, or None"""
+        with self._lock:
+            return max(0.0, self._pending[0][0] - time.perf_counter()) if self._pending else None
+
+    def _pick_channel(self, priority):
+        victim = None
+        for index in range(self.channels):
+            if not pygame.mixer.Channel(index).get_busy():
+                self._playing.pop(index, None)
+                return index
+            playing = self._playing.get(index, (0, 0.0))
+            if playing[0] < priority and (victim is None or playing < self._playing.get(victim, (0, 0.0))):
+                victim = index
+        return victim
+
+    def report(self):
+        if not self.recent:
+            return "Audio: no clips played"
+        latencies = [latency * 1000 for latency, _ in self.recent]
+        offsets = [offset * 1000 for _, offset in self.recent if offset is not None]
+        report = (f"Audio: {len(self.recent)} clips, trigger-to-sound p50 {percentile(latencies, 0.5):.1f} ms "
+                  f"p95 {percentile(latencies, 0.95):.1f} ms, {self.dropped} dropped")
+        if offsets:
+            report += f"; scheduled clips off their mark p50 {percentile(offsets, 0.5):+.1f} ms " \
+                      f"p95 {percentile(offsets, 0.95):+.1f} ms"
+        return report
@@ -0,0 +1,167 @@
+"""
+Leaderboard query latency benchmark.
+
+Fills a scratch database with synthetic scores and times the leaderboard and
+high-score queries with and without the indexes from score_queries. The
+queries live here: the game reads its local store and never runs them.
+
+    python benchmarks/bench_leaderboard_queries.py                  # 10k, 100k, 1M
+    python benchmarks/bench_leaderboard_queries.py 10000 50000      # custom sizes
+
+Uses BENCH_MONGODB_URI (default mongodb://localhost:27017/). The scratch
+database is dropped afterwards unless --keep is given.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pymongo import DESCENDING, MongoClient
+
+import score_queries
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+RUNS = 25
+INSERT_CHUNK = 10_000
+
+# Only the fields the leaderboards render
+LEADERBOARD_PROJECTION = {"_id": 0, "username": 1, "score": 1}
+
+
+def top_scores(collection, limit=10):
+    """Top individual scores (one player may hold several rows)"""
+    return list(collection.find({}, LEADERBOARD_PROJECTION).sort("score", DESCENDING).limit(limit))
+
+
+def best_per_player(collection, limit=10):
+    """
+    Each player's best score, highest first.
+
+    Sorting on {username, score} and taking $first per username lets the
+    server answer the $group from the username_score_desc index with a
+    DISTINCT_SCAN (one index key per player) instead of reading every score.
+    """
+    pipeline = [
+        {"$sort": {"username": 1, "score": -1}},
+        {"$group": {"_id": "$username", "score": {"$first": "$score"}}},
+        {"$sort": {"score": -1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "username": "$_id", "score": 1}},
+    ]
+    return list(collection.aggregate(pipeline))
+
+
+def user_best(collection, username):
+    """A single player's best score, or 0 if they haven't played"""
+    best = collection.find_one({"username": username}, {"_id": 0, "score": 1}, sort=[("score", DESCENDING)])
+    return best["score"] if best else 0
+
+
+def overall_best(collection):
+    """The highest score ever recorded, or 0"""
+    best = collection.find_one({}, {"_id": 0, "score": 1}, sort=[("score", DESCENDING)])
+    return best["score"] if best else 0
+
+
+def populate(collection, count):
+    """Insert count synthetic scores; a few regulars play far more than most"""
+    players = [f"fighter{i}" for i in range(max(10, count // 20))]
+    weights = [1.0 / (rank + 1) for rank in range(len(players))]
+    start = datetime.now() - timedelta(days=90)
+    inserted = 0
+    while inserted < count:
+        chunk = min(INSERT_CHUNK, count - inserted)
+        names = random.choices(players, weights=weights, k=chunk)
+        collection.insert_many([
+            {
+                "username": name,
+                "score": random.randint(300, 1023),
+                "timestamp": start + timedelta(seconds=random.randint(0, 90 * 86400))
+            }
+            for name in names
+        ])
+        inserted += chunk
+    return players
+
+
+def time_query(fn, runs=RUNS):
+    fn()  # warm up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def winning_stage(collection, filter_doc, sort):
+    """The top-level stage the planner picked (COLLSCAN, IXSCAN, ...)"""
+    plan = collection.find(filter_doc).sort(sort).limit(1).explain()
+    stage = plan.get("queryPlanner", {}).get("winningPlan", {})
+    stages = []
+    while stage:
+        stages.append(stage.get("stage", "?"))
+        stage = stage.get("inputStage") or stage.get("queryPlan", {}).get("inputStage")
+    return " <- ".join(stages)
+
+
+def bench_size(db, count):
+    collection = db[f"scores_{count}"]
+    collection.drop()
+    print(f"\n=== {count:,} documents ===")
+    start = time.perf_counter()
+    players = populate(collection, count)
+    print(f"populated in {time.perf_counter() - start:.1f}s ({len(players):,} players)")
+    probe_user = players[len(players) // 2]
+
+    queries = [
+        ("top_scores", lambda: top_scores(collection, 10)),
+        ("best_per_player", lambda: best_per_player(collection, 10)),
+        ("user_best", lambda: user_best(collection, probe_user)),
+        ("overall_best", lambda: overall_best(collection)),
+    ]
+
+    results = {}
+    for label in ("no index", "indexed"):
+        if label == "indexed":
+            score_queries.ensure_indexes(collection)
+        print(f"-- {label}: user_best plan = {winning_stage(collection, {'username': probe_user}, [('score', -1)])}")
+        for name, fn in queries:
+            p50, p95 = time_query(fn)
+            results[(name, label)] = p50
+            print(f"   {name:<16} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+    print("-- speedup (p50 no index / indexed)")
+    for name, _ in queries:
+        indexed = results[(name, "indexed")]
+        speedup = results[(name, "no index")] / indexed if indexed else float("inf")
+        print(f"   {name:<16} {speedup:6.1f}x")
+    return collection
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sizes = [int(a) for a in args] or DEFAULT_SIZES
+    keep = "--keep" in sys.argv
+
+    client = MongoClient(os.getenv('BENCH_MONGODB_URI', 'mongodb://localhost:27017/'),
+                         serverSelectionTimeoutMS=5000)
+    client.admin.command('ping')
+    db = client['boxing_game_bench']
+
+    for count in sizes:
+        collection = bench_size(db, count)
+        if not keep:
+            collection.drop()
+
+    if not keep:
+        client.drop_database('boxing_game_bench')
+
+
+if __name__ == "__main__":
+    main()
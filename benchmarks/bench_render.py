@@ -0,0 +1,248 @@
+"""
+Frame-time benchmark for every screen renderer.
+
+    python benchmarks/bench_render.py                               # compare against render_baseline.json
+    python benchmarks/bench_render.py --save-baseline --rounds 6    # record a new baseline
+    python benchmarks/bench_render.py --sizes 1080p --entries 10 --frames 50
+
+Renders each screen offscreen (SDL dummy driver) at 720p, 1080p and 4K with 0,
+10 and 100 leaderboard entries and reports p50/p95/p99 frame times. The idle
+screens are measured twice: "full" repaints everything (a screen change or
+resize) and "steady" is an ordinary idle frame through the retained layers.
+The punch animation is stepped through its timeline at a simulated 60 FPS,
+one step_animation() call (draw and flip) per frame. The whole matrix runs
+--rounds times and each case keeps its fastest round; how far the rounds'
+medians spread is stored as the case's noise.
+
+Results are compared to the stored baseline: a median frame time more than
+--tolerance (or the case's recorded noise, if larger; 4K full repaints are
+memory bound and swing widely on shared hosts) and --min-delta-ms slower is
+reported as a regression and the exit status is 1; p95 changes are shown
+alongside. Baselines are only
+meaningful on the hardware they were recorded on, so record one on the kiosk
+hardware (the machine name is stored with it).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ["MONGODB_URI"] = ""
+os.environ["SCORE_STORE_FILE"] = os.path.join(tempfile.mkdtemp(), "bench_scores.db")
+os.environ["SCORE_SPOOL_FILE"] = ""
+os.environ["LEADERBOARD_WINDOWS"] = "all"  # the patched query serves the all-time board
+
+import pygame
+
+import boxing
+from punch_trace import percentile
+
+SIZES = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+ENTRY_COUNTS = [0, 10, 100]
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_baseline.json")
+WARMUP_FRAMES = 5
+
+
+def fake_leaderboard(count):
+    rng = random.Random(count)
+    entries = [{"username": f"fighter{i:03d}", "score": rng.uniform(650, 1023)} for i in range(count)]
+    return sorted(entries, key=lambda entry: -entry["score"])
+
+
+def use_leaderboard(entries):
+    """Serve the leaderboard from memory, still going through the read cache"""
+    boxing.query_leaderboard = lambda: entries
+    boxing.score_cache.clear()
+
+
+def use_screen(size):
+    boxing.screen = pygame.display.set_mode(size)
+    boxing.screen_width, boxing.screen_height = size
+    boxing.clear_gradient_cache()
+    boxing.compositor.clear()
+
+
+def time_frames(draw, frames, before=None):
+    for _ in range(WARMUP_FRAMES):
+        draw()
+    times = []
+    for _ in range(frames):
+        if before:
+            before()
+        start = time.perf_counter()
+        draw()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def set_state(state, username="benchmark"):
+    boxing.current_state = state
+    boxing.current_username = username
+    boxing.input_active = state == "username_input"
+
+
+def screen_cases(frames):
+    """(name, timing function) for every renderer that depends on the leaderboard"""
+    sidebar_width = lambda: int(boxing.screen_width * 0.35)
+
+    def username(full):
+        set_state("username_input")
+        return time_frames(boxing.display_username_input, frames,
+                           boxing.compositor.invalidate if full else None)
+
+    def initial(full):
+        set_state("initial")
+        return time_frames(boxing.display_initial_screen, frames,
+                           boxing.compositor.invalidate if full else None)
+
+    def sidebar():
+        surface = pygame.Surface((sidebar_width(), boxing.screen_height))
+        return time_frames(lambda: boxing.draw_leaderboard_sidebar(sidebar_width(), surface), frames)
+
+    def fullscreen():
+        set_state("punch_result")
+        return time_frames(lambda: boxing.draw_fullscreen_leaderboard("benchmark", 850), frames)
+
+    return [
+        ("display_username_input:full", lambda: username(True)),
+        ("display_username_input:steady", lambda: username(False)),
+        ("display_initial_screen:full", lambda: initial(True)),
+        ("display_initial_screen:steady", lambda: initial(False)),
+        ("draw_leaderboard_sidebar", sidebar),
+        ("draw_fullscreen_leaderboard", fullscreen),
+    ]
+
+
+def animation_cases():
+    """Renderers that don't read the leaderboard; run once per size"""
+    def punch_animation():
+        set_state("animating")
+        boxing.animation_target_score = 850
+        boxing.animation_punch = None
+        boxing.animation = boxing.punch_timeline(850).start(0.0)
+        times = []
+        frame = 0
+        while boxing.animation is not None:
+            start = time.perf_counter()
+            boxing.step_animation(now=frame / 60)
+            times.append(time.perf_counter() - start)
+            frame += 1
+        # The last step also draws the result screen; drop it
+        return times[:-1]
+
+    return [
+        ("step_animation", punch_animation),
+    ]
+
+
+def run_round(args):
+    results = {}
+    for size_name in args.sizes:
+        use_screen(SIZES[size_name])
+        for entry_count in args.entries:
+            use_leaderboard(fake_leaderboard(entry_count))
+            for name, measure in screen_cases(args.frames):
+                results[f"{name} {size_name} {entry_count}"] = measure()
+        use_leaderboard(fake_leaderboard(10))
+        for name, measure in animation_cases():
+            results[f"{name} {size_name} -"] = measure()
+    return results
+
+
+def run(args):
+    """Run the whole matrix --rounds times and keep each case's fastest round (like timeit)"""
+    best = {}
+    medians = {}
+    for _ in range(args.rounds):
+        for key, times in run_round(args).items():
+            medians.setdefault(key, []).append(percentile(times, 0.5))
+            if key not in best or percentile(times, 0.5) < percentile(best[key], 0.5):
+                best[key] = times
+    return {key: {
+        "frames": len(times),
+        "p50_ms": round(percentile(times, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(times, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(times, 0.99) * 1000, 3),
+        # Slowest round's median over the fastest's
+        "noise": round(max(medians[key]) / min(medians[key]) - 1, 3) if min(medians[key]) > 0 else 0.0,
+    } for key, times in best.items()}
+
+
+def report(summary, baseline, tolerance, min_delta_ms):
+    cases = baseline.get("cases", {}) if baseline else {}
+    regressions = []
+    print(f"{'renderer':<38} {'size':>5} {'rows':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'p50 vs base':>12} {'p95 vs base':>12}")
+    for key, stats in summary.items():
+        name, size, rows = key.split(" ")
+        base = cases.get(key)
+        changes = ["", ""]
+        if base:
+            for i, column in enumerate(("p50_ms", "p95_ms")):
+                if base[column] > 0:
+                    changes[i] = f"{(stats[column] / base[column] - 1) * 100:+.0f}%"
+            # The median is what a regression moves; tails on a shared machine are mostly noise
+            allowed = max(tolerance, base.get("noise", 0.0))
+            if base["p50_ms"] > 0 and stats["p50_ms"] / base["p50_ms"] - 1 > allowed \
+                    and stats["p50_ms"] - base["p50_ms"] > min_delta_ms:
+                changes[0] += " !"
+                regressions.append(key)
+        print(f"{name:<38} {size:>5} {rows:>4} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+              f"{stats['p99_ms']:>8.2f} {changes[0]:>12} {changes[1]:>12}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--entries", nargs="+", type=int, default=ENTRY_COUNTS)
+    parser.add_argument("--frames", type=int, default=100, help="measured frames per case")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="repeat the matrix and keep each case's fastest round, to ride out noisy neighbours")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed median slowdown (0.25 = 25%%); noisier cases allow their recorded noise")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1,
+                        help="ignore slowdowns smaller than this in absolute terms")
+    args = parser.parse_args()
+
+    summary = run(args)
+    machine = f"{platform.node()} {platform.machine()} {platform.python_version()} pygame {pygame.version.ver}"
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump({"machine": machine, "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "cases": summary}, file, indent=2)
+        report(summary, None, args.tolerance, args.min_delta_ms)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("machine") != machine:
+            print(f"Note: baseline recorded on {baseline.get('machine')}, this is {machine}\n")
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one\n")
+
+    regressions = report(summary, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.tolerance * 100:.0f}% "
+              f"(or their recorded noise) at p50:")
+        for key in regressions:
+            print(f"  {key}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
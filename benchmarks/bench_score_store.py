@@ -0,0 +1,91 @@
+"""
+Local score store latency benchmark.
+
+Fills a scratch SQLite store (score_store.py) with synthetic scores and times
+every read the game makes plus the insert it does per punch.
+
+    python benchmarks/bench_score_store.py                  # 10k, 100k, 1M
+    python benchmarks/bench_score_store.py 10000 50000      # custom sizes
+
+The store lives in a temporary directory and is deleted afterwards.
+"""
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bson import ObjectId
+
+from score_store import ScoreStore
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+RUNS = 200
+INSERT_CHUNK = 10_000
+
+
+def populate(store, count):
+    """Insert count synthetic scores as if pulled from MongoDB; a few regulars play far more than most"""
+    players = [f"fighter{i}" for i in range(max(10, count // 20))]
+    weights = [1.0 / (rank + 1) for rank in range(len(players))]
+    start = datetime.now() - timedelta(days=90)
+    inserted = 0
+    while inserted < count:
+        chunk = min(INSERT_CHUNK, count - inserted)
+        names = random.choices(players, weights=weights, k=chunk)
+        store.merge([(str(ObjectId()), name, float(random.randint(300, 1023)),
+                      start + timedelta(seconds=random.randint(0, 90 * 86400)))
+                     for name in names])
+        inserted += chunk
+    return players
+
+
+def time_call(fn, runs=RUNS):
+    fn()  # warm up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def bench_size(directory, count):
+    store = ScoreStore(os.path.join(directory, f"scores_{count}.db"))
+    print(f"\n=== {count:,} scores ===")
+    start = time.perf_counter()
+    players = populate(store, count)
+    print(f"populated in {time.perf_counter() - start:.1f}s ({len(players):,} players)")
+    probe_user = players[len(players) // 2]
+
+    calls = [
+        ("top_scores", lambda: store.top_scores(10)),
+        ("best_per_player", lambda: store.best_per_player(10)),
+        ("user_best", lambda: store.user_best(probe_user)),
+        ("overall_best", store.overall_best),
+        ("add (one punch)", lambda: store.add(str(ObjectId()), probe_user, 700.0, datetime.now())),
+        ("unsynced(50)", lambda: store.unsynced(50)),
+    ]
+    for name, fn in calls:
+        p50, p95 = time_call(fn)
+        print(f"   {name:<16} p50 {p50:8.1f} us   p95 {p95:8.1f} us")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    directory = tempfile.mkdtemp(prefix="bench_score_store_")
+    try:
+        for count in sizes:
+            bench_size(directory, count)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Serial pipeline benchmark: parsing throughput and punch-detection latency.
+
+    python benchmarks/bench_serial_pipeline.py captures/event.ppcap
+    python benchmarks/bench_serial_pipeline.py            # synthetic 200-punch capture
+
+Runs a capture through the same decoder and PunchDetector the game uses, as
+fast as possible, in the chunks it was recorded in. Latencies are in stream
+time: how long after the peak (or after the force dropped) the event fired.
+For end-to-end behaviour, including reconnects, replay the capture against
+the real game with tools/replay_serial.py.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy
+
+from punch_detector import PunchDetector
+from punch_trace import percentile
+from serial_capture import read_capture
+from serial_protocol import FrameDecoder, parse_text_line
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def bench_binary(chunks, end_gap_us):
+    decoder = FrameDecoder()
+    start = time.perf_counter()
+    batches = [decoder.feed(data) for _, data in chunks]
+    decode_time = time.perf_counter() - start
+    samples = sum(len(batch) for batch in batches)
+
+    detector = PunchDetector(end_gap_us=end_gap_us)
+    events = []
+    peak_latency = []
+    release_latency = []
+    start = time.perf_counter()
+    for batch in batches:
+        if not batch:
+            continue
+        array = numpy.array(batch, dtype=numpy.int64)
+        for event in detector.feed(array[:, 1], array[:, 2], array[:, 3]):
+            emitted_at = detector.recent()[0][-1]
+            peak_latency.append((emitted_at - event.peak_us) / 1000)
+            release_latency.append((emitted_at - event.start_us - event.duration * 1e6) / 1000)
+            events.append(event)
+    detect_time = time.perf_counter() - start
+
+    print(f"decode:  {samples:,} frames in {decode_time * 1000:.1f} ms "
+          f"-> {samples / decode_time:,.0f} frames/s  {decoder.stats()}")
+    print(f"detect:  {samples:,} samples in {detect_time * 1000:.1f} ms "
+          f"-> {samples / detect_time:,.0f} samples/s")
+    return events, peak_latency, release_latency
+
+
+def bench_text(chunks, end_gap_us):
+    start = time.perf_counter()
+    readings = []
+    pending = b""
+    for t_us, data in chunks:
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            values = parse_text_line(line.decode('utf-8', 'replace').strip())
+            if values:
+                readings.append((t_us, values[0], values[1]))
+    decode_time = time.perf_counter() - start
+    print(f"decode:  {len(readings):,} lines in {decode_time * 1000:.1f} ms "
+          f"-> {len(readings) / max(decode_time, 1e-9):,.0f} lines/s")
+
+    detector = PunchDetector(end_gap_us=end_gap_us)
+    events = []
+    peak_latency = []
+    release_latency = []
+    start = time.perf_counter()
+    for t_us, fsr1, fsr2 in readings:
+        completed = detector.flush(t_us) + detector.feed([t_us], [fsr1], [fsr2])
+        for event in completed:
+            peak_latency.append((t_us - event.peak_us) / 1000)
+            release_latency.append((t_us - event.start_us - event.duration * 1e6) / 1000)
+            events.append(event)
+    if readings:
+        events.extend(detector.flush(readings[-1][0] + end_gap_us))
+    detect_time = time.perf_counter() - start
+    print(f"detect:  {len(readings):,} samples in {detect_time * 1000:.1f} ms")
+    return events, peak_latency, release_latency
+
+
+def main():
+    if len(sys.argv) > 1:
+        capture = sys.argv[1]
+    else:
+        capture = os.path.join(tempfile.mkdtemp(), "synthetic.ppcap")
+        subprocess.run([sys.executable, os.path.join(ROOT, "tools", "record_serial.py"), capture,
+                        "--synthetic", "200"], check=True, stdout=subprocess.DEVNULL)
+
+    meta, chunks = read_capture(capture)
+    duration = chunks[-1][0] / 1e6 if chunks else 0
+    print(f"{capture}: {meta.get('protocol')} protocol, {len(chunks)} chunks, {duration:.1f} s")
+
+    if meta.get("protocol") == "binary":
+        events, peak_latency, release_latency = bench_binary(chunks, 30_000)
+    else:
+        events, peak_latency, release_latency = bench_text(chunks, 250_000)
+
+    print(f"events:  {len(events)} punches, peaks {[round(e.peak) for e in events][:20]}"
+          f"{' ...' if len(events) > 20 else ''}")
+    if peak_latency:
+        print(f"latency: peak->event p50 {statistics.median(peak_latency):.1f} ms, "
+              f"p95 {percentile(peak_latency, 0.95):.1f} ms; "
+              f"release->event p50 {statistics.median(release_latency):.1f} ms, "
+              f"p95 {percentile(release_latency, 0.95):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,114 @@
+import time
+
+# Reference point for the time-to-first-frame measurement
+STARTUP_TIME = time.perf_counter()
+
 import serial
 import pygame
 import sys
 import json
 import os
-import time
 import threading
 import random
 import math
+import atexit
+import numpy
 from pymongo import MongoClient
 from datetime import datetime
+from bson import ObjectId
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Import punch animation
-from punch_animation import animate_punch_score, create_responsive_layout
+from punch_animation import create_responsive_layout
+from tween import Timeline, ease_out_quad
+from score_cache import ReadCache
+from score_store import ScoreStore
+from score_sync import ScoreSync, import_spool
+from rank_index import RankIndex
+from circuit_breaker import CircuitBreaker
+from audio import AudioManager
+from asset_cache import AssetCache
+from leaderboard_windows import LeaderboardWindows, parse_event
+from punch_detector import PunchDetector
+from punch_channel import PunchChannel
+from punch_trace import PunchTrace, PunchTracer
+from serial_discovery import candidate_ports
+from serial_protocol import BINARY_BAUD, TEXT_REQUEST, FrameDecoder, negotiate_binary, parse_text_line
+from text_cache import get_font, render_text
+from screen_layers import Compositor
+from gradient_cache import gradient_surface, clear_gradient_cache, HORIZONTAL
+import score_queries
+import metrics
 
-# Serial setup with error handling
-try:
-    ser = serial.Serial('/dev/cu.usbmodem1401', 9600)
-    SERIAL_CONNECTED = True
-    print("Arduino connected successfully!")
-except Exception as e:
-    print(f"Arduino not connected: {e}")
-    print("Running in demo mode - use keyboard to simulate punches!")
-    SERIAL_CONNECTED = False
-    ser = None
+# Hardware and database handles are filled in by the background startup
+# tasks (see start_background_services) so the first frame never waits on them
+# Optional: tried first, before the ports found by USB VID/PID (see serial_discovery)
+SERIAL_PORT = os.getenv('SERIAL_PORT')
+SERIAL_BAUD = int(os.getenv('SERIAL_BAUD', str(BINARY_BAUD)))
+# "auto" negotiates binary frames and falls back to text; "text"/"binary" force one
+SERIAL_PROTOCOL = os.getenv('SERIAL_PROTOCOL', 'auto')
+SERIAL_BINARY = False
+frame_decoder = FrameDecoder()
+SERIAL_CONNECTED = False
+SERIAL_CONNECTING = True
+ser = None
+# Reconnect backoff: doubles from the minimum up to the maximum, never gives up
+SERIAL_BACKOFF_MIN = float(os.getenv('SERIAL_BACKOFF_MIN_MS', '100')) / 1000
+SERIAL_BACKOFF_MAX = float(os.getenv('SERIAL_BACKOFF_MAX_MS', '5000')) / 1000
+# How long the sensor was unavailable; downtime is only counted after a disconnect
+serial_link = {
+    "port": None,
+    "disconnects": 0,
+    "downtime_total_s": 0.0,
+    "last_outage_s": None,
+    "down_since": None,
+}
 
-# MongoDB setup
-try:
-    mongodb_uri = os.getenv('MONGODB_URI')
-    local_mongodb_uri = os.getenv('LOCAL_MONGODB_URI', 'mongodb://localhost:27017/')
-    database_name = os.getenv('DATABASE_NAME', 'boxing_game')
-    collection_name = os.getenv('COLLECTION_NAME', 'scores')
-    
-    if not mongodb_uri:
-        raise Exception("MONGODB_URI not found in .env file")
-    
-    client = MongoClient(mongodb_uri)
-    
-    # Test the connection
-    client.admin.command('ping')
-    
-    db = client[database_name]
-    scores_collection = db[collection_name]
-    print("Connected to MongoDB Atlas successfully")
-except Exception as e:
-    print(f"MongoDB Atlas connection failed: {e}")
-    print("Falling back to local MongoDB...")
-    try:
-        # Fallback to local MongoDB
-        client = MongoClient(local_mongodb_uri)
-        client.admin.command('ping')
-        db = client[database_name]
-        scores_collection = db[collection_name]
-        print("Connected to local MongoDB successfully")
-    except Exception as local_e:
-        print(f"Local MongoDB also failed: {local_e}")
-        client = None
-        db = None
-        scores_collection = None
+mongodb_uri = os.getenv('MONGODB_URI')
+local_mongodb_uri = os.getenv('LOCAL_MONGODB_URI', 'mongodb://localhost:27017/')
+database_name = os.getenv('DATABASE_NAME', 'boxing_game')
+collection_name = os.getenv('COLLECTION_NAME', 'scores')
+# One client per database, configured up front: a small connection pool
+# (only the sync thread and the breaker's probe use it), timeouts short
+# enough that a dead link fails in seconds, and retried writes and reads
+MONGODB_TIMEOUT_MS = int(os.getenv('MONGODB_TIMEOUT_MS', '3000'))  # server selection
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', str(MONGODB_TIMEOUT_MS)))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '5000'))
+MONGODB_POOL_SIZE = int(os.getenv('MONGODB_POOL_SIZE', '4'))
+# After DB_BREAKER_FAILURES failed syncs in a row MongoDB is left alone for
+# DB_BREAKER_COOLDOWN seconds, then probed in the background (the cooldown
+# doubles after each failed probe, up to DB_BREAKER_MAX_COOLDOWN)
+DB_BREAKER_FAILURES = int(os.getenv('DB_BREAKER_FAILURES', '3'))
+DB_BREAKER_COOLDOWN = float(os.getenv('DB_BREAKER_COOLDOWN', '15'))
+DB_BREAKER_MAX_COOLDOWN = float(os.getenv('DB_BREAKER_MAX_COOLDOWN', '300'))
+client = None
+db = None
+scores_collection = None
+
+# Posted to the pygame event queue when a background startup task finishes
+SERVICES_READY_EVENT = pygame.USEREVENT + 1
+# Posted by other threads to wake the main loop out of its idle wait
+WAKE_EVENT = pygame.USEREVENT + 2
+
+STARTUP_METRICS_FILE = os.getenv('STARTUP_METRICS_FILE', 'startup_metrics.jsonl')
+startup_metrics = {}
+
+# Sound clips, decoded into memory by the load_audio startup task and played
+# through a small mixer buffer so they land with the score reveal
+AUDIO_BUFFER = int(os.getenv('AUDIO_BUFFER', '256'))  # samples; ~6 ms at 44.1 kHz
+AUDIO_CHANNELS = int(os.getenv('AUDIO_CHANNELS', '8'))
+REVEAL_SOUND_PRIORITY = 1
+insults_music = ["barbie.MP3"]
+praises_music = ["cena.mp3"]
+audio = AudioManager({clip: clip for clip in insults_music + praises_music},
+                     buffer=AUDIO_BUFFER, channels=AUDIO_CHANNELS)
+audio.pre_init()
+atexit.register(lambda: print(audio.report()))
 
 pygame.init()
-pygame.mixer.init()
 
 # Taunts and praises
 insults = [
@@ -97,14 +142,18 @@ praises = [
     "Boxing legend in the making!"
 ]
 
-insults_music = ["barbie.mp3"]
-praises_music = ["cena.mp3"]
+# Display setup (the window is opened by init_display)
+screen = None
+screen_width, screen_height = 0, 0
 
-# Display setup
-info = pygame.display.Info()
-screen_width, screen_height = info.current_w, info.current_h
-screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
-pygame.display.set_caption('Power Punch Boxing Game')
+def init_display():
+    """Open the resizable game window at the desktop resolution"""
+    global screen, screen_width, screen_height
+    info = pygame.display.Info()
+    screen_width, screen_height = info.current_w, info.current_h
+    screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
+    pygame.display.set_caption('Power Punch Boxing Game')
+    prepare_assets()
 
 # Colors - Boxing-themed UI palette
 WHITE = (255, 255, 255)
@@ -132,6 +181,22 @@ SPEED_YELLOW = (255, 215, 50)     # Speed bag yellow
 
 minimum_threshold = 305
 
+# Impact segmentation: an impact ends after this long below minimum_threshold.
+# The text protocol only reports every 100 ms, so it needs a longer gap.
+BINARY_END_GAP_US = int(os.getenv('PUNCH_END_GAP_MS', '30')) * 1000
+TEXT_END_GAP_US = 250_000
+punch_detector = PunchDetector(threshold=minimum_threshold, end_gap_us=BINARY_END_GAP_US)
+PUNCH_SCORE_THRESHOLD = 650  # weaker impacts are detected but not scored
+GREAT_PUNCH_SCORE = 865  # above this John Cena shows up instead of Barbie
+# Punches cross from the serial thread to the main loop only through this queue
+PUNCH_QUEUE_SIZE = int(os.getenv('PUNCH_QUEUE_SIZE', '8'))
+punch_channel = PunchChannel(PUNCH_QUEUE_SIZE, on_put=lambda punch: wake_main_loop())
+atexit.register(lambda channel=punch_channel: print(f"Punch channel: {channel.stats()}"))
+# Peak-to-screen latency per punch, by pipeline stage (see punch_trace.py)
+PUNCH_LATENCY_BUDGET_MS = float(os.getenv('PUNCH_LATENCY_BUDGET_MS', '100'))
+punch_tracer = PunchTracer(PUNCH_LATENCY_BUDGET_MS / 1000, os.getenv('PUNCH_TRACE_FILE') or None)
+atexit.register(lambda tracer=punch_tracer: print(tracer.report()))
+
 # State management - Enhanced with new player feature
 current_state = "username_input"  # Start with username input
 update_screen_display_time = 8  # seconds
@@ -141,109 +206,176 @@ input_active = True
 show_leaderboard = False
 show_new_player_button = False
 button_rects = {}  # Store button rectangles for click detection
+compositor = Compositor()  # Retained layers + dirty rects for the idle screens
 mouse_pos = (0, 0)  # Track mouse position for hover effects
 
-# Animation state management
-animation_active = False
+# Animation state management: the reveal is a timeline stepped once per
+# main-loop pass (see step_animation), never a loop of its own
+animation = None  # Timeline of the punch being revealed
 animation_target_score = 0
-animation_start_time = 0
-animation_duration = 2.5
+animation_punch = None  # QueuedPunch being animated, for punch-to-screen latency
 
-# Fonts - Enhanced typography with better sizing
-font_title = pygame.font.Font(None, 80)   # Reduced from 120
-font_large = pygame.font.Font(None, 60)   # Reduced from 90
-font_medium = pygame.font.Font(None, 40)  # Reduced from 50
-font_small = pygame.font.Font(None, 28)   # Reduced from 36
-font_tiny = pygame.font.Font(None, 20)    # Reduced from 24
+# Frame pacing: animations run at TARGET_FPS, idle screens sleep in
+# pygame.event.wait and only redraw when their glow/cursor frame changes
+TARGET_FPS = int(os.getenv('TARGET_FPS', '60'))
+IDLE_FRAME_INTERVAL = 0.5  # glow and cursor blink advance every half second
+IDLE_STATES = ("username_input", "initial")
+frame_clock = pygame.time.Clock()
+next_idle_frame = 0
 
-# Images
-background_img = pygame.image.load('images/bg.png')
-barbie_img = pygame.image.load('images/barbie.png')
-cena_img = pygame.image.load('images/cenaa.png')
+# Fonts - Enhanced typography with better sizing
+font_title = get_font(80)   # Reduced from 120
+font_large = get_font(60)   # Reduced from 90
+font_medium = get_font(40)  # Reduced from 50
+font_small = get_font(28)   # Reduced from 36
+font_tiny = get_font(20)    # Reduced from 24
 
-# JSON file to store high scores
-high_score_file = 'high_scores.json'
+# Images: decoded, converted to the display format and scaled on first use,
+# with scaled variants kept per window size (ASSET_CACHE_DIR keeps them on disk)
+assets = AssetCache(os.getenv('ASSET_CACHE_DIR', ''), max_variants=int(os.getenv('ASSET_CACHE_SIZE', '32')))
+assets.register("background", 'images/bg.png')
+assets.register("barbie", 'images/barbie.png', alpha=True)
+assets.register("cena", 'images/cenaa.png', alpha=True)
 
 UPDATE_DELAY = 0.5
 last_update_time = 0
 
-# MongoDB functions
-def store_score_to_mongodb(username, score):
-    """Store a user's score to MongoDB"""
-    if scores_collection is not None:
-        try:
-            score_data = {
-                "username": username,
-                "score": score,
-                "timestamp": datetime.now()
-            }
-            scores_collection.insert_one(score_data)
-            print(f"Score stored for {username}: {score}")
-        except Exception as e:
-            print(f"Error storing score: {e}")
-    else:
-        print("MongoDB not connected. Score not stored.")
+# "best_per_player" shows each fighter once; "all_scores" lists raw top scores
+LEADERBOARD_MODE = os.getenv('LEADERBOARD_MODE', 'best_per_player')
 
-def get_leaderboard():
-    """Get top 10 scores from MongoDB"""
-    if scores_collection is not None:
-        try:
-            top_scores = list(scores_collection.find().sort("score", -1).limit(10))
-            return top_scores
-        except Exception as e:
-            print(f"Error retrieving leaderboard: {e}")
-            return []
-    else:
-        print("MongoDB not connected. Cannot retrieve leaderboard.")
-        return []
+# Leaderboard windows: the sidebar and result screen cycle through them every
+# LEADERBOARD_CYCLE_SECONDS (0 = stay on the first) and LEFT/RIGHT steps by
+# hand. "event" only appears once EVENT_NAME and EVENT_START are set.
+leaderboard_windows = LeaderboardWindows(
+    [name.strip() for name in os.getenv('LEADERBOARD_WINDOWS', 'all,today,event,week').split(',') if name.strip()],
+    parse_event(os.getenv('EVENT_NAME', ''), os.getenv('EVENT_START', ''), os.getenv('EVENT_END', ''))
+)
+LEADERBOARD_CYCLE_SECONDS = float(os.getenv('LEADERBOARD_CYCLE_SECONDS', '10'))
+leaderboard_window_offset = 0
 
-def get_user_high_score(username):
-    """Get a specific user's highest score"""
-    if scores_collection is not None:
-        try:
-            user_scores = list(scores_collection.find({"username": username}).sort("score", -1).limit(1))
-            if user_scores:
-                return user_scores[0]["score"]
-            return 0
-        except Exception as e:
-            print(f"Error retrieving user high score: {e}")
-            return 0
-    else:
-        return 0
+# Read cache in front of the local store, so redraws don't even query SQLite
+score_cache = ReadCache(
+    ttl=float(os.getenv('LEADERBOARD_CACHE_TTL', '30')),
+    max_entries=int(os.getenv('LEADERBOARD_CACHE_SIZE', '64'))
+)
 
-def get_overall_high_score():
-    """Get the overall highest score from MongoDB"""
-    if scores_collection is not None:
-        try:
-            highest = list(scores_collection.find().sort("score", -1).limit(1))
-            if highest:
-                return highest[0]["score"]
-            return 0
-        except Exception as e:
-            print(f"Error retrieving overall high score: {e}")
-            return 0
-    else:
-        return 0
+# Offline first: every score is stored in the local SQLite store and every
+# read is served from it; score_sync pushes new scores to MongoDB and merges
+# other kiosks' scores in the background, whenever the database is reachable
+score_store = ScoreStore(os.getenv('SCORE_STORE_FILE', 'scores.db'), leaderboard_windows)
+import_spool(score_store, os.getenv('SCORE_SPOOL_FILE', 'score_spool.jsonl'))
+# Every fighter's best score, for "rank N of M" without a query per punch
+# (seeded by load_rankings at startup)
+rank_index = RankIndex()
+db_breaker = CircuitBreaker(
+    lambda: probe_mongodb(),
+    failure_threshold=DB_BREAKER_FAILURES,
+    cooldown=DB_BREAKER_COOLDOWN,
+    max_cooldown=DB_BREAKER_MAX_COOLDOWN,
+    on_change=lambda state: database_state_changed(state)
+)
+score_sync = ScoreSync(
+    score_store,
+    lambda: scores_collection,
+    interval=float(os.getenv('SCORE_SYNC_INTERVAL', '10')),
+    on_change=lambda rows: scores_merged(rows),
+    breaker=db_breaker
+)
+score_sync.start()
+atexit.register(score_sync.stop)
+
+# Runtime metrics: scraped from a localhost endpoint and/or written to a
+# node_exporter textfile; F3 shows them on screen
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))  # 0 disables the endpoint
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_FILE = os.getenv('METRICS_FILE', '')
+METRICS_FILE_INTERVAL = float(os.getenv('METRICS_FILE_INTERVAL', '15'))
+show_metrics_overlay = False
+metrics_overlay = None  # (surface, rect, built_at)
+metrics_overlay_rates = (0, {})  # previous (time, counters) for per-second rates
+
+metrics.describe("frame_seconds", "Time to draw and present one frame, by game state")
+metrics.describe("db_call_seconds", "Duration of score store reads/writes and MongoDB sync calls")
+metrics.describe("serial_bytes_total", "Bytes read from the Arduino")
+metrics.describe("serial_frames_total", "Binary sensor frames decoded")
+metrics.describe("serial_lines_total", "Text sensor lines read")
+metrics.describe("serial_parse_failures_total", "Sensor data that could not be parsed, by kind")
+metrics.describe("serial_dropped_frames_total", "Binary frames lost in transit (sequence gaps)")
+metrics.gauge("punch_queue_depth", lambda: punch_channel.depth())
+metrics.gauge("punches_dropped", lambda: punch_channel.dropped)
+metrics.gauge("score_queue_depth", score_sync.pending)
+metrics.gauge("scores_pushed", lambda: score_sync.pushed)
+metrics.gauge("scores_pulled", lambda: score_sync.pulled)
+metrics.gauge("leaderboard_cache_hit_ratio", lambda: score_cache.stats()["hit_rate"])
+metrics.gauge("serial_connected", lambda: int(SERIAL_CONNECTED))
+metrics.gauge("serial_disconnects", lambda: serial_link["disconnects"])
+metrics.gauge("serial_downtime_seconds", lambda: serial_link["downtime_total_s"] + (
+    time.perf_counter() - serial_link["down_since"] if serial_link["down_since"] is not None else 0))
+metrics.gauge("database_connected", lambda: int(scores_collection is not None))
+metrics.gauge("database_circuit_state",
+              lambda: {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}[db_breaker.state])
+metrics.gauge("database_circuit_trips", lambda: db_breaker.trips)
+
+# Score storage: local first, synced to MongoDB in the background
+@metrics.timed("db_call_seconds", call="store_score")
+def store_score(username, score):
+    """Store a user's score locally; score_sync pushes it to MongoDB"""
+    score_store.add(str(ObjectId()), username, score, datetime.now())
+    rank_index.update(username, score)
+    score_cache.invalidate()
+    score_sync.wake()
+    print(f"Score stored for {username}: {score}")
+
+def scores_merged(rows):
+    """Scores from other kiosks landed in the local store (sync thread)"""
+    rank_index.update_many((username, score) for _, username, score, _ in rows)
+    score_cache.invalidate()
+
+def current_leaderboard_window():
+    """The leaderboard window on show: the timed cycle plus any LEFT/RIGHT steps"""
+    step = int(time.time() / LEADERBOARD_CYCLE_SECONDS) if LEADERBOARD_CYCLE_SECONDS > 0 else 0
+    names = leaderboard_windows.names
+    return names[(step + leaderboard_window_offset) % len(names)]
+
+def step_leaderboard_window(steps):
+    global leaderboard_window_offset
+    leaderboard_window_offset += steps
+
+def get_leaderboard(window="all"):
+    """Get the top 10 scores of a leaderboard window (cached per window and period)"""
+    if window == "all":
+        return score_cache.get("leaderboard", query_leaderboard)
+    period = leaderboard_windows.current(window)
+    return score_cache.get(("leaderboard", window, period.key), lambda: query_window_leaderboard(period))
 
-# File-based high score functions
-def read_high_scores():
-    if os.path.exists(high_score_file):
-        with open(high_score_file, 'r') as file:
-            return json.load(file)
-    return {"high_score": 0}
+@metrics.timed("db_call_seconds", call="leaderboard")
+def query_leaderboard():
+    """Get the top 10 players (best score each) from the local store"""
+    if LEADERBOARD_MODE == "all_scores":
+        return score_store.top_scores(10)
+    return score_store.best_per_player(10)
 
-def write_high_score(score):
-    with open(high_score_file, 'w') as file:
-        json.dump({"high_score": score}, file)
+@metrics.timed("db_call_seconds", call="window_leaderboard")
+def query_window_leaderboard(period):
+    """Get the top 10 players of one window period from its rollup"""
+    return score_store.window_leaderboard(period.window, period.key, 10)
 
-def play_song(song):
-    if not pygame.mixer.music.get_busy():
-        pygame.mixer.music.load(song)
-        pygame.mixer.music.play()
+def reveal_clip(score):
+    """The taunt or praise that plays when the final score is revealed"""
+    return random.choice(praises_music if score > GREAT_PUNCH_SCORE else insults_music)
 
-# Initialize high score
-high_scores = read_high_scores()
-highest_score = max(high_scores["high_score"], get_overall_high_score())
+def reveal_character(score):
+    """John Cena for a great punch, Barbie otherwise"""
+    return "cena" if score > GREAT_PUNCH_SCORE else "barbie"
+
+def character_box(width, height):
+    """Area the revealed character is scaled to fit, for a screen of this size"""
+    return int(width * 0.45), int(height * 0.28)
+
+def prepare_assets():
+    """Scale the reveal characters for the current window ahead of the first punch"""
+    box = character_box(screen_width, screen_height)
+    threading.Thread(target=assets.prepare, args=({"barbie": box, "cena": box},), daemon=True).start()
 
 # Utility functions for UI
 def draw_button(surface, text, x, y, width, height, color, text_color, border_color=None, hover=False):
@@ -262,7 +394,7 @@ def draw_button(surface, text, x, y, width, height, color, text_color, border_co
         pygame.draw.rect(surface, border_color, button_rect, 3, border_radius=15)
     
     # Draw text centered on button
-    text_surface = font_medium.render(text, True, text_color)
+    text_surface = render_text(font_medium, text, text_color)
     text_rect = text_surface.get_rect(center=button_rect.center)
     surface.blit(text_surface, text_rect)
     
@@ -283,12 +415,7 @@ def draw_card(surface, x, y, width, height, color=WHITE, border_color=SWEAT_GRAY
 
 def draw_gradient_background(surface, color1, color2):
     """Draw a gradient background"""
-    for y in range(screen_height):
-        ratio = y / screen_height
-        r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-        g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-        b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-        pygame.draw.line(surface, (r, g, b), (0, y), (screen_width, y))
+    surface.blit(gradient_surface((screen_width, screen_height), color1, color2), (0, 0))
 
 def draw_modern_button(surface, text, x, y, width, height, color, text_color, hover=False):
     """Draw a modern button with enhanced styling and proper text fitting"""
@@ -311,21 +438,21 @@ def draw_modern_button(surface, text, x, y, width, height, color, text_color, ho
     
     # Smart text sizing - choose font that fits
     font_to_use = font_small  # Start with smaller font
-    text_surface = font_to_use.render(text, True, text_color)
+    text_surface = render_text(font_to_use, text, text_color)
     
     # If text is too wide, try even smaller font
     if text_surface.get_width() > width - 20:
         font_to_use = font_tiny
-        text_surface = font_to_use.render(text, True, text_color)
+        text_surface = render_text(font_to_use, text, text_color)
     
     # If still too wide, truncate text
     if text_surface.get_width() > width - 20:
         while len(text) > 1 and text_surface.get_width() > width - 20:
             text = text[:-1]
-            text_surface = font_to_use.render(text + "...", True, text_color)
+            text_surface = render_text(font_to_use, text + "...", text_color)
     
     # Text with shadow
-    shadow_surface = font_to_use.render(text, True, (30, 30, 30))
+    shadow_surface = render_text(font_to_use, text, (30, 30, 30))
     shadow_rect = shadow_surface.get_rect(center=(button_rect.centerx + 2, button_rect.centery + 2))
     surface.blit(shadow_surface, shadow_rect)
     
@@ -335,24 +462,29 @@ def draw_modern_button(surface, text, x, y, width, height, color, text_color, ho
     
     return button_rect
 
-def draw_leaderboard_sidebar(sidebar_width):
+def sidebar_glow_step():
+    """Current step (0-99) of the sidebar glow animation; advances every half second"""
+    return int(time.time() * 2) % 100
+
+def draw_leaderboard_sidebar(sidebar_width, surface=None, leaderboard=None, glow_step=None, window=None):
     """Draw spectacular professional leaderboard sidebar with modern UI"""
-    # Calculate sidebar position (right side)
-    sidebar_x = screen_width - sidebar_width
+    if surface is None:
+        # Calculate sidebar position (right side of the screen)
+        surface = screen
+        sidebar_x = screen_width - sidebar_width
+    else:
+        # Drawing onto a sidebar-sized layer
+        sidebar_x = 0
     
     # Create sophisticated background with depth
-    # Main gradient background - boxing gym colors
-    for x in range(sidebar_width):
-        ratio = x / sidebar_width
-        # Boxing gym gradient with leather/steel tones
-        r = int(20 * (1 - ratio) + 35 * ratio)
-        g = int(15 * (1 - ratio) + 25 * ratio)
-        b = int(10 * (1 - ratio) + 15 * ratio)
-        pygame.draw.line(screen, (r, g, b), (sidebar_x + x, 0), (sidebar_x + x, screen_height))
+    # Main gradient background - boxing gym colors (leather/steel tones)
+    surface.blit(gradient_surface((sidebar_width, screen_height), (20, 15, 10), (35, 25, 15), HORIZONTAL),
+                (sidebar_x, 0))
     
     # Enhanced left border with animated glow
-    import time
-    glow_intensity = abs(int(time.time() * 2) % 100 - 50) / 50.0
+    if glow_step is None:
+        glow_step = sidebar_glow_step()
+    glow_intensity = abs(glow_step - 50) / 50.0
     base_glow = 150 + int(glow_intensity * 105)
     
     # Multi-layer border glow - championship gold
@@ -360,39 +492,38 @@ def draw_leaderboard_sidebar(sidebar_width):
         alpha_factor = max(0, 1 - i / 5.0)
         border_brightness = int(base_glow * alpha_factor)
         border_color = (border_brightness, int(border_brightness * 0.84), 0)
-        pygame.draw.line(screen, border_color, (sidebar_x + i, 0), (sidebar_x + i, screen_height), 1)
+        pygame.draw.line(surface, border_color, (sidebar_x + i, 0), (sidebar_x + i, screen_height), 1)
     
     # Elegant header section with gradient
     header_height = 100
     header_rect = pygame.Rect(sidebar_x, 0, sidebar_width, header_height)
     
     # Header gradient
-    for y in range(header_height):
-        ratio = y / header_height
-        r = int(30 * (1 - ratio) + 15 * ratio)
-        g = int(45 * (1 - ratio) + 25 * ratio)  
-        b = int(70 * (1 - ratio) + 40 * ratio)
-        pygame.draw.line(screen, (r, g, b), (sidebar_x, y), (sidebar_x + sidebar_width, y))
+    surface.blit(gradient_surface((sidebar_width, header_height), (30, 45, 70), (15, 25, 40)), (sidebar_x, 0))
     
     # Header border
-    pygame.draw.rect(screen, CHAMPION_GOLD, header_rect, 3)
+    pygame.draw.rect(surface, CHAMPION_GOLD, header_rect, 3)
 
     
     # Title with layered shadow effect
+    if window is None:
+        window = current_leaderboard_window()
+    title = leaderboard_windows.title(window)
     for offset in [(3, 3), (2, 2), (1, 1)]:
         shadow_color = (5, 5, 5) if offset == (3, 3) else (10, 10, 10) if offset == (2, 2) else (15, 15, 15)
-        title_shadow = font_large.render("LEADERBOARD", True, shadow_color)
+        title_shadow = render_text(font_large, title, shadow_color)
         shadow_rect = title_shadow.get_rect(center=(sidebar_x + sidebar_width // 2 + offset[0], 55 + offset[1]))
-        screen.blit(title_shadow, shadow_rect)
+        surface.blit(title_shadow, shadow_rect)
     
     # Main title
-    title_text = font_large.render("HALL OF FAME", True, CHAMPION_GOLD)
+    title_text = render_text(font_large, title, CHAMPION_GOLD)
     title_rect = title_text.get_rect(center=(sidebar_x + sidebar_width // 2, 55))
-    screen.blit(title_text, title_rect)
+    surface.blit(title_text, title_rect)
  
     
     # Get leaderboard data
-    leaderboard = get_leaderboard()
+    if leaderboard is None:
+        leaderboard = get_leaderboard(window)
     
     if leaderboard:
         # Elegant header section for rankings
@@ -400,25 +531,19 @@ def draw_leaderboard_sidebar(sidebar_width):
         header_bg = pygame.Rect(sidebar_x + 8, header_y, sidebar_width - 16, 40)
         
         # Header gradient
-        for i in range(40):
-            ratio = i / 40
-            r = int(25 * (1 - ratio) + 35 * ratio)
-            g = int(35 * (1 - ratio) + 50 * ratio)
-            b = int(55 * (1 - ratio) + 75 * ratio)
-            pygame.draw.line(screen, (r, g, b), 
-                           (sidebar_x + 8, header_y + i), 
-                           (sidebar_x + sidebar_width - 8, header_y + i))
+        surface.blit(gradient_surface((sidebar_width - 15, 40), (25, 35, 55), (35, 50, 75)),
+                    (sidebar_x + 8, header_y))
         
-        pygame.draw.rect(screen, (100, 85, 20), header_bg, 2, border_radius=12)
+        pygame.draw.rect(surface, (100, 85, 20), header_bg, 2, border_radius=12)
         
         # Header text with better positioning and proper alignment
-        rank_text = font_small.render("RANK", True, CHAMPION_GOLD)
-        name_text = font_small.render("CHAMPION", True, CHAMPION_GOLD)
-        score_text = font_small.render("POWER", True, CHAMPION_GOLD)
+        rank_text = render_text(font_small, "RANK", CHAMPION_GOLD)
+        name_text = render_text(font_small, "CHAMPION", CHAMPION_GOLD)
+        score_text = render_text(font_small, "POWER", CHAMPION_GOLD)
         
-        screen.blit(rank_text, (sidebar_x + 20, header_y + 12))
-        screen.blit(name_text, (sidebar_x + 85, header_y + 12))
-        screen.blit(score_text, (sidebar_x + sidebar_width - 100, header_y + 12))
+        surface.blit(rank_text, (sidebar_x + 20, header_y + 12))
+        surface.blit(name_text, (sidebar_x + 85, header_y + 12))
+        surface.blit(score_text, (sidebar_x + sidebar_width - 100, header_y + 12))
 
         entry_y = header_y + 55
         entry_height = 38  
@@ -478,11 +603,11 @@ def draw_leaderboard_sidebar(sidebar_width):
                         glow_tint = (min(255, 60 + glow_alpha), min(255, 40 + glow_alpha), 0)
                     
                     # Simulate glow with multiple rectangles
-                    pygame.draw.rect(screen, glow_tint, glow_rect, 1, border_radius=12)
+                    pygame.draw.rect(surface, glow_tint, glow_rect, 1, border_radius=12)
             
             # Main entry background
-            pygame.draw.rect(screen, bg_color, entry_rect, border_radius=10)
-            pygame.draw.rect(screen, border_color, entry_rect, 2, border_radius=10)
+            pygame.draw.rect(surface, bg_color, entry_rect, border_radius=10)
+            pygame.draw.rect(surface, border_color, entry_rect, 2, border_radius=10)
             
             # Rank display with icons and styling
             if rank == 1:
@@ -505,36 +630,84 @@ def draw_leaderboard_sidebar(sidebar_width):
                 shadow_intensity = 0.4
                 shadow_color = tuple(int(c * shadow_intensity) for c in (0, 0, 0))
                 
-                rank_shadow = font_small.render(rank_display, True, shadow_color)
-                name_shadow = font_small.render(username[:8], True, shadow_color)
-                score_shadow = font_small.render(str(score), True, shadow_color)
+                rank_shadow = render_text(font_small, rank_display, shadow_color)
+                name_shadow = render_text(font_small, username[:8], shadow_color)
+                score_shadow = render_text(font_small, str(score), shadow_color)
                 
-                screen.blit(rank_shadow, (sidebar_x + 15 + shadow_offset[0], entry_y + text_y_offset + shadow_offset[1]))
-                screen.blit(name_shadow, (sidebar_x + 85 + shadow_offset[0], entry_y + text_y_offset + shadow_offset[1]))
-                screen.blit(score_shadow, (sidebar_x + sidebar_width - 80 + shadow_offset[0], entry_y + text_y_offset + shadow_offset[1]))
+                surface.blit(rank_shadow, (sidebar_x + 15 + shadow_offset[0], entry_y + text_y_offset + shadow_offset[1]))
+                surface.blit(name_shadow, (sidebar_x + 85 + shadow_offset[0], entry_y + text_y_offset + shadow_offset[1]))
+                surface.blit(score_shadow, (sidebar_x + sidebar_width - 80 + shadow_offset[0], entry_y + text_y_offset + shadow_offset[1]))
             
             # Main text with enhanced colors and proper alignment
             text_color = WHITE if rank > 3 else (255, 255, 220)
             
-            rank_surface = font_small.render(rank_display, True, rank_color)
-            name_surface = font_small.render(username[:8], True, text_color)
-            score_surface = font_small.render(str(score), True, rank_color)
+            rank_surface = render_text(font_small, rank_display, rank_color)
+            name_surface = render_text(font_small, username[:8], text_color)
+            score_surface = render_text(font_small, str(score), rank_color)
             
             # Properly aligned text positioning
-            screen.blit(rank_surface, (sidebar_x + 15, entry_y + text_y_offset))
-            screen.blit(name_surface, (sidebar_x + 85, entry_y + text_y_offset))
-            screen.blit(score_surface, (sidebar_x + sidebar_width - 80, entry_y + text_y_offset))
+            surface.blit(rank_surface, (sidebar_x + 15, entry_y + text_y_offset))
+            surface.blit(name_surface, (sidebar_x + 85, entry_y + text_y_offset))
+            surface.blit(score_surface, (sidebar_x + sidebar_width - 80, entry_y + text_y_offset))
             
             entry_y += entry_height + entry_spacing
     
     else:
         # No leaderboard data
         no_data_y = 200  # Fixed Y position for no data message
-        no_data_text = font_large.render("NO CHAMPIONS YET", True, CHAMPION_GOLD)
+        no_data_text = render_text(font_large, "NO CHAMPIONS YET", CHAMPION_GOLD)
         no_data_rect = no_data_text.get_rect(center=(sidebar_x + sidebar_width // 2, no_data_y))
-        screen.blit(no_data_text, no_data_rect)
+        surface.blit(no_data_text, no_data_rect)
+
+    # Database status footer (only while the circuit breaker keeps MongoDB away)
+    status = database_status()
+    if status:
+        status_text = render_text(font_tiny, status, TRAINING_ORANGE)
+        surface.blit(status_text, status_text.get_rect(center=(sidebar_x + sidebar_width // 2, screen_height - 25)))
+
+def database_status():
+    """Footer text for the database state, or None while MongoDB is in use"""
+    if db_breaker.state == CircuitBreaker.OPEN:
+        return "OFFLINE - SCORES SAVED ON THIS KIOSK"
+    if db_breaker.state == CircuitBreaker.HALF_OPEN:
+        return "RECONNECTING TO SCORE DATABASE..."
+    return None
 
 
+def leaderboard_key(leaderboard):
+    """What the sidebar shows for this leaderboard, for change detection"""
+    return tuple((entry["username"], entry["score"]) for entry in leaderboard)
+
+def draw_sidebar_layer(sidebar_width):
+    """Composite the leaderboard sidebar, rebuilding its layer only when the data or glow step changes"""
+    window = current_leaderboard_window()
+    leaderboard = get_leaderboard(window)
+    glow_step = sidebar_glow_step()
+    key = (sidebar_width, screen_height, window, leaderboard_key(leaderboard), glow_step, database_status())
+    sidebar_rect = pygame.Rect(screen_width - sidebar_width, 0, sidebar_width, screen_height)
+    if compositor.region_changed("sidebar", sidebar_rect, key):
+        layer = compositor.layer("sidebar", key, sidebar_rect.size,
+                                 lambda surface: draw_leaderboard_sidebar(sidebar_width, surface, leaderboard,
+                                                                          glow_step, window))
+        screen.blit(layer, sidebar_rect)
+
+def draw_username_background(surface, main_width):
+    """Static part of the username screen: backdrop and titles"""
+    # Draw boxing gym atmosphere background
+    surface.fill((25, 20, 15))
+    
+    # Title section with better spacing
+    title_y = 60
+    title_text = render_text(font_title, "POWER PUNCH", CHAMPION_GOLD)
+    subtitle_text = render_text(font_large, "Boxing Championship", WHITE)
+    
+    title_rect = title_text.get_rect(center=(main_width // 2, title_y))
+    subtitle_rect = subtitle_text.get_rect(center=(main_width // 2, title_y + 60))
+    
+    surface.blit(title_text, title_rect)
+    surface.blit(subtitle_text, subtitle_rect)
+
+@metrics.timed("frame_seconds", state="username_input")
 def display_username_input():
     """Display username input with permanent leaderboard sidebar on right"""
     global current_username, input_active, button_rects
@@ -542,29 +715,19 @@ def display_username_input():
     # Clear button rects
     button_rects.clear()
     
-    # Draw boxing gym atmosphere background
-    screen.fill((25, 20, 15))
-    
     # Calculate layout dimensions (leaderboard on right)
     sidebar_width = int(screen_width * 0.35)
     main_width = screen_width - sidebar_width
     
-    # Draw permanent leaderboard sidebar on right
-    draw_leaderboard_sidebar(sidebar_width)
+    # Static background layer; only repainted in full after a screen change
+    full_redraw = compositor.begin(("username_input", screen_width, screen_height))
+    background = compositor.layer("username_background", (screen_width, screen_height), (screen_width, screen_height),
+                                  lambda surface: draw_username_background(surface, main_width))
+    if full_redraw:
+        screen.blit(background, (0, 0))
     
-    # Main content area (left side)
-    main_x = 0
-    
-    # Title section with better spacing
-    title_y = 60
-    title_text = font_title.render("POWER PUNCH", True, CHAMPION_GOLD)
-    subtitle_text = font_large.render("Boxing Championship", True, WHITE)
-    
-    title_rect = title_text.get_rect(center=(main_width // 2, title_y))
-    subtitle_rect = subtitle_text.get_rect(center=(main_width // 2, title_y + 60))
-    
-    screen.blit(title_text, title_rect)
-    screen.blit(subtitle_text, subtitle_rect)
+    # Draw permanent leaderboard sidebar on right
+    draw_sidebar_layer(sidebar_width)
     
     # Username input section
     input_y = 200
@@ -576,54 +739,52 @@ def display_username_input():
     input_box_y = input_y + 40
     
     input_box_rect = pygame.Rect(input_box_x, input_box_y, input_box_width, input_box_height)
+    cursor_visible = input_active and int(time.time() * 2) % 2 == 1
+    input_region = input_box_rect.inflate(8, 8)
     
-    # Modern input box styling
-    box_color = (40, 50, 60) if input_active else (30, 40, 50)
-    border_color = CHAMPION_GOLD if input_active else (70, 80, 90)
-    pygame.draw.rect(screen, box_color, input_box_rect, border_radius=15)
-    pygame.draw.rect(screen, border_color, input_box_rect, 4, border_radius=15)
-    
-    # Username text with proper sizing
-    username_text = font_small.render(current_username, True, WHITE)
-    text_x = input_box_rect.x + 15
-    text_y = input_box_rect.y + (input_box_rect.height - username_text.get_height()) // 2
-    screen.blit(username_text, (text_x, text_y))
-    
-    # Animated cursor
-    if input_active and int(time.time() * 2) % 2:
-        cursor_x = text_x + username_text.get_width() + 5
-        cursor_y = input_box_rect.y + 15
-        pygame.draw.line(screen, CHAMPION_GOLD, (cursor_x, cursor_y), (cursor_x, cursor_y + 30), 2)
-    
-    # Start button (only if username is entered)
-    if current_username.strip():
-        button_width = 200
-        button_height = 50
-        start_button_x = (main_width - button_width) // 2
-        start_button_y = input_y + 120
+    if compositor.region_changed("username_box", input_region, (current_username, input_active, cursor_visible)):
+        screen.blit(background, input_region, input_region)
+        
+        # Modern input box styling
+        box_color = (40, 50, 60) if input_active else (30, 40, 50)
+        border_color = CHAMPION_GOLD if input_active else (70, 80, 90)
+        pygame.draw.rect(screen, box_color, input_box_rect, border_radius=15)
+        pygame.draw.rect(screen, border_color, input_box_rect, 4, border_radius=15)
         
-        hover = 'start' in button_rects and button_rects['start'].collidepoint(mouse_pos) if button_rects else False
-        button_rects['start'] = draw_modern_button(screen, "START GAME", start_button_x, start_button_y, 
-                                                 button_width, button_height, ROPE_BLUE, WHITE, hover)
+        # Username text with proper sizing
+        username_text = render_text(font_small, current_username, WHITE)
+        text_x = input_box_rect.x + 15
+        text_y = input_box_rect.y + (input_box_rect.height - username_text.get_height()) // 2
+        screen.blit(username_text, (text_x, text_y))
+        
+        # Animated cursor
+        if cursor_visible:
+            cursor_x = text_x + username_text.get_width() + 5
+            cursor_y = input_box_rect.y + 15
+            pygame.draw.line(screen, CHAMPION_GOLD, (cursor_x, cursor_y), (cursor_x, cursor_y + 30), 2)
     
-    pygame.display.flip()
+    # Start button (only if username is entered)
+    button_width = 200
+    button_height = 50
+    start_button_rect = pygame.Rect((main_width - button_width) // 2, input_y + 120, button_width, button_height)
+    show_start = bool(current_username.strip())
+    hover = show_start and start_button_rect.collidepoint(mouse_pos)
+    button_region = start_button_rect.inflate(8, 8)
+    
+    if compositor.region_changed("start_button", button_region, (show_start, hover)):
+        screen.blit(background, button_region, button_region)
+        if show_start:
+            draw_modern_button(screen, "START GAME", start_button_rect.x, start_button_rect.y,
+                               button_width, button_height, ROPE_BLUE, WHITE, hover)
+    if show_start:
+        button_rects['start'] = start_button_rect
+    
+    compositor.present()
 
-def display_initial_screen():
-    """Display main game screen with permanent leaderboard sidebar"""
-    global current_state, update_screen_timer, button_rects
-    
-    # Clear button rects
-    button_rects.clear()
-    
+def draw_initial_background(surface, main_width):
+    """Static part of the main game screen: score circle, target and demo hints"""
     # Draw boxing gym atmosphere background
-    screen.fill((25, 20, 15))
-    
-    # Calculate layout dimensions
-    sidebar_width = int(screen_width * 0.35)
-    main_width = screen_width - sidebar_width
-    
-    # Draw permanent leaderboard sidebar
-    draw_leaderboard_sidebar(sidebar_width)
+    surface.fill((25, 20, 15))
     
     # Main content area (left side, avoiding leaderboard)
     main_x = 0
@@ -636,93 +797,127 @@ def display_initial_screen():
         circle_radius = 140
         
         # Outer circle (thick championship gold border)
-        pygame.draw.circle(screen, CHAMPION_GOLD, (circle_center_x, circle_center_y), circle_radius, 8)
+        pygame.draw.circle(surface, CHAMPION_GOLD, (circle_center_x, circle_center_y), circle_radius, 8)
         
         # Inner circle (dark boxing bag background)
         inner_radius = circle_radius - 8
-        pygame.draw.circle(screen, (30, 25, 20), (circle_center_x, circle_center_y), inner_radius)
+        pygame.draw.circle(surface, (30, 25, 20), (circle_center_x, circle_center_y), inner_radius)
         
         # Very large "0" in the center with shadow
-        big_score_font = pygame.font.Font(None, 180)
+        big_score_font = get_font(180)
         
         # Score shadow
-        shadow_text = big_score_font.render("0", True, (10, 15, 20))
+        shadow_text = render_text(big_score_font, "0", (10, 15, 20))
         shadow_rect = shadow_text.get_rect(center=(circle_center_x + 4, circle_center_y + 4))
-        screen.blit(shadow_text, shadow_rect)
+        surface.blit(shadow_text, shadow_rect)
         
         # Main score text
-        score_text = big_score_font.render("0", True, WHITE)
+        score_text = render_text(big_score_font, "0", WHITE)
         score_rect = score_text.get_rect(center=(circle_center_x, circle_center_y))
-        screen.blit(score_text, score_rect)
+        surface.blit(score_text, score_rect)
         
         # Enhanced label above the circle
-        score_label = font_medium.render("YOUR SCORE", True, CHAMPION_GOLD)
+        score_label = render_text(font_medium, "YOUR SCORE", CHAMPION_GOLD)
         label_rect = score_label.get_rect(center=(circle_center_x, circle_center_y - circle_radius - 50))
-        screen.blit(score_label, label_rect)
+        surface.blit(score_label, label_rect)
         
         # Add decorative elements around the circle
         for angle in range(0, 360, 45):
             dot_x = circle_center_x + int((circle_radius + 25) * math.cos(math.radians(angle)))
             dot_y = circle_center_y + int((circle_radius + 25) * math.sin(math.radians(angle)))
-            pygame.draw.circle(screen, CHAMPION_GOLD, (dot_x, dot_y), 4)
+            pygame.draw.circle(surface, CHAMPION_GOLD, (dot_x, dot_y), 4)
     
     # Target zone with enhanced styling
     target_y = screen_height - 200
-    target_text = font_medium.render("Target: 650+ for Good, 865+ for Great!", True, MUSCLE_PURPLE)
+    target_text = render_text(font_medium, "Target: 650+ for Good, 865+ for Great!", MUSCLE_PURPLE)
     target_rect = target_text.get_rect(center=(main_x + main_width // 2, target_y))
     
     # Add background for target text with brighter contrast
     target_bg_rect = pygame.Rect(target_rect.x - 20, target_rect.y - 10, target_rect.width + 40, target_rect.height + 20)
-    pygame.draw.rect(screen, (35, 25, 45), target_bg_rect, border_radius=15)  # Darker background for better contrast
-    pygame.draw.rect(screen, MUSCLE_PURPLE, target_bg_rect, 3, border_radius=15)  # Thicker border
+    pygame.draw.rect(surface, (35, 25, 45), target_bg_rect, border_radius=15)  # Darker background for better contrast
+    pygame.draw.rect(surface, MUSCLE_PURPLE, target_bg_rect, 3, border_radius=15)  # Thicker border
     
-    screen.blit(target_text, target_rect)
+    surface.blit(target_text, target_rect)
     
     # Demo mode instructions (if Arduino not connected)
     if not SERIAL_CONNECTED:
         demo_y = target_y + 60
-        demo_text = font_small.render("DEMO MODE: Press SPACE for random punch, or 1/2/3 for specific scores", True, TRAINING_ORANGE)
+        if SERIAL_CONNECTING:
+            demo_message = "Connecting to punching bag... demo keys work meanwhile"
+        else:
+            demo_message = "DEMO MODE: Press SPACE for random punch, or 1/2/3 for specific scores"
+        demo_text = render_text(font_small, demo_message, TRAINING_ORANGE)
         demo_rect = demo_text.get_rect(center=(main_x + main_width // 2, demo_y))
         
         # Demo mode background
         demo_bg_rect = pygame.Rect(demo_rect.x - 15, demo_rect.y - 8, demo_rect.width + 30, demo_rect.height + 16)
-        pygame.draw.rect(screen, (45, 35, 20), demo_bg_rect, border_radius=10)
-        pygame.draw.rect(screen, TRAINING_ORANGE, demo_bg_rect, 2, border_radius=10)
+        pygame.draw.rect(surface, (45, 35, 20), demo_bg_rect, border_radius=10)
+        pygame.draw.rect(surface, TRAINING_ORANGE, demo_bg_rect, 2, border_radius=10)
         
-        screen.blit(demo_text, demo_rect)
+        surface.blit(demo_text, demo_rect)
+
+@metrics.timed("frame_seconds", state="initial")
+def display_initial_screen():
+    """Display main game screen with permanent leaderboard sidebar"""
+    global current_state, update_screen_timer, button_rects
     
-    pygame.display.flip()
+    # Clear button rects
+    button_rects.clear()
+    
+    # Calculate layout dimensions
+    sidebar_width = int(screen_width * 0.35)
+    main_width = screen_width - sidebar_width
+    
+    # Everything but the sidebar is static until the player or sensor status changes
+    layout = ("initial", screen_width, screen_height, current_username, SERIAL_CONNECTED, SERIAL_CONNECTING)
+    if compositor.begin(layout):
+        background = compositor.layer("initial_background", layout, (screen_width, screen_height),
+                                      lambda surface: draw_initial_background(surface, main_width))
+        screen.blit(background, (0, 0))
+    
+    # Draw permanent leaderboard sidebar
+    draw_sidebar_layer(sidebar_width)
+    
+    compositor.present()
     current_state = "initial"
     update_screen_timer = 0
 
-def update_display(fsr1, fsr2, average_force):
-    """Update display after a punch with enhanced UI and permanent leaderboard"""
-    global highest_score, last_update_time, current_state, update_screen_timer, button_rects
-    global animation_active, animation_target_score, animation_start_time
+def update_display(fsr1, fsr2, average_force, punch=None):
+    """Start the score animation for a punch (main loop only)"""
+    global last_update_time, current_state, update_screen_timer, button_rects
+    global animation, animation_target_score, animation_punch
     
     current_time = time.time()
 
     if current_time - last_update_time < UPDATE_DELAY:
+        if punch is not None:
+            punch_tracer.finish(punch.id, punch.trace, "debounced")
         return
 
     last_update_time = current_time
     
-    # Store score to MongoDB first
+    # Store the score first (locally; synced to MongoDB in the background)
     if current_username:
-        store_score_to_mongodb(current_username, average_force)
+        store_score(current_username, average_force)
     
-    # Start animation by setting animation state
-    animation_active = True
+    # Start the animation; the main loop draws its frames
     animation_target_score = int(average_force)
-    animation_start_time = current_time
+    animation = punch_timeline(animation_target_score).start()
+    animation_punch = punch
     current_state = "animating"
+    # Heard as the count-up ends and the final score flashes up
+    audio.schedule(reveal_clip(average_force), SCORE_COUNT_DURATION, REVEAL_SOUND_PRIORITY)
+    if punch is not None:
+        punch.trace.mark("scored")
 
+@metrics.timed("frame_seconds", state="punch_result")
 def show_punch_result_screen(average_force):
     """Show full-screen leaderboard after punch"""
     global current_state, update_screen_timer, button_rects
     
     # Clear button rects
     button_rects.clear()
+    compositor.invalidate()
     
     # Draw boxing gym atmosphere background
     screen.fill((25, 20, 15))
@@ -741,7 +936,7 @@ def draw_fullscreen_leaderboard(username, force):
     
     # Title section - centered and prominent
     title_y = 60
-    title_text = font_title.render("FINAL SCORE", True, CHAMPION_GOLD)
+    title_text = render_text(font_title, "FINAL SCORE", CHAMPION_GOLD)
     title_rect = title_text.get_rect(center=(screen_width // 2, title_y))
     screen.blit(title_text, title_rect)
     
@@ -764,8 +959,8 @@ def draw_fullscreen_leaderboard(username, force):
         pygame.draw.rect(screen, CHAMPION_GOLD, card_rect, 4, border_radius=15)
         
         # Score label and value on same line
-        label_text = font_small.render("YOUR SCORE:", True, CHAMPION_GOLD)
-        score_text = font_large.render(f"{int(force)}", True, WHITE)
+        label_text = render_text(font_small, "YOUR SCORE:", CHAMPION_GOLD)
+        score_text = render_text(font_large, f"{int(force)}", WHITE)
         
         # Center both texts together
         total_width = label_text.get_width() + 20 + score_text.get_width()
@@ -773,10 +968,24 @@ def draw_fullscreen_leaderboard(username, force):
         
         screen.blit(label_text, (start_x, card_y + 30))
         screen.blit(score_text, (start_x + label_text.get_width() + 20, card_y + 25))
-    
+
+        # Where the player's best stands among every fighter, not just the top 10
+        standing = rank_index.standing(username)
+        if standing:
+            rank, players, top_percent = standing
+            rank_text = render_text(font_tiny, f"RANK #{rank} OF {players} FIGHTERS  -  TOP {top_percent}%",
+                                    CHAMPION_GOLD)
+            screen.blit(rank_text, rank_text.get_rect(center=(screen_width // 2, card_y + card_height + 17)))
+    
+    # Which leaderboard window the table shows (LEFT/RIGHT to switch)
+    window = current_leaderboard_window()
+    if len(leaderboard_windows.names) > 1:
+        window_text = render_text(font_small, f"<  {leaderboard_windows.title(window)}  >", CHAMPION_GOLD)
+        screen.blit(window_text, window_text.get_rect(topright=(screen_width - 30, 30)))
+
     # BIG LEADERBOARD TABLE - much larger and more prominent
     table_start_y = 220
-    leaderboard = get_leaderboard()
+    leaderboard = get_leaderboard(window)
     
     if leaderboard:
         # BIG TABLE HEADER - much larger and more prominent
@@ -797,9 +1006,9 @@ def draw_fullscreen_leaderboard(username, force):
         pygame.draw.rect(screen, ROPE_BLUE, col_header_rect, 4, border_radius=15)
         
         # Column headers text - larger fonts for big table
-        rank_header = font_medium.render("RANK", True, CHAMPION_GOLD)
-        name_header = font_medium.render("FIGHTER", True, CHAMPION_GOLD)
-        score_header = font_medium.render("POWER SCORE", True, CHAMPION_GOLD)
+        rank_header = render_text(font_medium, "RANK", CHAMPION_GOLD)
+        name_header = render_text(font_medium, "FIGHTER", CHAMPION_GOLD)
+        score_header = render_text(font_medium, "POWER SCORE", CHAMPION_GOLD)
         
         screen.blit(rank_header, (rank_col_x, col_header_y + 20))
         screen.blit(name_header, (name_col_x, col_header_y + 20))
@@ -850,9 +1059,9 @@ def draw_fullscreen_leaderboard(username, force):
                 text_color = WHITE
             
             # Entry text - bigger font for big table
-            rank_text = font_small.render(f"#{rank}", True, text_color)
-            name_text = font_small.render(entry_username[:15], True, text_color)
-            score_text = font_small.render(str(int(score)), True, text_color)
+            rank_text = render_text(font_small, f"#{rank}", text_color)
+            name_text = render_text(font_small, entry_username[:15], text_color)
+            score_text = render_text(font_small, str(int(score)), text_color)
             
             # Position text in columns - adjusted for bigger table
             screen.blit(rank_text, (rank_col_x, entry_y + 18))
@@ -861,95 +1070,214 @@ def draw_fullscreen_leaderboard(username, force):
     
     else:
         # No data message
-        no_data_text = font_large.render("NO CHAMPIONS YET - BE THE FIRST!", True, CHAMPION_GOLD)
+        no_data_text = render_text(font_large, "NO CHAMPIONS YET - BE THE FIRST!", CHAMPION_GOLD)
         no_data_rect = no_data_text.get_rect(center=(screen_width // 2, table_start_y + 100))
         screen.blit(no_data_text, no_data_rect)
  
 
-def read_serial_data():
-    """Main loop for reading serial data with robust error handling"""
-    global SERIAL_CONNECTED, ser
-    
-    if not SERIAL_CONNECTED:
-        print("Demo mode: No serial data will be read")
+def handle_sensor_samples(timestamps_us, fsr1, fsr2, read_at=None):
+    """Feed a batch of raw readings to the punch detector and act on finished impacts"""
+    for event in punch_detector.feed(timestamps_us, fsr1, fsr2):
+        trace = None
+        if read_at is not None:
+            trace = PunchTrace.from_serial(event, read_at, punch_detector.clock_us)
+        handle_punch_event(event, trace)
+
+def handle_punch_event(event, trace=None):
+    """One complete impact (serial thread): hand it to the main loop"""
+    print(f"Punch: peak {event.peak:.0f}, impulse {event.impulse:.1f}, "
+          f"rise {event.rise_time * 1000:.0f} ms, duration {event.duration * 1000:.0f} ms")
+    punch_channel.put(event, trace)
+
+def wake_main_loop():
+    """Interrupt the main loop's idle wait (safe from any thread)"""
+    try:
+        pygame.event.post(pygame.event.Event(WAKE_EVENT))
+    except pygame.error:
+        # Event queue full: the loop is awake anyway and drains the channel every pass
+        pass
+
+def process_punches():
+    """Score queued punches (main loop only); each punch is consumed exactly once"""
+    for punch in punch_channel.drain():
+        event = punch.event
+        if event.peak < PUNCH_SCORE_THRESHOLD:
+            punch_tracer.finish(punch.id, punch.trace, "below_threshold")
+            continue
+        if current_state != "initial":
+            print(f"Punch {punch.id} ignored while {current_state}")
+            punch_tracer.finish(punch.id, punch.trace, "busy")
+            continue
+        update_display(event.fsr1, event.fsr2, event.peak, punch)
+
+def punch_shown(label="Punch"):
+    """Call after every animation flip: the first one closes the punch's latency trace"""
+    global animation_punch
+    if animation_punch is None:
         return
-        
-    reconnect_attempts = 0
-    max_reconnect_attempts = 3
-    
+    latency = punch_channel.delivered(animation_punch)
+    punch_tracer.finish(animation_punch.id, animation_punch.trace)
+    print(f"{label} {animation_punch.id} on screen {latency * 1000:.1f} ms after detection")
+    animation_punch = None
+
+def open_serial_port(port):
+    """Open the Arduino port and negotiate the binary protocol, falling back to text"""
+    global SERIAL_BINARY, frame_decoder
+    # Short read timeout so text-mode impacts are closed promptly by flush()
+    connection = serial.Serial(port, SERIAL_BAUD, timeout=0.05)
+    SERIAL_BINARY = False
+    punch_detector.end_gap_us = TEXT_END_GAP_US
+    if SERIAL_PROTOCOL != "text":
+        if negotiate_binary(connection):
+            SERIAL_BINARY = True
+            frame_decoder = FrameDecoder()
+            punch_detector.end_gap_us = BINARY_END_GAP_US
+            print("Arduino speaks the binary protocol")
+        elif SERIAL_PROTOCOL == "binary":
+            connection.close()
+            raise serial.SerialException("Arduino did not acknowledge the binary protocol")
+        else:
+            # A board that missed the handshake must not be left streaming frames
+            connection.write(TEXT_REQUEST)
+            connection.flush()
+            print("No binary handshake from Arduino, using the text protocol")
+    return connection
+
+def find_arduino():
+    """
+    Try every candidate port and keep the first board that answers the binary
+    handshake; a matching board that stays silent is kept as a text-mode fallback
+    """
+    global ser
+    fallback = None
+    for device, label in candidate_ports(SERIAL_PORT):
+        try:
+            connection = open_serial_port(device)
+        except (serial.SerialException, OSError) as e:
+            print(f"Skipping {device} ({label}): {e}")
+            continue
+        if SERIAL_BINARY or SERIAL_PROTOCOL == "text":
+            if fallback:
+                fallback[0].close()
+            ser = connection
+            return device
+        if fallback is None:
+            fallback = (connection, device)
+        else:
+            connection.close()
+    if fallback:
+        # The handshake on a later port may have left binary settings behind
+        fallback[0].close()
+        ser = open_serial_port(fallback[1])
+        return fallback[1]
+    return None
+
+def serial_backoff_delays():
+    """Bounded exponential backoff with jitter so a replugged board is found quickly"""
+    delay = SERIAL_BACKOFF_MIN
     while True:
+        yield delay * random.uniform(0.8, 1.2)
+        delay = min(delay * 2, SERIAL_BACKOFF_MAX)
+
+def serial_link_up(port):
+    """Mark the sensor available and record how long it was gone"""
+    global SERIAL_CONNECTED, SERIAL_CONNECTING
+    punch_detector.reset()
+    serial_link["port"] = port
+    if serial_link["down_since"] is not None:
+        outage = time.perf_counter() - serial_link["down_since"]
+        serial_link["down_since"] = None
+        serial_link["last_outage_s"] = round(outage, 3)
+        serial_link["downtime_total_s"] = round(serial_link["downtime_total_s"] + outage, 3)
+        print(f"Arduino back on {port} after {outage:.2f} s "
+              f"({serial_link['disconnects']} disconnects, {serial_link['downtime_total_s']:.1f} s total downtime)")
+    else:
+        print(f"Arduino connected on {port}")
+    SERIAL_CONNECTED = True
+    SERIAL_CONNECTING = False
+    pygame.event.post(pygame.event.Event(SERVICES_READY_EVENT, task="serial"))
+
+def serial_link_down(error):
+    """Close the dead port and start the outage clock"""
+    global SERIAL_CONNECTED, SERIAL_CONNECTING, ser
+    print(f"Serial connection error: {error}")
+    try:
+        if ser:
+            ser.close()
+    except (serial.SerialException, OSError):
+        pass
+    ser = None
+    SERIAL_CONNECTED = False
+    SERIAL_CONNECTING = True
+    serial_link["disconnects"] += 1
+    serial_link["down_since"] = time.perf_counter()
+    pygame.event.post(pygame.event.Event(SERVICES_READY_EVENT, task="serial"))
+
+def wait_for_arduino():
+    """Rediscover the board until it comes back; demo keys keep working meanwhile"""
+    for delay in serial_backoff_delays():
         try:
-            # Check if serial connection is still valid
-            if ser is None or not ser.is_open:
-                raise serial.SerialException("Serial connection lost")
-                
-            line = ser.readline().decode('utf-8').strip()
-            if line:
-                parts = line.split(",")
-                if len(parts) == 3:
-                    fsr1_str = parts[0].split(": ")[1]
-                    fsr2_str = parts[1].split(": ")[1]
-                    fsr1 = int(fsr1_str)
-                    fsr2 = int(fsr2_str)
-                    
-                    if fsr1 > minimum_threshold and fsr2 > minimum_threshold:
-                        average_force = (fsr1 + fsr2) / 2
-                    elif fsr1 < minimum_threshold:
-                        average_force = fsr2
-                    elif fsr2 < minimum_threshold:
-                        average_force = fsr1
-                    else:
-                        continue
-                        
-                    print("average force", average_force)
-                    if average_force >= 650 and current_state == "initial":
-                        update_display(fsr1, fsr2, average_force)
-                        
-                # Reset reconnect attempts on successful read
-                reconnect_attempts = 0
+            port = find_arduino()
+        except Exception as e:
+            print(f"Serial discovery failed: {e}")
+            port = None
+        if port:
+            serial_link_up(port)
+            return
+        time.sleep(delay)
+
+def count_binary_read(received, samples, crc_errors_before, dropped_before):
+    """Serial throughput and error counters for one binary read"""
+    metrics.inc("serial_bytes_total", len(received))
+    if samples:
+        metrics.inc("serial_frames_total", len(samples))
+    if frame_decoder.crc_errors > crc_errors_before:
+        metrics.inc("serial_parse_failures_total", frame_decoder.crc_errors - crc_errors_before, kind="crc")
+    if frame_decoder.dropped > dropped_before:
+        metrics.inc("serial_dropped_frames_total", frame_decoder.dropped - dropped_before)
+
+def read_serial_data():
+    """Read the sensor forever, reconnecting whenever the link drops"""
+    while True:
+        if ser is None or not ser.is_open:
+            wait_for_arduino()
+        try:
+            if SERIAL_BINARY:
+                # Bulk read whatever has arrived and decode every complete frame
+                received = ser.read(max(1, ser.in_waiting))
+                read_at = time.perf_counter()
+                crc_errors, dropped = frame_decoder.crc_errors, frame_decoder.dropped
+                samples = frame_decoder.feed(received)
+                count_binary_read(received, samples, crc_errors, dropped)
+                if samples:
+                    batch = numpy.array(samples, dtype=numpy.int64)
+                    handle_sensor_samples(batch[:, 1], batch[:, 2], batch[:, 3], read_at)
+            else:
+                received = ser.readline().decode('utf-8').strip()
+                read_at = time.perf_counter()
+                values = parse_text_line(received) if received else None
+                if received:
+                    metrics.inc("serial_lines_total")
+                    if values is None:
+                        metrics.inc("serial_parse_failures_total", kind="text")
+                now_us = time.monotonic_ns() // 1000
+                if values:
+                    handle_sensor_samples([now_us], [values[0]], [values[1]], read_at)
+                # Text firmware goes quiet below threshold, so impacts end on the host clock
+                for event in punch_detector.flush(now_us):
+                    handle_punch_event(event, PunchTrace.from_serial(event, read_at, now_us))
                 
         except (ValueError, IndexError):
             # Data parsing errors - continue trying
+            metrics.inc("serial_parse_failures_total", kind="exception")
             continue
             
         except (serial.SerialException, OSError) as e:
-            print(f"Serial connection error: {e}")
-            
-            # Try to reconnect
-            if reconnect_attempts < max_reconnect_attempts:
-                reconnect_attempts += 1
-                print(f"Attempting to reconnect... (attempt {reconnect_attempts}/{max_reconnect_attempts})")
-                
-                try:
-                    if ser and ser.is_open:
-                        ser.close()
-                    
-                    # Wait a bit before reconnecting
-                    import time
-                    time.sleep(2)
-                    
-                    # Try to reconnect
-                    ser = serial.Serial('/dev/cu.usbmodem1301', 9600)
-                    print("Reconnected to Arduino successfully!")
-                    reconnect_attempts = 0  # Reset on successful reconnection
-                    
-                except Exception as reconnect_error:
-                    print(f"Reconnection failed: {reconnect_error}")
-                    if reconnect_attempts >= max_reconnect_attempts:
-                        print("Max reconnection attempts reached. Switching to demo mode.")
-                        SERIAL_CONNECTED = False
-                        ser = None
-                        break
-            else:
-                print("Serial connection permanently lost. Switching to demo mode.")
-                SERIAL_CONNECTED = False
-                ser = None
-                break
+            serial_link_down(e)
                 
         except Exception as e:
             print(f"Unexpected error in serial reading: {e}")
             # Wait a bit and continue
-            import time
             time.sleep(1)
 
 def handle_button_click(click_pos):
@@ -981,190 +1309,527 @@ def handle_button_click(click_pos):
             
             break  # Only handle one button click at a time
 
-# Start serial reading thread only if connected
-if SERIAL_CONNECTED:
+# Background startup
+def connect_serial():
+    """Find the Arduino and start the reader thread, which keeps looking if it is not plugged in yet"""
+    global SERIAL_CONNECTED, SERIAL_CONNECTING
+    started = time.perf_counter()
+    try:
+        port = find_arduino()
+    except Exception as e:
+        print(f"Serial discovery failed: {e}")
+        port = None
+    if port:
+        serial_link_up(port)
+    else:
+        print("Arduino not found - running in demo mode, use keyboard to simulate punches!")
+        print("Plugging the board in later is picked up automatically")
+        SERIAL_CONNECTED = False
+        SERIAL_CONNECTING = False
+    startup_metrics["serial_ready_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup_metrics["serial_connected"] = SERIAL_CONNECTED
+
     serial_thread = threading.Thread(target=read_serial_data)
     serial_thread.daemon = True
     serial_thread.start()
     print("Serial reading thread started")
-else:
-    print("Demo mode active - use keyboard controls!")
 
-def display_animation_screen():
-    """Display the punch animation screen"""
-    global current_state, animation_active, animation_target_score
-    
+def open_mongodb(uri):
+    """Connect to a MongoDB server with the configured pool and timeouts and return the scores collection"""
+    mongo_client = MongoClient(
+        uri,
+        appname="power-punch",
+        maxPoolSize=MONGODB_POOL_SIZE,
+        minPoolSize=0,
+        maxIdleTimeMS=60000,
+        waitQueueTimeoutMS=MONGODB_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS,
+        connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+        retryWrites=True,
+        retryReads=True
+    )
     try:
-        print(f"Starting animation with target score: {animation_target_score}")
-        
-        # Simple built-in animation instead of external module
-        animation_duration = 2.0  # 2 seconds
-        start_time = time.time()
-        current_score = 0
-        
-        while True:
-            current_time = time.time()
-            elapsed = current_time - start_time
-            
-            if elapsed >= animation_duration:
-                current_score = animation_target_score
-                break
-            
-            # Calculate current score with easing
-            progress = elapsed / animation_duration
-            eased_progress = 1 - (1 - progress) ** 2
-            current_score = int(animation_target_score * eased_progress)
-            
-            # Clear screen with boxing gym background
-            screen.fill((25, 20, 15))
-            
-            # Title
-            title_text = font_title.render("ANALYZING PUNCH...", True, BOXING_RED)
-            title_rect = title_text.get_rect(center=(screen_width // 2, 100))
-            screen.blit(title_text, title_rect)
-            
-            # Animated score - huge and centered
-            huge_font = pygame.font.Font(None, 200)
-            score_text = huge_font.render(str(current_score), True, WHITE)
-            score_rect = score_text.get_rect(center=(screen_width // 2, screen_height // 2))
-            screen.blit(score_text, score_rect)
-            
-            # Progress indicator
-            progress_text = font_medium.render(f"Calculating force... {int(progress * 100)}%", True, (150, 160, 170))
-            progress_rect = progress_text.get_rect(center=(screen_width // 2, screen_height // 2 + 200))
-            screen.blit(progress_text, progress_rect)
-            
-            # Visual effect - pulsing circle around score
-            pulse_radius = 150 + int(20 * abs(1 - 2 * (elapsed % 0.5) / 0.5))
-            pygame.draw.circle(screen, (100, 100, 100), (screen_width // 2, screen_height // 2), pulse_radius, 3)
-            
-            pygame.display.flip()
-            pygame.time.wait(50)
-            
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-        
-        # Final flash effect
-        for flash in range(3):
-            screen.fill((25, 20, 15))
-            
-            # Flash between colors
-            flash_color = CHAMPION_GOLD if flash % 2 == 0 else WHITE
-            
-            # Final title
-            final_title = font_title.render("FINAL SCORE!", True, flash_color)
-            final_rect = final_title.get_rect(center=(screen_width // 2, 150))
-            screen.blit(final_title, final_rect)
-            
-            # Final score
-            huge_font = pygame.font.Font(None, 200)
-            final_score = huge_font.render(str(animation_target_score), True, flash_color)
-            final_rect = final_score.get_rect(center=(screen_width // 2, screen_height // 2))
-            screen.blit(final_score, final_rect)
-            
-            pygame.display.flip()
-            pygame.time.wait(250)
-            
-            # Handle quit events during flash
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-        
-        print("Animation completed")
-        
-        # Animation completed
-        animation_active = False
-        show_punch_result_screen(animation_target_score)
-        
+        # Test the connection
+        mongo_client.admin.command('ping')
+    except Exception:
+        mongo_client.close()
+        raise
+    return mongo_client, mongo_client[database_name][collection_name]
+
+def open_database():
+    """Connect to MongoDB Atlas, falling back to a local server; raises if neither answers"""
+    try:
+        if not mongodb_uri:
+            raise Exception("MONGODB_URI not found in .env file")
+        connection = open_mongodb(mongodb_uri)
+        print("Connected to MongoDB Atlas successfully")
+        return connection
     except Exception as e:
-        print(f"Animation error: {e}")
-        import traceback
-        traceback.print_exc()
-        animation_active = False
-        show_punch_result_screen(animation_target_score)
+        print(f"MongoDB Atlas connection failed: {e}")
+        print("Falling back to local MongoDB...")
+    connection = open_mongodb(local_mongodb_uri)
+    print("Connected to local MongoDB successfully")
+    return connection
 
-# Initial display
-display_username_input()
+def use_database(mongo_client, collection):
+    """Make a freshly opened client the one every database call goes through"""
+    global client, db, scores_collection
+    client, scores_collection, db = mongo_client, collection, collection.database
+    try:
+        score_queries.ensure_indexes(scores_collection)
+    except Exception as e:
+        print(f"Could not create score indexes: {e}")
+    # Push scores stored while offline and merge other kiosks' scores now
+    score_sync.wake()
 
-# Main game loop
-while True:
+def connect_mongodb():
+    """Connect at startup; if no server answers, the circuit breaker keeps retrying in the background"""
+    started = time.perf_counter()
     try:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.VIDEORESIZE:
-                screen_width, screen_height = event.w, event.h
-                screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
-                if current_state == "username_input":
-                    display_username_input()
-                else:
-                    display_initial_screen()
-            elif event.type == pygame.KEYDOWN:
-                if current_state == "username_input":
-                    if event.key == pygame.K_RETURN:
-                        if current_username.strip():
-                            current_state = "initial"
-                            input_active = False
-                            display_initial_screen()
-                    elif event.key == pygame.K_BACKSPACE:
-                        current_username = current_username[:-1]
-                        display_username_input()
-                    elif event.unicode.isprintable() and len(current_username) < 20:
-                        current_username += event.unicode
-                        display_username_input()
-                elif current_state == "initial":
-                    if event.key == pygame.K_u:
-                        current_state = "username_input"
-                        current_username = ""
-                        input_active = True
-                        display_username_input()
-                    # Demo mode: Simulate punches with keyboard
-                    elif not SERIAL_CONNECTED:
-                        if event.key == pygame.K_SPACE:
-                            # Simulate a random punch
-                            simulated_score = random.randint(650, 1000)
-                            print(f"Demo punch: {simulated_score}")
-                            update_display(simulated_score//2, simulated_score//2, simulated_score)
-                        elif event.key == pygame.K_1:
-                            # Weak punch
-                            update_display(300, 300, 600)
-                        elif event.key == pygame.K_2:
-                            # Medium punch  
-                            update_display(400, 450, 750)
-                        elif event.key == pygame.K_3:
-                            # Strong punch
-                            update_display(500, 550, 900)
-                elif current_state == "punch_result":
-                    # Allow any key to continue from leaderboard screen
-                    current_state = "username_input"
-                    current_username = ""
-                    input_active = True
-                    display_username_input()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                # Handle mouse clicks on buttons
-                if event.button == 1:  # Left click
-                    click_pos = pygame.mouse.get_pos()
-                    handle_button_click(click_pos)
-            elif event.type == pygame.MOUSEMOTION:
-                # Track mouse position for hover effects
-                mouse_pos = pygame.mouse.get_pos()
-
-        # Handle animation state in main thread
-        if current_state == "animating" and animation_active:
-            display_animation_screen()
-
-        # Return to name entering screen after showing score (for auto-timeout)
-        if current_state == "punch_result" and time.time() - update_screen_timer > update_screen_display_time:
+        use_database(*open_database())
+    except Exception as e:
+        print(f"Local MongoDB also failed: {e}")
+        db_breaker.trip(e)
+
+    startup_metrics["database_ready_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup_metrics["database_connected"] = scores_collection is not None
+
+def probe_mongodb():
+    """Circuit breaker probe (background thread): reconnect, or ping the existing client"""
+    if client is None:
+        use_database(*open_database())
+        return
+    with metrics.timed("db_call_seconds", call="ping"):
+        client.admin.command('ping')
+
+def database_state_changed(state):
+    """The circuit breaker opened or closed (any thread): sync and show the new state"""
+    if state == CircuitBreaker.CLOSED:
+        score_sync.wake()
+    try:
+        pygame.event.post(pygame.event.Event(SERVICES_READY_EVENT, task="database"))
+    except pygame.error:
+        pass
+
+def rebuild_leaderboard_windows():
+    """Recount the running period of every leaderboard window from the stored scores"""
+    started = time.perf_counter()
+    for window in leaderboard_windows.names:
+        if window != "all":
+            score_store.rebuild_window(leaderboard_windows.current(window))
+    score_cache.invalidate()
+    startup_metrics["leaderboard_windows_ready_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+def load_audio():
+    """Decode every sound clip into memory"""
+    started = time.perf_counter()
+    audio.load()
+    startup_metrics["audio_ready_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+def load_rankings():
+    """Seed the rank index with every player's best from the local store"""
+    started = time.perf_counter()
+    rank_index.seed(score_store.player_bests())
+    startup_metrics["rankings_ready_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Rankings loaded: {rank_index.players()} fighters")
+
+def run_startup_task(task):
+    """Run a startup task, then tell the main loop to redraw"""
+    try:
+        task()
+    except Exception as e:
+        print(f"Startup task {task.__name__} failed: {e}")
+    pygame.event.post(pygame.event.Event(SERVICES_READY_EVENT, task=task.__name__))
+
+def start_background_services():
+    """Connect to the Arduino and MongoDB without blocking the first frame"""
+    if METRICS_PORT:
+        metrics.start_http_server(METRICS_PORT, METRICS_HOST)
+    if METRICS_FILE:
+        metrics.start_textfile_writer(METRICS_FILE, METRICS_FILE_INTERVAL)
+    tasks = [connect_serial, connect_mongodb, load_rankings, rebuild_leaderboard_windows, load_audio]
+    threads = [threading.Thread(target=run_startup_task, args=(task,), daemon=True) for task in tasks]
+    for thread in threads:
+        thread.start()
+
+    def record_when_done():
+        for thread in threads:
+            thread.join()
+        record_startup_metrics()
+
+    threading.Thread(target=record_when_done, daemon=True).start()
+
+def record_startup_metrics():
+    """Append this run's startup timings to the startup metrics file"""
+    entry = {"timestamp": datetime.now().isoformat()}
+    entry.update(startup_metrics)
+    print(f"Startup metrics: {entry}")
+    try:
+        with open(STARTUP_METRICS_FILE, 'a') as file:
+            file.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Could not write startup metrics: {e}")
+
+SCORE_COUNT_DURATION = 2.0  # seconds the score counts up
+FLASH_COUNT = 3
+FLASH_INTERVAL = 0.25  # seconds per final-score flash
+
+def punch_timeline(target_score):
+    """The reveal of a score: an eased count-up, then the final score flashes"""
+    timeline = Timeline()
+    timeline.tween("score", 0, target_score, SCORE_COUNT_DURATION, ease_out_quad)
+    timeline.tween("flash", 0, FLASH_COUNT, FLASH_COUNT * FLASH_INTERVAL, delay=SCORE_COUNT_DURATION)
+    return timeline
+
+def draw_punch_animation(surface, timeline, target_score):
+    """The frame of a punch reveal at the timeline's current time"""
+    if timeline.elapsed < SCORE_COUNT_DURATION:
+        draw_animation_frame(surface, int(timeline.value("score")), timeline.progress("score"), timeline.elapsed)
+    else:
+        draw_final_flash(surface, target_score, min(FLASH_COUNT - 1, int(timeline.value("flash"))))
+
+def draw_animation_frame(surface, current_score, progress, elapsed):
+    """One frame of the score count-up: current_score shown, progress 0-1, `elapsed` seconds in"""
+    width, height = surface.get_size()
+    
+    # Clear screen with boxing gym background
+    surface.fill((25, 20, 15))
+    
+    # Title
+    title_text = render_text(font_title, "ANALYZING PUNCH...", BOXING_RED)
+    title_rect = title_text.get_rect(center=(width // 2, 100))
+    surface.blit(title_text, title_rect)
+    
+    # Animated score - huge and centered
+    huge_font = get_font(200)
+    score_text = render_text(huge_font, str(current_score), WHITE)
+    score_rect = score_text.get_rect(center=(width // 2, height // 2))
+    surface.blit(score_text, score_rect)
+    
+    # Progress indicator
+    progress_text = render_text(font_medium, f"Calculating force... {int(progress * 100)}%", (150, 160, 170))
+    progress_rect = progress_text.get_rect(center=(width // 2, height // 2 + 200))
+    surface.blit(progress_text, progress_rect)
+    
+    # Visual effect - pulsing circle around score
+    pulse_radius = 150 + int(20 * abs(1 - 2 * (elapsed % 0.5) / 0.5))
+    pygame.draw.circle(surface, (100, 100, 100), (width // 2, height // 2), pulse_radius, 3)
+
+def draw_final_flash(surface, target_score, flash):
+    """Final score, alternating gold and white on each flash"""
+    width, height = surface.get_size()
+    surface.fill((25, 20, 15))
+    
+    # Flash between colors
+    flash_color = CHAMPION_GOLD if flash % 2 == 0 else WHITE
+    
+    # Final title
+    final_title = render_text(font_title, "FINAL SCORE!", flash_color)
+    final_rect = final_title.get_rect(center=(width // 2, 150))
+    surface.blit(final_title, final_rect)
+    
+    # Final score
+    huge_font = get_font(200)
+    final_score = render_text(huge_font, str(target_score), flash_color)
+    final_rect = final_score.get_rect(center=(width // 2, height // 2))
+    surface.blit(final_score, final_rect)
+
+    # The character that goes with the score
+    character = assets.fit(reveal_character(target_score), character_box(width, height))
+    surface.blit(character, character.get_rect(center=(width // 2, int(height * 0.82))))
+
+def step_animation(now=None, present=None, label="Punch"):
+    """
+    Draw the punch reveal's frame for now and present it (the whole window
+    unless `present` is given); once the timeline is over, or was cancelled,
+    show the result screen. Called once per main-loop pass while animating.
+    """
+    global animation
+    running = animation.update(now)
+    if not animation.cancelled:
+        frame_start = time.perf_counter()
+        compositor.invalidate()
+        try:
+            draw_punch_animation(screen, animation, animation_target_score)
+        except Exception as e:
+            print(f"Animation error: {e}")
+            import traceback
+            traceback.print_exc()
+            running = False
+        blit_metrics_overlay()
+        audio.update()
+        (present or pygame.display.flip)()
+        metrics.observe("frame_seconds", time.perf_counter() - frame_start, state="animating")
+        # With no count-up time the first frame is already a flash, or the last one
+        punch_shown(label)
+    if not running:
+        animation = None
+        show_punch_result_screen(animation_target_score)
+
+def skip_animation():
+    """Cancel the reveal (and its sound) and go straight to the result screen"""
+    if animation is not None:
+        animation.cancel()
+        audio.cancel()
+
+def handle_keydown(event):
+    """Typing on the username screen, demo punches and leaving the result screen"""
+    global current_state, current_username, input_active
+    
+    if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+        # Step through the leaderboard windows on any screen that shows one
+        step_leaderboard_window(1 if event.key == pygame.K_RIGHT else -1)
+        if current_state == "punch_result":
+            show_punch_result_screen(animation_target_score)
+        else:
+            redraw_current_screen()
+    elif current_state == "username_input":
+        if event.key == pygame.K_RETURN:
+            if current_username.strip():
+                current_state = "initial"
+                input_active = False
+                display_initial_screen()
+        elif event.key == pygame.K_BACKSPACE:
+            current_username = current_username[:-1]
+            display_username_input()
+        elif event.unicode.isprintable() and len(current_username) < 20:
+            current_username += event.unicode
+            display_username_input()
+    elif current_state == "initial":
+        if event.key == pygame.K_u:
             current_state = "username_input"
             current_username = ""
             input_active = True
             display_username_input()
+        # Demo mode: Simulate punches with keyboard
+        elif not SERIAL_CONNECTED:
+            if event.key == pygame.K_SPACE:
+                # Simulate a random punch
+                simulated_score = random.randint(650, 1000)
+                print(f"Demo punch: {simulated_score}")
+                update_display(simulated_score//2, simulated_score//2, simulated_score)
+            elif event.key == pygame.K_1:
+                # Weak punch
+                update_display(300, 300, 600)
+            elif event.key == pygame.K_2:
+                # Medium punch  
+                update_display(400, 450, 750)
+            elif event.key == pygame.K_3:
+                # Strong punch
+                update_display(500, 550, 900)
+    elif current_state == "animating":
+        if event.key in (pygame.K_ESCAPE, pygame.K_RETURN):
+            skip_animation()
+    elif current_state == "punch_result":
+        # Allow any key to continue from leaderboard screen
+        current_state = "username_input"
+        current_username = ""
+        input_active = True
+        display_username_input()
+
+def redraw_current_screen():
+    """Redraw the idle screens after something they display changed"""
+    if current_state == "username_input":
+        display_username_input()
+    elif current_state == "initial":
+        display_initial_screen()
+
+def next_idle_frame_time(now):
+    """Start of the next half-second step of the idle glow/cursor animation"""
+    return (math.floor(now / IDLE_FRAME_INTERVAL) + 1) * IDLE_FRAME_INTERVAL
+
+def wait_for_events():
+    """Return pending events, sleeping until input arrives or a frame is due"""
+    if current_state == "animating":
+        frame_clock.tick(TARGET_FPS)
+        return pygame.event.get()
+
+    now = time.time()
+    if current_state in IDLE_STATES:
+        deadline = next_idle_frame
+    elif current_state == "punch_result":
+        deadline = update_screen_timer + update_screen_display_time
+    else:
+        deadline = now + IDLE_FRAME_INTERVAL
+    # event.wait(0) would block forever, so always wait at least 1 ms
+    timeout_ms = max(1, int((deadline - now) * 1000))
+
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+def metrics_overlay_lines():
+    """Recent frame and DB timings, serial rates and queue depths for the F3 overlay"""
+    global metrics_overlay_rates
+    summary = metrics.registry.summary()
+    now = time.perf_counter()
+    previous_time, previous_counters = metrics_overlay_rates
+    metrics_overlay_rates = (now, summary["counters"])
+    elapsed = max(1e-6, now - previous_time)
+
+    def rate(name):
+        key = (name, ())
+        return (summary["counters"].get(key, 0) - previous_counters.get(key, 0)) / elapsed
+
+    def timing(name, label):
+        found = [(key, value) for key, value in summary["histograms"].items()
+                 if key[0] == name and key[1] and key[1][0][1] == label]
+        if not found:
+            return f"{label} -"
+        p50, p95 = found[0][1]
+        return f"{label} {p50 * 1000:.1f}/{p95 * 1000:.1f}"
+
+    failures = sum(value for (name, _), value in summary["counters"].items()
+                   if name == "serial_parse_failures_total")
+    # Summed over labels, e.g. the stations of multi-station mode
+    gauges = {}
+    for (name, _), value in summary["gauges"].items():
+        gauges[name] = gauges.get(name, 0) + value
+    return [
+        "METRICS (F3)   p50/p95 ms",
+        "frame  " + "  ".join(timing("frame_seconds", state)
+                              for state in ("username_input", "initial", "animating", "punch_result")),
+        "db     " + "  ".join(timing("db_call_seconds", call)
+                              for call in ("leaderboard", "window_leaderboard", "store_score", "push", "pull")),
+        f"serial {rate('serial_frames_total'):.0f} frames/s  {rate('serial_lines_total'):.1f} lines/s  "
+        f"failures {failures}  disconnects {gauges.get('serial_disconnects', 0)}",
+        "punch  " + "  ".join(f"{name} {p50:.1f}/{p95:.1f}" for name, (p50, p95, _) in punch_tracer.summary().items()),
+        f"queues punches {gauges.get('punch_queue_depth', 0)} (dropped {gauges.get('punches_dropped', 0)})  "
+        f"scores {gauges.get('score_queue_depth', 0)}  cache hit {gauges.get('leaderboard_cache_hit_ratio', 0):.0%}",
+        f"mongo  circuit {db_breaker.state}  failures {db_breaker.failures}  trips {db_breaker.trips}"
+        + (f"  retry in {db_breaker.retry_in():.0f} s" if db_breaker.state == CircuitBreaker.OPEN else ""),
+    ]
+
+def blit_metrics_overlay():
+    """Draw the overlay onto the current frame (the caller presents it)"""
+    global metrics_overlay
+    if not show_metrics_overlay:
+        return None
+    if metrics_overlay is None or time.time() - metrics_overlay[2] >= IDLE_FRAME_INTERVAL:
+        # Not through the text cache: these strings change on every refresh
+        lines = [font_tiny.render(line, True, WHITE) for line in metrics_overlay_lines()]
+        width = max(line.get_width() for line in lines) + 20
+        height = sum(line.get_height() for line in lines) + 16
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 190))
+        y = 8
+        for line in lines:
+            surface.blit(line, (10, y))
+            y += line.get_height()
+        metrics_overlay = (surface, surface.get_rect(topleft=(10, 10)), time.time())
+    surface, rect, _ = metrics_overlay
+    screen.blit(surface, rect)
+    return rect
+
+def present_metrics_overlay():
+    rect = blit_metrics_overlay()
+    if rect is not None:
+        pygame.display.update(rect)
+
+def toggle_metrics_overlay():
+    global show_metrics_overlay, metrics_overlay
+    show_metrics_overlay = not show_metrics_overlay
+    metrics_overlay = None
+    # Repaint what the overlay covered (or make room for it)
+    compositor.invalidate()
+    if current_state == "punch_result":
+        draw_fullscreen_leaderboard(current_username, animation_target_score)
+        pygame.display.flip()
+    else:
+        redraw_current_screen()
+    if show_metrics_overlay:
+        present_metrics_overlay()
+
+def handle_event(event):
+    """Dispatch one pygame event (main loop only)"""
+    global screen, screen_width, screen_height, mouse_pos
+
+    if event.type == pygame.QUIT:
+        pygame.quit()
+        sys.exit()
+    elif event.type == SERVICES_READY_EVENT:
+        # Serial/database finished connecting; show the new status
+        redraw_current_screen()
+    elif event.type == pygame.VIDEORESIZE:
+        screen_width, screen_height = event.w, event.h
+        clear_gradient_cache()
+        compositor.clear()
+        screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
+        # Scaled images are kept per size (unlike gradients), so resizing back is free
+        prepare_assets()
+        if current_state == "username_input":
+            display_username_input()
+        elif current_state == "initial":
+            display_initial_screen()
+        elif current_state == "punch_result":
+            draw_fullscreen_leaderboard(current_username, animation_target_score)
+            pygame.display.flip()
+        # A running animation draws its next frame at the new size by itself
+    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+        toggle_metrics_overlay()
+    elif event.type == pygame.KEYDOWN:
+        handle_keydown(event)
+    elif event.type == pygame.MOUSEBUTTONDOWN:
+        # Handle mouse clicks on buttons
+        if event.button == 1:  # Left click
+            click_pos = pygame.mouse.get_pos()
+            handle_button_click(click_pos)
+    elif event.type == pygame.MOUSEMOTION:
+        # Track mouse position for hover effects
+        mouse_pos = pygame.mouse.get_pos()
+        if current_state in IDLE_STATES:
+            # Cheap: only a button whose hover state flipped is repainted
+            redraw_current_screen()
+
+def update_frame():
+    """Everything the main loop does besides handling events: punches, animation and timers"""
+    global current_state, current_username, input_active, next_idle_frame
+
+    # Sensor punches are queued by the serial thread and scored here
+    process_punches()
+    audio.update()
+
+    # One frame of the punch reveal per pass; events keep flowing in between
+    if current_state == "animating" and animation is not None:
+        step_animation()
+
+    # Advance the sidebar glow and input cursor on idle screens
+    now = time.time()
+    if current_state in IDLE_STATES and now >= next_idle_frame:
+        redraw_current_screen()
+        next_idle_frame = next_idle_frame_time(now)
+
+    # Return to name entering screen after showing score (for auto-timeout)
+    if current_state == "punch_result" and time.time() - update_screen_timer > update_screen_display_time:
+        current_state = "username_input"
+        current_username = ""
+        input_active = True
+        display_username_input()
+
+    if show_metrics_overlay:
+        present_metrics_overlay()
+
+def main():
+    init_display()
+
+    # Initial display
+    display_username_input()
+    startup_metrics["time_to_first_frame_ms"] = round((time.perf_counter() - STARTUP_TIME) * 1000, 1)
+    print(f"Time to first frame: {startup_metrics['time_to_first_frame_ms']} ms")
+
+    start_background_services()
+
+    # Main game loop
+    while True:
+        try:
+            for event in wait_for_events():
+                handle_event(event)
+            update_frame()
+        except KeyboardInterrupt:
+            print("Exiting...")
+            break
 
-    except KeyboardInterrupt:
-        print("Exiting...")
-        break
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,85 @@ const int fsrPin1 = A0; // FSR 1 connected to analog pin A0
 const int fsrPin2 = A1; // FSR 2 connected to analog pin A1
 const int forceThreshold = 350; // Minimum value to consider as a valid force
 
+// Serial protocol (see serial_protocol.py on the host).
+// The board boots in the legacy text mode; the host sends 'B' to switch to
+// 10-byte binary frames sampled at 1 kHz and 'T' to switch back. 'B' is
+// acknowledged even in binary mode, since a host that reopens the port
+// without resetting the board does not know which mode it is in.
+const long baudRate = 250000;                     // exact divisor on 16 MHz boards
+const unsigned long samplePeriodMicros = 1000;    // 1 kHz in binary mode
+const unsigned long textPeriodMillis = 100;       // legacy text mode rate
+const byte syncByte = 0xA5;
+
+bool binaryMode = false;
+byte sequence = 0;
+unsigned long nextSampleMicros = 0;
+unsigned long lastTextMillis = 0;
+
+// CRC-8, polynomial 0x07, init 0x00 (matches crc8() on the host)
+byte crc8(const byte *data, byte length) {
+  byte crc = 0;
+  for (byte i = 0; i < length; i++) {
+    crc ^= data[i];
+    for (byte bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void sendFrame(int fsr1, int fsr2, unsigned long timestamp) {
+  byte frame[10];
+  frame[0] = syncByte;
+  frame[1] = sequence++;
+  frame[2] = timestamp & 0xFF;
+  frame[3] = (timestamp >> 8) & 0xFF;
+  frame[4] = (timestamp >> 16) & 0xFF;
+  frame[5] = (timestamp >> 24) & 0xFF;
+  frame[6] = fsr1 & 0xFF;
+  frame[7] = ((fsr1 >> 8) & 0x03) | ((fsr2 & 0x3F) << 2);
+  frame[8] = (fsr2 >> 6) & 0x0F;
+  frame[9] = crc8(frame + 1, 8);
+  Serial.write(frame, sizeof(frame));
+}
+
+void checkHandshake() {
+  while (Serial.available() > 0) {
+    char command = Serial.read();
+    if (command == 'B') {
+      Serial.println("PPBIN1");
+      binaryMode = true;
+      nextSampleMicros = micros();
+    } else if (command == 'T') {
+      binaryMode = false; // back to the text format
+    }
+  }
+}
+
 void setup() {
-  Serial.begin(9600); // Initialize serial communication
+  Serial.begin(baudRate); // Initialize serial communication
 }
 
 void loop() {
+  checkHandshake();
+
+  if (binaryMode) {
+    // Fixed-rate sampling; every sample is sent and the host detects punches
+    unsigned long now = micros();
+    if ((long)(now - nextSampleMicros) >= 0) {
+      nextSampleMicros += samplePeriodMicros;
+      int fsrReading1 = analogRead(fsrPin1);
+      int fsrReading2 = analogRead(fsrPin2);
+      sendFrame(fsrReading1, fsrReading2, now);
+    }
+    return;
+  }
+
+  if (millis() - lastTextMillis < textPeriodMillis) {
+    return;
+  }
+  lastTextMillis = millis();
+
   int fsrReading1 = analogRead(fsrPin1); // Read FSR 1 value
   int fsrReading2 = analogRead(fsrPin2); // Read FSR 2 value
 
@@ -16,12 +90,5 @@ void loop() {
 
     // Print sensor values and average force to the Serial Monitor
     Serial.println("FSR 1: " + String(fsrReading1) + ", FSR 2: " + String(fsrReading2) + ", Average Force: " + String(averageForce));
-    // Serial.println(fsrReading1);
-    // Serial.print(", FSR 2: ");
-    // Serial.println(fsrReading2);
-    // Serial.print(", Average Force: ");
-    // Serial.println(averageForce);
   }
-
-  delay(100); // Short delay for stability
 }
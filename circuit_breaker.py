@@ -0,0 +1,92 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Stops calling a service that keeps failing, and probes it in the background.
+
+    Closed: calls go through; `failure_threshold` failures in a row trip it.
+    Open: allow() says no for `cooldown` seconds, so callers skip the service
+    at once instead of waiting out its timeouts. When the cooldown is over,
+    allow() starts `probe` on a background thread (half open). A probe that
+    returns closes the breaker; one that raises reopens it with the cooldown
+    doubled, up to `max_cooldown`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, probe, failure_threshold=3, cooldown=15.0, max_cooldown=300.0, on_change=None):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.on_change = on_change  # called with the new state (any thread)
+        self.state = self.CLOSED
+        self.failures = 0  # consecutive
+        self.trips = 0
+        self.last_error = None
+        self._cooldown = cooldown
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether to call the service now; starts the probe once a cooldown is over"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN or time.monotonic() < self._retry_at:
+                return False
+            self.state = self.HALF_OPEN
+        self._changed()
+        threading.Thread(target=self._probe, name="circuit-probe", daemon=True).start()
+        return False
+
+    def retry_in(self):
+        """Seconds until the next probe while open"""
+        return max(0.0, self._retry_at - time.monotonic()) if self.state == self.OPEN else 0.0
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state == self.CLOSED:
+                return
+            self.state = self.CLOSED
+            self._cooldown = self.base_cooldown
+        print("Circuit closed: database reachable again")
+        self._changed()
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state != self.CLOSED or self.failures < self.failure_threshold:
+                return
+        self.trip(error)
+
+    def trip(self, error):
+        """Open now, e.g. when the service was unreachable from the start"""
+        with self._lock:
+            self.last_error = str(error)
+            self.state = self.OPEN
+            self.trips += 1
+            self._retry_at = time.monotonic() + self._cooldown
+            cooldown = self._cooldown
+        print(f"Circuit open for {cooldown:.0f} s after: {error}")
+        self._changed()
+
+    def _probe(self):
+        try:
+            self.probe()
+        except Exception as e:
+            with self._lock:
+                self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+            self.trip(e)
+            return
+        self.record_success()
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change(self.state)
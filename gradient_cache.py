@@ -0,0 +1,67 @@
+import pygame
+
+try:
+    import numpy
+    import pygame.surfarray
+except ImportError:
+    # Without NumPy gradients are still cached, just drawn line by line once
+    numpy = None
+
+VERTICAL = "vertical"      # color changes from top to bottom
+HORIZONTAL = "horizontal"  # color changes from left to right
+
+_gradients = {}
+
+
+def gradient_surface(size, color1, color2, direction=VERTICAL):
+    """
+    Return a cached surface filled with a linear gradient from color1 to color2.
+
+    Each (size, colors, direction) combination is generated once; call
+    clear_gradient_cache() when the window is resized.
+    """
+    width, height = int(size[0]), int(size[1])
+    key = (width, height, tuple(color1), tuple(color2), direction)
+    surface = _gradients.get(key)
+    if surface is None:
+        surface = _build_gradient(width, height, color1, color2, direction)
+        _gradients[key] = surface
+    return surface
+
+
+def clear_gradient_cache():
+    _gradients.clear()
+
+
+def gradient_cache_size():
+    return len(_gradients)
+
+
+def _build_gradient(width, height, color1, color2, direction):
+    width, height = max(1, width), max(1, height)
+    steps = height if direction == VERTICAL else width
+
+    if numpy is not None:
+        ratio = (numpy.arange(steps, dtype=numpy.float64) / steps)[:, None]
+        colors = (numpy.array(color1, dtype=numpy.float64) * (1 - ratio)
+                  + numpy.array(color2, dtype=numpy.float64) * ratio).astype(numpy.uint8)
+        # Build a one-pixel strip (surfarray is indexed [x][y]) and stretch it;
+        # nearest-neighbour scaling keeps every row/column color exact
+        if direction == VERTICAL:
+            strip = pygame.surfarray.make_surface(colors[None, :, :])
+        else:
+            strip = pygame.surfarray.make_surface(colors[:, None, :])
+        surface = pygame.transform.scale(strip, (width, height))
+    else:
+        surface = pygame.Surface((width, height))
+        for i in range(steps):
+            ratio = i / steps
+            color = tuple(int(color1[c] * (1 - ratio) + color2[c] * ratio) for c in range(3))
+            if direction == VERTICAL:
+                pygame.draw.line(surface, color, (0, i), (width, i))
+            else:
+                pygame.draw.line(surface, color, (i, 0), (i, height))
+
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    return surface
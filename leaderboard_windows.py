@@ -0,0 +1,64 @@
+"""
+Time windows for the leaderboards: all-time, today, this week and an event.
+
+Every score belongs to one period per window ("today" -> 2026-10-16,
+"week" -> 2026-W42, "event" -> the configured event's name). The score store
+keeps a best-per-player rollup for each (window, period) and updates it as
+scores are inserted, so a windowed leaderboard costs the same index range
+scan as the all-time one, however many scores there are.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+# A concrete period of a window; end is exclusive (None = open-ended)
+Period = namedtuple('Period', 'window key start end')
+Event = namedtuple('Event', 'name start end')
+
+TITLES = {"all": "HALL OF FAME", "today": "TODAY'S BEST", "week": "THIS WEEK"}
+
+
+def parse_event(name, start, end=None):
+    """Event from EVENT_NAME/EVENT_START/EVENT_END (ISO dates or datetimes), or None"""
+    if not name or not start:
+        return None
+    return Event(name, datetime.fromisoformat(start), datetime.fromisoformat(end) if end else None)
+
+
+class LeaderboardWindows:
+    def __init__(self, names=("all", "today", "event", "week"), event=None):
+        self.event = event
+        # The event window only exists while an event is configured
+        self.names = [name for name in names if name != "event" or event is not None]
+
+    def periods(self, timestamp):
+        """(window, period key) for each rolled-up window the score counts toward"""
+        periods = []
+        for window in self.names:
+            if window == "today":
+                periods.append(("today", timestamp.date().isoformat()))
+            elif window == "week":
+                year, week, _ = timestamp.isocalendar()
+                periods.append(("week", f"{year}-W{week:02d}"))
+            elif window == "event" and self.event.start <= timestamp \
+                    and (self.event.end is None or timestamp < self.event.end):
+                periods.append(("event", self.event.name))
+        return periods
+
+    def current(self, window, now=None):
+        """The period of window that is running now"""
+        now = now or datetime.now()
+        if window == "today":
+            start = datetime(now.year, now.month, now.day)
+            return Period(window, start.date().isoformat(), start, start + timedelta(days=1))
+        if window == "week":
+            start = datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+            year, week, _ = now.isocalendar()
+            return Period(window, f"{year}-W{week:02d}", start, start + timedelta(days=7))
+        if window == "event":
+            return Period(window, self.event.name, self.event.start, self.event.end)
+        return Period(window, None, None, None)
+
+    def title(self, window):
+        if window == "event":
+            return self.event.name.upper()
+        return TITLES.get(window, window.upper())
@@ -0,0 +1,218 @@
+"""
+Runtime metrics: counters, duration histograms and gauges.
+
+Instrumented code calls inc(), observe() or timed(); queue depths and other
+values that already live somewhere are registered once as gauge callables.
+Everything is exported in the Prometheus text format, either from a small
+localhost HTTP endpoint or as a textfile for node_exporter's textfile
+collector. The F3 overlay in the game reads summary() for recent values.
+"""
+import collections
+import functools
+import http.server
+import os
+import threading
+import time
+
+PREFIX = "boxing_"
+# Frame and database call durations, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.016, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RECENT_SAMPLES = 256
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = collections.deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._buckets = {}     # name -> histogram bucket bounds, if not DEFAULT_BUCKETS
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._gauges = {}      # (name, labels) -> callable
+
+    def describe(self, name, text, buckets=None):
+        self._help[name] = text
+        if buckets:
+            self._buckets[name] = tuple(buckets)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(seconds)
+
+    def gauge(self, name, read, **labels):
+        """Register a callable that returns the gauge's current value"""
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = read
+
+    def remove_gauge(self, name, **labels):
+        with self._lock:
+            self._gauges.pop((name, tuple(sorted(labels.items()))), None)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def summary(self):
+        """Recent p50/p95 per histogram, counter totals and gauge values (for the overlay)"""
+        with self._lock:
+            histograms = {key: sorted(h.recent) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        result = {"histograms": {}, "counters": counters, "gauges": {}}
+        for key, values in histograms.items():
+            if values:
+                result["histograms"][key] = (values[len(values) // 2],
+                                             values[min(len(values) - 1, int(len(values) * 0.95))])
+        for key, read in gauges.items():
+            try:
+                result["gauges"][key] = read()
+            except Exception:
+                pass
+        return result
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h.counts), h.count, h.sum, h.buckets))
+                                for key, h in self._histograms.items())
+            gauges = sorted(self._gauges.items(), key=lambda item: item[0])
+
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{PREFIX}{name}{format_labels(labels)} {value}")
+        for (name, labels), read in gauges:
+            try:
+                value = float(read())
+            except Exception:
+                continue
+            header(name, "gauge")
+            lines.append(f"{PREFIX}{name}{format_labels(labels)} {value:g}")
+        for (name, labels), (counts, count, total, buckets) in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{PREFIX}{name}_bucket{format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{PREFIX}{name}_sum{format_labels(labels)} {total:.6f}")
+            lines.append(f"{PREFIX}{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+registry = Registry()
+describe = registry.describe
+inc = registry.inc
+observe = registry.observe
+gauge = registry.gauge
+remove_gauge = registry.remove_gauge
+
+
+class timed:
+    """Time a block or function into a histogram: `with timed("db_call_seconds", call="x"):`"""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe(self.name, time.perf_counter() - self._start, **self.labels)
+
+    def __call__(self, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(self.name, **self.labels):
+                return function(*args, **kwargs)
+        return wrapper
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would drown the game's own output
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; returns the server or None if the port is taken"""
+    try:
+        server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Metrics at http://{host}:{port}/metrics")
+    return server
+
+
+def start_textfile_writer(path, interval=15.0):
+    """Rewrite path atomically every interval seconds (node_exporter textfile collector)"""
+    def run():
+        while True:
+            try:
+                temporary = f"{path}.tmp"
+                with open(temporary, 'w') as file:
+                    file.write(registry.render())
+                os.replace(temporary, path)
+            except OSError as e:
+                print(f"Could not write metrics to {path}: {e}")
+            time.sleep(interval)
+    threading.Thread(target=run, name="metrics-textfile", daemon=True).start()
@@ -0,0 +1,431 @@
+"""
+Multi-station mode: one process driving several punching bags.
+
+    STATION_PORTS=/dev/ttyACM0,/dev/ttyACM1 python multi_station.py
+    STATION_COUNT=3 python multi_station.py     # the first three boards found by USB VID/PID
+
+Every bag gets its own viewport in the window with its own player, score
+animation and result screen, while all of them share boxing.py's local
+score store and its MongoDB sync, the leaderboard cache and the sound clips.
+Per-board gauges are exported with a station label instead of boxing.py's
+single-board ones. A single reader thread serves
+every board through selectors; punches reach the main loop through one
+PunchChannel per station.
+
+boxing.py keeps the screen state in module globals, so a station's state is
+bound into those globals while the station draws or handles input (see
+Station.bound). Tab or a click moves the keyboard focus between stations.
+"""
+import contextlib
+import math
+import os
+import queue
+import selectors
+import sys
+import threading
+import time
+
+import numpy
+import pygame
+import serial
+
+import boxing
+import metrics
+from punch_channel import PunchChannel
+from punch_detector import PunchDetector
+from punch_trace import PunchTrace
+from screen_layers import Compositor
+from serial_discovery import candidate_ports
+from serial_protocol import FrameDecoder, negotiate_binary, parse_text_line
+
+STATION_PORTS = [port.strip() for port in os.getenv('STATION_PORTS', '').split(',') if port.strip()]
+STATION_COUNT = int(os.getenv('STATION_COUNT', '0'))  # 0 = one station per port
+
+# Gauges boxing.py registers for its single board, replaced by per-station ones
+STATION_GAUGES = ("punch_queue_depth", "punches_dropped", "serial_connected", "serial_disconnects",
+                  "serial_downtime_seconds")
+FOCUS_COLOR = boxing.CHAMPION_GOLD
+FRAME_COLOR = (60, 55, 50)
+FRAME_WIDTH = 3
+
+# boxing.py globals that belong to one station
+STATE_FIELDS = (
+    "current_state", "current_username", "input_active", "button_rects", "mouse_pos",
+    "update_screen_timer", "last_update_time",
+    "animation", "animation_target_score", "animation_punch",
+)
+
+
+class Station:
+    def __init__(self, index, port):
+        self.index = index
+        self.port = port
+        self.rect = None
+        self.surface = None
+        self.compositor = Compositor()
+        self.channel = PunchChannel(boxing.PUNCH_QUEUE_SIZE, on_put=lambda punch: boxing.wake_main_loop())
+        self.state = {
+            "current_state": "username_input",
+            "current_username": "",
+            "input_active": True,
+            "button_rects": {},
+            "mouse_pos": (-1, -1),
+            "update_screen_timer": 0,
+            "last_update_time": 0,
+            "animation": None,
+            "animation_target_score": 0,
+            "animation_punch": None,
+        }
+        self.next_idle_frame = 0
+
+        # Serial link, owned by the connector and reader threads
+        self.ser = None
+        self.binary = False
+        self.decoder = FrameDecoder()
+        self.detector = PunchDetector(threshold=boxing.minimum_threshold, end_gap_us=boxing.BINARY_END_GAP_US)
+        self.text_buffer = b""
+        self.connected = False
+        self.connecting = port is not None
+        self.disconnects = 0
+        self.downtime_total_s = 0.0
+        self.down_since = None
+
+    def set_viewport(self, window, rect):
+        self.rect = pygame.Rect(rect)
+        self.surface = window.subsurface(self.rect)
+        self.compositor.viewport = self.rect
+        self.compositor.clear()
+
+    @contextlib.contextmanager
+    def bound(self):
+        """Make boxing.py's drawing and input functions act on this station"""
+        for name, value in self.state.items():
+            setattr(boxing, name, value)
+        boxing.screen = self.surface
+        boxing.screen_width, boxing.screen_height = self.rect.size
+        boxing.compositor = self.compositor
+        boxing.punch_channel = self.channel
+        boxing.SERIAL_CONNECTED = self.connected
+        boxing.SERIAL_CONNECTING = self.connecting
+        try:
+            yield
+        finally:
+            for name in STATE_FIELDS:
+                self.state[name] = getattr(boxing, name)
+
+    # Serial link
+    def open(self):
+        """Open and handshake the board (connector thread); the reader takes over afterwards"""
+        connection = serial.Serial(self.port, boxing.SERIAL_BAUD, timeout=0.05)
+        binary = False
+        if boxing.SERIAL_PROTOCOL != "text":
+            binary = negotiate_binary(connection)
+            if not binary and boxing.SERIAL_PROTOCOL == "binary":
+                connection.close()
+                raise serial.SerialException("board did not acknowledge the binary protocol")
+        connection.timeout = 0  # reads only happen after select() reported data
+        self.binary = binary
+        self.decoder = FrameDecoder()
+        self.detector.reset()
+        self.detector.end_gap_us = boxing.BINARY_END_GAP_US if binary else boxing.TEXT_END_GAP_US
+        self.text_buffer = b""
+        self.ser = connection
+
+    def link_up(self):
+        if self.down_since is not None:
+            outage = time.perf_counter() - self.down_since
+            self.downtime_total_s += outage
+            self.down_since = None
+            print(f"Station {self.index + 1}: board back on {self.port} after {outage:.2f} s")
+        else:
+            print(f"Station {self.index + 1}: board on {self.port} "
+                  f"({'binary' if self.binary else 'text'} protocol)")
+        self.connected = True
+        self.connecting = False
+        pygame.event.post(pygame.event.Event(boxing.SERVICES_READY_EVENT, task="serial"))
+
+    def link_down(self, error):
+        print(f"Station {self.index + 1}: serial connection error: {error}")
+        try:
+            self.ser.close()
+        except (serial.SerialException, OSError):
+            pass
+        self.ser = None
+        self.connected = False
+        self.connecting = True
+        self.disconnects += 1
+        self.down_since = time.perf_counter()
+        pygame.event.post(pygame.event.Event(boxing.SERVICES_READY_EVENT, task="serial"))
+
+    def feed(self, data):
+        """Decode raw bytes and queue finished punches (reader thread)"""
+        read_at = time.perf_counter()
+        station = str(self.index + 1)
+        metrics.inc("serial_bytes_total", len(data), station=station)
+        if self.binary:
+            crc_errors = self.decoder.crc_errors
+            samples = self.decoder.feed(data)
+            metrics.inc("serial_frames_total", len(samples), station=station)
+            if self.decoder.crc_errors > crc_errors:
+                metrics.inc("serial_parse_failures_total", self.decoder.crc_errors - crc_errors,
+                            kind="crc", station=station)
+            if samples:
+                batch = numpy.array(samples, dtype=numpy.int64)
+                self.queue_events(self.detector.feed(batch[:, 1], batch[:, 2], batch[:, 3]),
+                                  read_at, self.detector.clock_us)
+            return
+        lines = (self.text_buffer + data).split(b"\n")
+        self.text_buffer = lines.pop()
+        now_us = time.monotonic_ns() // 1000
+        for line in lines:
+            line = line.decode('utf-8', 'replace').strip()
+            if not line:
+                continue
+            values = parse_text_line(line)
+            metrics.inc("serial_lines_total", station=station)
+            if values is None:
+                metrics.inc("serial_parse_failures_total", kind="text", station=station)
+            if values:
+                self.queue_events(self.detector.feed([now_us], [values[0]], [values[1]]), read_at, now_us)
+
+    def flush(self, now_us):
+        if self.ser is not None and not self.binary:
+            self.queue_events(self.detector.flush(now_us), time.perf_counter(), now_us)
+
+    def queue_events(self, events, read_at, clock_us):
+        for event in events:
+            print(f"Station {self.index + 1} punch: peak {event.peak:.0f}, impulse {event.impulse:.1f}")
+            self.channel.put(event, PunchTrace.from_serial(event, read_at, clock_us))
+
+    def stats(self):
+        return {
+            "port": self.port,
+            "disconnects": self.disconnects,
+            "downtime_total_s": round(self.downtime_total_s, 3),
+            "punches": self.channel.stats(),
+        }
+
+
+def connect_station(station, ready):
+    """Keep trying to open the station's board with backoff (one thread per outage)"""
+    for delay in boxing.serial_backoff_delays():
+        if os.path.exists(station.port):
+            try:
+                station.open()
+                ready.put(station)
+                return
+            except (serial.SerialException, OSError) as e:
+                print(f"Station {station.index + 1}: cannot open {station.port}: {e}")
+        time.sleep(delay)
+
+
+def start_connector(station, ready):
+    station.connecting = True
+    threading.Thread(target=connect_station, args=(station, ready), daemon=True).start()
+
+
+def read_stations(stations, ready):
+    """Serve every board from one thread; lost boards are handed back to a connector"""
+    selector = selectors.DefaultSelector()
+    while True:
+        while not ready.empty():
+            station = ready.get()
+            selector.register(station.ser, selectors.EVENT_READ, station)
+            station.link_up()
+
+        if not selector.get_map():
+            time.sleep(0.05)
+            continue
+        # Wake up regularly so text-mode impacts are closed on the host clock
+        for key, _ in selector.select(timeout=0.05):
+            station = key.data
+            try:
+                station.feed(station.ser.read(max(1, station.ser.in_waiting)))
+            except (ValueError, IndexError):
+                continue
+            except (serial.SerialException, OSError) as e:
+                selector.unregister(station.ser)
+                station.link_down(e)
+                start_connector(station, ready)
+
+        now_us = time.monotonic_ns() // 1000
+        for station in stations:
+            station.flush(now_us)
+
+
+def station_ports():
+    if STATION_PORTS:
+        return STATION_PORTS
+    ports = [device for device, _ in candidate_ports(boxing.SERIAL_PORT)]
+    if STATION_COUNT:
+        # Stations without a board run in demo mode
+        ports = (ports + [None] * STATION_COUNT)[:STATION_COUNT]
+    return ports or [None, None]
+
+
+def layout_stations(stations, window):
+    """Tile the window into a grid of viewports"""
+    width, height = window.get_size()
+    columns = math.ceil(math.sqrt(len(stations)))
+    rows = math.ceil(len(stations) / columns)
+    cell_width, cell_height = width // columns, height // rows
+    for i, station in enumerate(stations):
+        row, column = divmod(i, columns)
+        station.set_viewport(window, (column * cell_width, row * cell_height, cell_width, cell_height))
+        station.next_idle_frame = 0
+
+
+def draw_station_frame(window, station, focused):
+    """Border marking the station with keyboard focus; only the edges are pushed"""
+    rect = station.rect
+    pygame.draw.rect(window, FOCUS_COLOR if focused else FRAME_COLOR, rect, FRAME_WIDTH)
+    pygame.display.update([
+        pygame.Rect(rect.x, rect.y, rect.width, FRAME_WIDTH),
+        pygame.Rect(rect.x, rect.bottom - FRAME_WIDTH, rect.width, FRAME_WIDTH),
+        pygame.Rect(rect.x, rect.y, FRAME_WIDTH, rect.height),
+        pygame.Rect(rect.right - FRAME_WIDTH, rect.y, FRAME_WIDTH, rect.height),
+    ])
+
+
+def new_player():
+    boxing.current_state = "username_input"
+    boxing.current_username = ""
+    boxing.input_active = True
+    boxing.display_username_input()
+
+
+def step_station(station, now):
+    """Advance one station by a frame (call inside station.bound()); returns True if it drew"""
+    boxing.process_punches()
+    state = boxing.current_state
+
+    if state == "animating" and boxing.animation is not None:
+        boxing.step_animation(present=lambda: pygame.display.update(station.rect),
+                              label=f"Station {station.index + 1}: punch")
+        return True
+
+    if state in boxing.IDLE_STATES and now >= station.next_idle_frame:
+        boxing.redraw_current_screen()
+        station.next_idle_frame = boxing.next_idle_frame_time(now)
+        return True
+
+    if state == "punch_result" and now - boxing.update_screen_timer > boxing.update_screen_display_time:
+        new_player()
+        return True
+    return False
+
+
+def wait_for_events(stations):
+    """Like boxing.wait_for_events, across every station's deadlines"""
+    if any(station.state["current_state"] == "animating" for station in stations):
+        boxing.frame_clock.tick(boxing.TARGET_FPS)
+        return pygame.event.get()
+
+    now = time.time()
+    deadlines = []
+    for station in stations:
+        if station.state["current_state"] == "punch_result":
+            deadlines.append(station.state["update_screen_timer"] + boxing.update_screen_display_time)
+        else:
+            deadlines.append(station.next_idle_frame)
+    timeout_ms = max(1, int((min(deadlines) - now) * 1000))
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+def station_at(stations, pos):
+    for station in stations:
+        if station.rect.collidepoint(pos):
+            return station
+    return None
+
+
+def main():
+    boxing.init_display()
+    pygame.display.set_caption('Power Punch Boxing Game - Multi-Station')
+    window = boxing.screen
+
+    stations = [Station(i, port) for i, port in enumerate(station_ports())]
+    # boxing's own channel and serial link are unused here; report each station instead
+    for name in STATION_GAUGES:
+        metrics.remove_gauge(name)
+    for station in stations:
+        label = str(station.index + 1)
+        metrics.gauge("punch_queue_depth", station.channel.depth, station=label)
+        metrics.gauge("punches_dropped", lambda station=station: station.channel.dropped, station=label)
+        metrics.gauge("serial_connected", lambda station=station: int(station.connected), station=label)
+        metrics.gauge("serial_disconnects", lambda station=station: station.disconnects, station=label)
+        metrics.gauge("serial_downtime_seconds", lambda station=station: station.downtime_total_s, station=label)
+    if boxing.METRICS_PORT:
+        metrics.start_http_server(boxing.METRICS_PORT, boxing.METRICS_HOST)
+    layout_stations(stations, window)
+    print(f"{len(stations)} stations: {[station.port or 'demo' for station in stations]}")
+    focus = 0
+    for station in stations:
+        with station.bound():
+            boxing.display_username_input()
+        draw_station_frame(window, station, station.index == focus)
+
+    # One database connection, leaderboard cache and set of sound clips for every station
+    for task in (boxing.connect_mongodb, boxing.load_rankings, boxing.rebuild_leaderboard_windows, boxing.load_audio):
+        threading.Thread(target=boxing.run_startup_task, args=(task,), daemon=True).start()
+
+    ready = queue.Queue()
+    for station in stations:
+        if station.port:
+            start_connector(station, ready)
+    threading.Thread(target=read_stations, args=(stations, ready), daemon=True).start()
+
+    while True:
+        redraw = set()
+        for event in wait_for_events(stations):
+            if event.type == pygame.QUIT:
+                for station in stations:
+                    print(f"Station {station.index + 1}: {station.stats()}")
+                pygame.quit()
+                sys.exit()
+            elif event.type == boxing.SERVICES_READY_EVENT:
+                redraw.update(stations)
+            elif event.type == pygame.VIDEORESIZE:
+                window = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                boxing.clear_gradient_cache()
+                layout_stations(stations, window)
+                redraw.update(stations)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+                focus = (focus + 1) % len(stations)
+                redraw.update(stations)
+            elif event.type == pygame.KEYDOWN:
+                with stations[focus].bound():
+                    boxing.handle_keydown(event)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                station = station_at(stations, event.pos)
+                if station is not None:
+                    focus = station.index
+                    redraw.update(stations)
+                    with station.bound():
+                        boxing.handle_button_click((event.pos[0] - station.rect.x, event.pos[1] - station.rect.y))
+            elif event.type == pygame.MOUSEMOTION:
+                for station in stations:
+                    inside = station.rect.collidepoint(event.pos)
+                    local = (event.pos[0] - station.rect.x, event.pos[1] - station.rect.y) if inside else (-1, -1)
+                    if local != station.state["mouse_pos"]:
+                        station.state["mouse_pos"] = local
+                        redraw.add(station)
+
+        now = time.time()
+        for station in stations:
+            with station.bound():
+                if station in redraw and boxing.current_state in boxing.IDLE_STATES:
+                    boxing.redraw_current_screen()
+                    drew = True
+                else:
+                    drew = False
+                drew = step_station(station, now) or drew
+            if drew or station in redraw:
+                draw_station_frame(window, station, station.index == focus)
+
+
+if __name__ == "__main__":
+    main()
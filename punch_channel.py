@@ -0,0 +1,83 @@
+"""
+Hand-off of detected punches from the serial thread to the main loop.
+
+The serial thread only puts punches here; the main loop drains them and is
+the only code that touches game state. The queue is bounded: when the main
+loop falls behind, the oldest pending punch is dropped (and counted) so the
+newest one is the one that gets scored. Each punch carries a PunchTrace
+(punch_trace.py) that collects its pipeline timestamps on the way.
+"""
+import collections
+import statistics
+import threading
+import time
+
+from punch_trace import PunchTrace
+
+QueuedPunch = collections.namedtuple('QueuedPunch', 'id event queued_at trace')
+
+
+class PunchChannel:
+    def __init__(self, max_pending=8, on_put=None, history=256):
+        self.max_pending = max_pending
+        self.on_put = on_put  # called after every put, e.g. to wake the main loop
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._next_id = 1
+        self.posted = 0
+        self.dropped = 0
+        self.consumed = 0
+        # Seconds from put() to the first frame showing the punch
+        self.latencies = collections.deque(maxlen=history)
+
+    def put(self, event, trace=None):
+        """Queue a punch from any thread; returns the QueuedPunch"""
+        trace = trace or PunchTrace()
+        with self._lock:
+            punch = QueuedPunch(self._next_id, event, time.perf_counter(), trace)
+            trace.mark("queued", punch.queued_at)
+            self._next_id += 1
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(punch)
+            self.posted += 1
+        if self.on_put:
+            self.on_put(punch)
+        return punch
+
+    def drain(self):
+        """Take every pending punch, oldest first (main loop only)"""
+        with self._lock:
+            punches = list(self._pending)
+            self._pending.clear()
+            self.consumed += len(punches)
+        now = time.perf_counter()
+        for punch in punches:
+            punch.trace.mark("dequeued", now)
+        return punches
+
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def delivered(self, punch):
+        """Record that the punch reached the screen; returns the latency in seconds"""
+        now = time.perf_counter()
+        punch.trace.mark("shown", now)
+        latency = now - punch.queued_at
+        self.latencies.append(latency)
+        return latency
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        stats = {
+            "posted": self.posted,
+            "consumed": self.consumed,
+            "dropped": self.dropped,
+            "depth": self.depth(),
+        }
+        if latencies:
+            stats["latency_p50_ms"] = round(statistics.median(latencies) * 1000, 1)
+            stats["latency_p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+        return stats
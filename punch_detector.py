@@ -0,0 +1,234 @@
+"""
+Streaming punch detection over the raw FSR sample stream.
+
+Samples arrive in batches (one bulk serial read at a time). Each impact is
+segmented with a threshold plus a hold-off gap, and exactly one PunchEvent is
+emitted per impact once it has ended, carrying the true peak rather than
+whichever sample happened to cross the trigger first.
+"""
+from collections import namedtuple
+
+import numpy
+
+PunchEvent = namedtuple('PunchEvent', [
+    'peak',          # highest combined force during the impact
+    'impulse',       # area under the force curve, force * seconds
+    'rise_time',     # seconds from onset to peak
+    'duration',      # seconds from onset to the last sample above threshold
+    'start_us',      # timestamp of the first sample above threshold
+    'peak_us',       # timestamp of the peak
+    'fsr1',          # channel readings at the peak
+    'fsr2',
+])
+
+TIMESTAMP_WRAP = 1 << 32  # the board's micros() counter
+
+
+def combine_channels(fsr1, fsr2, threshold):
+    """
+    Vectorized version of the game's per-sample force rule: average both
+    sensors when both are loaded, otherwise use whichever one is.
+    """
+    fsr1 = fsr1.astype(numpy.float64)
+    fsr2 = fsr2.astype(numpy.float64)
+    both = (fsr1 > threshold) & (fsr2 > threshold)
+    return numpy.where(both, (fsr1 + fsr2) / 2,
+                       numpy.where(fsr1 < threshold, fsr2,
+                                   numpy.where(fsr2 < threshold, fsr1, numpy.maximum(fsr1, fsr2))))
+
+
+class PunchDetector:
+    """
+    Segment impacts in a stream of (timestamp_us, fsr1, fsr2) batches.
+
+    An impact starts when the combined force reaches `threshold` and ends
+    once it has stayed below it for `end_gap_us`; short dips inside that gap
+    belong to the same impact. Impacts longer than `max_duration_us` (someone
+    leaning on the bag) are reported once and then ignored until the force
+    drops again. The last `history` samples are kept in a ring buffer.
+    """
+
+    def __init__(self, threshold=305, end_gap_us=30_000, max_duration_us=2_000_000, history=4096):
+        self.threshold = threshold
+        self.end_gap_us = end_gap_us
+        self.max_duration_us = max_duration_us
+
+        self._ring_time = numpy.zeros(history, dtype=numpy.int64)
+        self._ring_force = numpy.zeros(history, dtype=numpy.float64)
+        self._ring_pos = 0
+        self._ring_count = 0
+
+        self._wrap_offset = 0
+        self._last_raw_ts = None
+        self._prev_time = None
+        self._prev_force = 0.0
+
+        self._event = None
+        self._below_since = None
+        self._pending_impulse = 0.0
+        self._latched = False
+
+        self.samples = 0
+        self.events = 0
+
+    def feed(self, timestamps_us, fsr1, fsr2):
+        """Process one batch of samples; returns the PunchEvents that completed in it"""
+        raw = numpy.asarray(timestamps_us, dtype=numpy.int64)
+        if raw.size == 0:
+            return []
+        times = self._unwrap(raw)
+        force = combine_channels(numpy.asarray(fsr1), numpy.asarray(fsr2), self.threshold)
+        self._remember(times, force)
+        self.samples += raw.size
+
+        fsr1 = numpy.asarray(fsr1)
+        fsr2 = numpy.asarray(fsr2)
+        above = force >= self.threshold
+        # Split the batch into runs of samples on the same side of the threshold
+        edges = numpy.flatnonzero(above[1:] != above[:-1]) + 1
+        starts = numpy.concatenate(([0], edges))
+        ends = numpy.concatenate((edges, [above.size]))
+
+        completed = []
+        for start, end in zip(starts, ends):
+            run_time = times[start:end]
+            run_force = force[start:end]
+            area = self._area(run_time, run_force)
+            if above[start]:
+                self._above_run(run_time, run_force, area, fsr1[start:end], fsr2[start:end], completed)
+            else:
+                self._below_run(run_time, area, completed)
+            self._prev_time = int(run_time[-1])
+            self._prev_force = float(run_force[-1])
+        return completed
+
+    def flush(self, now_us):
+        """Close an impact whose trailing samples never arrived (stalled or text-mode stream)"""
+        completed = []
+        if self._event is not None:
+            last = self._below_since if self._below_since is not None else self._prev_time
+            if now_us - last >= self.end_gap_us:
+                completed.append(self._close())
+        if self._latched and self._below_since is None and self._prev_time is not None \
+                and now_us - self._prev_time >= self.end_gap_us:
+            self._latched = False
+        return completed
+
+    @property
+    def clock_us(self):
+        """Unwrapped timestamp of the newest sample seen (None before the first)"""
+        return self._prev_time
+
+    def reset(self):
+        """Forget the stream position after a reconnect (the board's clock restarts)"""
+        self._ring_pos = 0
+        self._ring_count = 0
+        self._wrap_offset = 0
+        self._last_raw_ts = None
+        self._prev_time = None
+        self._prev_force = 0.0
+        self._event = None
+        self._below_since = None
+        self._pending_impulse = 0.0
+        self._latched = False
+
+    def recent(self):
+        """The ring buffer contents, oldest first, as (timestamps_us, force) arrays"""
+        count = self._ring_count
+        index = (numpy.arange(count) + self._ring_pos - count) % self._ring_time.size
+        return self._ring_time[index], self._ring_force[index]
+
+    def _above_run(self, run_time, run_force, area, fsr1, fsr2, completed):
+        if self._latched:
+            self._below_since = None
+            return
+
+        peak_index = int(numpy.argmax(run_force))
+        peak = float(run_force[peak_index])
+        if self._event is None:
+            self._event = {
+                "start_us": int(run_time[0]),
+                "peak": peak,
+                "peak_us": int(run_time[peak_index]),
+                "fsr1": int(fsr1[peak_index]),
+                "fsr2": int(fsr2[peak_index]),
+                "impulse": area - self._entry_area(run_time, run_force),
+                "last_above_us": int(run_time[-1]),
+            }
+        else:
+            event = self._event
+            event["impulse"] += self._pending_impulse + area
+            if peak > event["peak"]:
+                event.update(peak=peak, peak_us=int(run_time[peak_index]),
+                             fsr1=int(fsr1[peak_index]), fsr2=int(fsr2[peak_index]))
+            event["last_above_us"] = int(run_time[-1])
+        self._pending_impulse = 0.0
+        self._below_since = None
+
+        if int(run_time[-1]) - self._event["start_us"] >= self.max_duration_us:
+            completed.append(self._close())
+            self._latched = True
+
+    def _below_run(self, run_time, area, completed):
+        if self._below_since is None:
+            self._below_since = int(run_time[0])
+        if self._latched:
+            if int(run_time[-1]) - self._below_since >= self.end_gap_us:
+                self._latched = False
+            return
+        if self._event is None:
+            return
+        self._pending_impulse += area
+        if int(run_time[-1]) - self._below_since >= self.end_gap_us:
+            completed.append(self._close())
+
+    def _close(self):
+        event = self._event
+        self._event = None
+        self._pending_impulse = 0.0
+        self.events += 1
+        return PunchEvent(
+            peak=event["peak"],
+            impulse=event["impulse"],
+            rise_time=(event["peak_us"] - event["start_us"]) / 1e6,
+            duration=(event["last_above_us"] - event["start_us"]) / 1e6,
+            start_us=event["start_us"],
+            peak_us=event["peak_us"],
+            fsr1=event["fsr1"],
+            fsr2=event["fsr2"],
+        )
+
+    def _area(self, run_time, run_force):
+        """Trapezoid area of the run, including the segment joining it to the previous sample"""
+        if self._prev_time is not None:
+            run_time = numpy.concatenate(([self._prev_time], run_time))
+            run_force = numpy.concatenate(([self._prev_force], run_force))
+        if run_time.size < 2:
+            return 0.0
+        return float(numpy.sum((run_force[1:] + run_force[:-1]) * numpy.diff(run_time)) / 2e6)
+
+    def _entry_area(self, run_time, run_force):
+        """Area of the segment leading into an impact, which happened before its onset"""
+        if self._prev_time is None:
+            return 0.0
+        return (self._prev_force + float(run_force[0])) * (int(run_time[0]) - self._prev_time) / 2e6
+
+    def _unwrap(self, raw):
+        """Turn the board's wrapping 32-bit microsecond counter into a monotonic one"""
+        previous = self._last_raw_ts if self._last_raw_ts is not None else raw[0]
+        steps = numpy.diff(numpy.concatenate(([previous], raw)))
+        wraps = numpy.cumsum(steps < -(TIMESTAMP_WRAP // 2))
+        times = raw + (self._wrap_offset + wraps * TIMESTAMP_WRAP)
+        self._wrap_offset += int(wraps[-1]) * TIMESTAMP_WRAP
+        self._last_raw_ts = int(raw[-1])
+        return times
+
+    def _remember(self, times, force):
+        size = self._ring_time.size
+        if times.size >= size:
+            times, force = times[-size:], force[-size:]
+        index = (numpy.arange(times.size) + self._ring_pos) % size
+        self._ring_time[index] = times
+        self._ring_force[index] = force
+        self._ring_pos = (self._ring_pos + times.size) % size
+        self._ring_count = min(size, self._ring_count + times.size)
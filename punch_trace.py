@@ -0,0 +1,142 @@
+"""
+Per-punch latency tracing, from the force peak to the first animation frame.
+
+Every punch carries a PunchTrace whose marks are perf_counter() timestamps
+taken as it moves through the pipeline:
+
+    peak      the force peak (estimated from the sensor's own clock)
+    read      the serial read that completed the impact returned
+    queued    the serial thread handed it to the punch channel
+    dequeued  the main loop took it off the channel
+    scored    update_display() stored the score and started the animation
+    shown     the first animation frame was flipped to the screen
+
+The gaps between consecutive marks are the stages below. A finished trace is
+recorded into the punch_stage_seconds and punch_latency_seconds histograms,
+checked against the latency budget and optionally appended to a JSONL file
+that tools/latency_report.py summarises.
+"""
+import collections
+import json
+import threading
+import time
+
+import metrics
+
+STAGES = (
+    ("sensor", "peak", "read"),        # end-of-impact hold-off, firmware batching, USB
+    ("decode", "read", "queued"),      # frame decoding and impact detection
+    ("wake", "queued", "dequeued"),    # main loop noticing the punch
+    ("score", "dequeued", "scored"),   # debounce check and score hand-off
+    ("render", "scored", "shown"),     # first animation frame drawn and flipped
+)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)
+
+metrics.describe("punch_stage_seconds", "Time a punch spent in each pipeline stage", LATENCY_BUCKETS)
+metrics.describe("punch_latency_seconds", "Force peak (or hand-off) to the first animation frame", LATENCY_BUCKETS)
+metrics.describe("punches_unscored_total", "Detected punches that never reached the screen, by reason")
+metrics.describe("punch_budget_exceeded_total", "Punches shown later than the latency budget")
+
+
+class PunchTrace:
+    def __init__(self, **marks):
+        self.marks = dict(marks)
+
+    def mark(self, name, at=None):
+        self.marks[name] = time.perf_counter() if at is None else at
+
+    @classmethod
+    def from_serial(cls, event, read_at, clock_us):
+        """
+        Trace for a punch detected in a serial read that returned at read_at,
+        when the newest sample was stamped clock_us (in the event's time base).
+        The peak happened (clock_us - peak_us) before that on the sensor's clock.
+        """
+        return cls(peak=read_at - max(0, clock_us - event.peak_us) / 1e6, read=read_at)
+
+    def stages(self):
+        """Seconds spent in each stage whose two marks were both taken"""
+        return {stage: self.marks[end] - self.marks[start]
+                for stage, start, end in STAGES if start in self.marks and end in self.marks}
+
+    def total(self):
+        """Peak to screen; punches without serial marks (demo keys) start at the hand-off"""
+        start = self.marks.get("peak", self.marks.get("queued"))
+        if start is None or "shown" not in self.marks:
+            return None
+        return self.marks["shown"] - start
+
+
+class PunchTracer:
+    """Records finished traces, checks them against a budget and exports them"""
+
+    def __init__(self, budget=0.1, path=None, history=256):
+        self.budget = budget
+        self.path = path
+        self.recent = collections.deque(maxlen=history)
+        self.over_budget = 0
+        self._lock = threading.Lock()
+
+    def finish(self, punch_id, trace, outcome="shown"):
+        """Record a trace; outcome is "shown" or why the punch never reached the screen"""
+        stages = trace.stages()
+        total = trace.total() if outcome == "shown" else None
+        if outcome == "shown":
+            for stage, seconds in stages.items():
+                metrics.observe("punch_stage_seconds", seconds, stage=stage)
+            if total is not None:
+                metrics.observe("punch_latency_seconds", total)
+        else:
+            metrics.inc("punches_unscored_total", reason=outcome)
+
+        if total is not None and self.budget and total > self.budget:
+            self.over_budget += 1
+            metrics.inc("punch_budget_exceeded_total")
+            slowest = max(stages, key=stages.get)
+            print(f"Punch {punch_id} took {total * 1000:.0f} ms (budget {self.budget * 1000:.0f} ms); "
+                  f"slowest stage: {slowest} {stages[slowest] * 1000:.0f} ms")
+
+        record = {"id": punch_id, "outcome": outcome, "at": time.time(),
+                  "total_ms": round(total * 1000, 3) if total is not None else None,
+                  "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in stages.items()}}
+        with self._lock:
+            if outcome == "shown":
+                self.recent.append(record)
+            if self.path:
+                try:
+                    with open(self.path, 'a') as file:
+                        file.write(json.dumps(record) + "\n")
+                except OSError as e:
+                    print(f"Could not write punch trace to {self.path}: {e}")
+                    self.path = None
+
+    def summary(self):
+        """p50/p95 per stage and for the total over the recent shown punches, in ms"""
+        with self._lock:
+            records = list(self.recent)
+        columns = collections.defaultdict(list)
+        for record in records:
+            for stage, ms in record["stages_ms"].items():
+                columns[stage].append(ms)
+            if record["total_ms"] is not None:
+                columns["total"].append(record["total_ms"])
+        return {name: (percentile(values, 0.5), percentile(values, 0.95), max(values))
+                for name, values in columns.items()}
+
+    def report(self):
+        summary = self.summary()
+        if not summary:
+            return "Punch latency: no punches shown"
+        lines = [f"Punch latency over the last {len(self.recent)} punches "
+                 f"(budget {self.budget * 1000:.0f} ms, {self.over_budget} over):",
+                 f"  {'stage':<8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+        for name in [stage for stage, _, _ in STAGES] + ["total"]:
+            if name in summary:
+                p50, p95, worst = summary[name]
+                lines.append(f"  {name:<8} {p50:>8.1f} {p95:>8.1f} {worst:>8.1f}")
+        return "\n".join(lines)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
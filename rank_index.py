@@ -0,0 +1,107 @@
+"""
+In-memory rank index over every fighter's best score.
+
+A Fenwick (binary indexed) tree counts players per integer score over the
+sensor's 0-1023 range, so "how many fighters beat this score" is a prefix sum:
+rank lookups and updates are O(log 1024) no matter how many players there
+are. The index is seeded once from the local store (off the render thread)
+and updated on every new score, whether it was punched here or merged from
+another kiosk.
+"""
+import math
+import threading
+
+MAX_SCORE = 1023
+
+
+class RankIndex:
+    def __init__(self, max_score=MAX_SCORE):
+        self.max_score = max_score
+        self._tree = [0] * (max_score + 2)  # 1-based; slot i + 1 counts score i
+        self._best = {}  # username -> best score (as indexed)
+        self._lock = threading.Lock()
+
+    def seed(self, bests):
+        """
+        Load (username, best score) pairs, e.g. from a background thread at
+        startup; scores recorded with update() in the meantime are kept.
+        """
+        best = {}
+        for username, score in bests:
+            slot = self._slot(score)
+            if slot > best.get(username, -1):
+                best[username] = slot
+        with self._lock:
+            for username, slot in self._best.items():
+                if slot > best.get(username, -1):
+                    best[username] = slot
+            # Linear-time Fenwick build from the per-score counts
+            tree = [0] * (self.max_score + 2)
+            for slot in best.values():
+                tree[slot + 1] += 1
+            for i in range(1, len(tree)):
+                parent = i + (i & -i)
+                if parent < len(tree):
+                    tree[parent] += tree[i]
+            self._tree = tree
+            self._best = best
+
+    def update(self, username, score):
+        """Record a new score; returns True if it is the player's new best"""
+        with self._lock:
+            return self._update(username, score)
+
+    def update_many(self, scores):
+        with self._lock:
+            for username, score in scores:
+                self._update(username, score)
+
+    def players(self):
+        return len(self._best)
+
+    def best(self, username):
+        return self._best.get(username)
+
+    def rank(self, score):
+        """1 + the number of players whose best is higher than score (ties share a rank)"""
+        with self._lock:
+            return 1 + len(self._best) - self._prefix(self._slot(score))
+
+    def standing(self, username):
+        """(rank, players, top percent) for a player's best, or None if they have no score"""
+        with self._lock:
+            best = self._best.get(username)
+            if best is None:
+                return None
+            players = len(self._best)
+            rank = 1 + players - self._prefix(best)
+        return rank, players, max(1, math.ceil(rank * 100 / players))
+
+    def _slot(self, score):
+        return min(self.max_score, max(0, int(score)))
+
+    def _update(self, username, score):
+        slot = self._slot(score)
+        previous = self._best.get(username)
+        if previous is not None and previous >= slot:
+            return False
+        if previous is not None:
+            self._add(previous, -1)
+        self._add(slot, 1)
+        self._best[username] = slot
+        return True
+
+    def _add(self, slot, delta):
+        i = slot + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, slot):
+        """Players whose best is at most slot"""
+        total = 0
+        i = slot + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
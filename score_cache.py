@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReadCache:
+    """
+    Small TTL + LRU cache for database reads.
+
+    Entries that have expired keep their last value and are served stale
+    while a background thread refreshes them, so a redraw only ever waits on
+    a load for a key it has never seen before. Invalidated entries are
+    dropped and reloaded by the next get() for them, so a write costs no
+    threads and only the keys still being read are loaded again.
+    """
+
+    def __init__(self, ttl=30.0, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> [value, loaded_at, stale]
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped on invalidate to discard in-flight loads
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value, loaded_at, stale = entry
+                if not stale and now - loaded_at < self.ttl:
+                    self.hits += 1
+                    return value
+                self.stale_hits += 1
+                self._start_refresh(key, loader)
+                return value
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        self._put(key, value, generation)
+        return value
+
+    def _start_refresh(self, key, loader):
+        # Caller holds self._lock
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+
+    def _refresh(self, key, loader):
+        with self._lock:
+            generation = self._generation
+        try:
+            value = loader()
+            self._put(key, value, generation)
+        except Exception as e:
+            print(f"Cache refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _put(self, key, value, generation):
+        with self._lock:
+            # A write landed while we were loading, so this value may predate it
+            stale = generation != self._generation
+            self._entries[key] = [value, time.time(), stale]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=None):
+        """Drop one key (or every key); the next get() for it loads it again"""
+        with self._lock:
+            # Loads already in flight started before the write and come back stale
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current hit rate"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
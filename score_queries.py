@@ -0,0 +1,17 @@
+"""
+Indexes on the shared MongoDB scores collection.
+
+The game reads scores from its local store (score_store.py) and only syncs
+with MongoDB, so its own queries need just the synced_at index. The score
+indexes serve other readers of the collection, such as reports or a web
+leaderboard; benchmarks/bench_leaderboard_queries.py times those queries
+with and without them.
+"""
+from pymongo import ASCENDING, DESCENDING
+
+
+def ensure_indexes(collection):
+    """Create the sync index and the indexes leaderboard queries rely on"""
+    collection.create_index([("score", DESCENDING)], name="score_desc")
+    collection.create_index([("username", ASCENDING), ("score", DESCENDING)], name="username_score_desc")
+    collection.create_index([("synced_at", ASCENDING), ("_id", ASCENDING)], name="synced_at_id")
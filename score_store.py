@@ -0,0 +1,184 @@
+"""
+Embedded SQLite score store: the game's own copy of every score.
+
+All leaderboard and high-score reads are answered from here, so they never
+wait on the network. New scores are written here first and flagged unsynced
+until score_sync.py has pushed them to MongoDB; scores other kiosks stored
+in MongoDB are merged in the other direction.
+
+The database runs in WAL mode so the sync thread can write while the game
+reads. Each thread gets its own connection. Besides the scores table, a
+players table keeps each fighter's best score, so the best-per-player
+leaderboard is an index range scan rather than a GROUP BY over every score.
+The window_bests table does the same per leaderboard window and period
+(today, this week, an event; see leaderboard_windows.py), updated on insert.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id        TEXT PRIMARY KEY,       -- ObjectId hex, shared with MongoDB
+    username  TEXT NOT NULL,
+    score     REAL NOT NULL,
+    timestamp TEXT NOT NULL,          -- ISO 8601, local time
+    synced    INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS scores_score ON scores (score DESC);
+CREATE INDEX IF NOT EXISTS scores_username_score ON scores (username, score DESC);
+CREATE INDEX IF NOT EXISTS scores_unsynced ON scores (synced) WHERE synced = 0;
+CREATE INDEX IF NOT EXISTS scores_timestamp ON scores (timestamp);
+
+CREATE TABLE IF NOT EXISTS players (
+    username TEXT PRIMARY KEY,
+    best     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_best ON players (best DESC);
+
+CREATE TABLE IF NOT EXISTS window_bests (
+    window   TEXT NOT NULL,
+    period   TEXT NOT NULL,
+    username TEXT NOT NULL,
+    best     REAL NOT NULL,
+    PRIMARY KEY (window, period, username)
+);
+CREATE INDEX IF NOT EXISTS window_bests_rank ON window_bests (window, period, best DESC);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPDATE_BEST = """
+INSERT INTO players (username, best) VALUES (?, ?)
+ON CONFLICT (username) DO UPDATE SET best = max(best, excluded.best)
+"""
+
+UPDATE_WINDOW_BEST = """
+INSERT INTO window_bests (window, period, username, best) VALUES (?, ?, ?, ?)
+ON CONFLICT (window, period, username) DO UPDATE SET best = max(best, excluded.best)
+"""
+
+
+class ScoreStore:
+    def __init__(self, path='scores.db', windows=None):
+        self.path = path
+        self.windows = windows  # LeaderboardWindows whose rollups are kept up to date
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only syncs at checkpoints: a power cut can lose
+            # the last moments of play but never corrupts the database
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    # Writes
+    def add(self, score_id, username, score, timestamp, synced=False):
+        """Store one score; returns False if a score with this id is already stored"""
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO scores (id, username, score, timestamp, synced) VALUES (?, ?, ?, ?, ?)",
+                (score_id, username, score, timestamp.isoformat(), int(synced)))
+            if cursor.rowcount:
+                self._update_bests(connection, username, score, timestamp)
+        return cursor.rowcount == 1
+
+    def merge(self, rows):
+        """Add (id, username, score, timestamp) rows that are already in MongoDB; returns the new ones"""
+        added = []
+        with self._connection() as connection:
+            for score_id, username, score, timestamp in rows:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO scores (id, username, score, timestamp, synced) VALUES (?, ?, ?, ?, 1)",
+                    (score_id, username, score, timestamp.isoformat()))
+                if cursor.rowcount:
+                    self._update_bests(connection, username, score, timestamp)
+                    added.append((score_id, username, score, timestamp))
+        return added
+
+    def _update_bests(self, connection, username, score, timestamp):
+        connection.execute(UPDATE_BEST, (username, score))
+        if self.windows is not None:
+            for window, period in self.windows.periods(timestamp):
+                connection.execute(UPDATE_WINDOW_BEST, (window, period, username, score))
+
+    def rebuild_window(self, period):
+        """
+        Recompute one window period's rollup from the scores in its time range
+        and drop the window's other periods (scores stored before the window
+        existed, or before an event's dates changed, are counted again).
+        """
+        start = period.start.isoformat() if period.start else ""
+        end = period.end.isoformat() if period.end else "9999"
+        with self._connection() as connection:
+            connection.execute("DELETE FROM window_bests WHERE window = ?", (period.window,))
+            connection.execute(
+                "INSERT INTO window_bests (window, period, username, best) "
+                "SELECT ?, ?, username, max(score) FROM scores "
+                "WHERE timestamp >= ? AND timestamp < ? GROUP BY username",
+                (period.window, period.key, start, end))
+
+    def unsynced(self, limit=50):
+        """Oldest scores not yet pushed to MongoDB, as (id, username, score, timestamp)"""
+        rows = self._connection().execute(
+            "SELECT id, username, score, timestamp FROM scores WHERE synced = 0 ORDER BY rowid LIMIT ?",
+            (limit,)).fetchall()
+        return [(score_id, username, score, datetime.fromisoformat(timestamp))
+                for score_id, username, score, timestamp in rows]
+
+    def mark_synced(self, ids):
+        with self._connection() as connection:
+            connection.executemany("UPDATE scores SET synced = 1 WHERE id = ?", [(i,) for i in ids])
+
+    def get_state(self, key, default=None):
+        row = self._connection().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    # Reads (the same shapes score_queries returns from MongoDB)
+    def top_scores(self, limit=10):
+        rows = self._connection().execute(
+            "SELECT username, score FROM scores ORDER BY score DESC LIMIT ?", (limit,)).fetchall()
+        return [{"username": username, "score": score} for username, score in rows]
+
+    def best_per_player(self, limit=10):
+        rows = self._connection().execute(
+            "SELECT username, best FROM players ORDER BY best DESC LIMIT ?", (limit,)).fetchall()
+        return [{"username": username, "score": score} for username, score in rows]
+
+    def window_leaderboard(self, window, period, limit=10):
+        """Best score per player within one window period, highest first"""
+        rows = self._connection().execute(
+            "SELECT username, best FROM window_bests WHERE window = ? AND period = ? ORDER BY best DESC LIMIT ?",
+            (window, period, limit)).fetchall()
+        return [{"username": username, "score": score} for username, score in rows]
+
+    def user_best(self, username):
+        row = self._connection().execute("SELECT best FROM players WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else 0
+
+    def overall_best(self):
+        row = self._connection().execute("SELECT max(score) FROM scores").fetchone()
+        return row[0] or 0
+
+    def player_bests(self):
+        """(username, best score) for every player"""
+        return self._connection().execute("SELECT username, best FROM players").fetchall()
+
+    def count(self):
+        return self._connection().execute("SELECT count(*) FROM scores").fetchone()[0]
+
+    def unsynced_count(self):
+        return self._connection().execute("SELECT count(*) FROM scores WHERE synced = 0").fetchone()[0]
@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import metrics
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ScoreSync:
+    """
+    Background reconciliation between the local score store and MongoDB.
+
+    Push: scores the game stored locally are upserted into MongoDB in
+    batches under their local ids, so a retried batch that partly landed
+    changes nothing. Each push stamps synced_at with the server's clock.
+    Pull: scores other kiosks pushed are fetched in synced_at order and
+    merged into the local store, re-reading `pull_overlap` seconds before
+    the newest synced_at seen to cover pushes still in flight. The marker
+    is the time a score reached MongoDB, not when it was punched (its _id),
+    so scores a kiosk pushes hours late after an outage are still pulled.
+    The very first pull reads every score by _id instead. Deletions are not
+    propagated.
+    With a circuit breaker, syncs are skipped while it is open and every
+    push/pull result is reported to it.
+    """
+
+    def __init__(self, store, get_collection, batch_size=50, interval=10.0, retry_interval=5.0,
+                 pull_overlap=600.0, page_size=1000, on_change=None, breaker=None):
+        self.store = store
+        self.get_collection = get_collection
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.pull_overlap = pull_overlap
+        self.page_size = page_size
+        self.on_change = on_change  # called with the (id, username, score, timestamp) rows a pull added
+        self.breaker = breaker
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._next_attempt = 0
+        self.pushed = 0
+        self.pulled = 0
+        self.last_sync = None  # time.time() of the last complete push and pull
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="score-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Push what is pending (if MongoDB is reachable) and stop the worker"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def wake(self):
+        """Sync now, e.g. after a new score or a new connection (any thread)"""
+        self._wake.set()
+
+    def pending(self):
+        return self.store.unsynced_count()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if time.time() >= self._next_attempt:
+                self.sync()
+        if self.breaker is None or self.breaker.allow():
+            self.push()
+
+    def sync(self):
+        if self.breaker is not None and not self.breaker.allow():
+            return
+        if self.get_collection() is None:
+            return
+        if self.push() and self.pull():
+            self.last_sync = time.time()
+            if self.breaker is not None:
+                self.breaker.record_success()
+
+    def push(self):
+        """Upsert every unsynced score; returns False if MongoDB failed"""
+        collection = self.get_collection()
+        if collection is None:
+            return False
+        while True:
+            rows = self.store.unsynced(self.batch_size)
+            if not rows:
+                return True
+            ops = [UpdateOne({"_id": ObjectId(score_id)},
+                             {"$setOnInsert": {"username": username, "score": score, "timestamp": timestamp},
+                              "$currentDate": {"synced_at": True}},
+                             upsert=True)
+                   for score_id, username, score, timestamp in rows]
+            try:
+                with metrics.timed("db_call_seconds", call="push"):
+                    collection.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # Two upserts of the same id racing; the document is there either way
+                errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != DUPLICATE_KEY_ERROR for err in errors):
+                    return self._failed("pushing scores", e)
+            except Exception as e:
+                return self._failed("pushing scores", e)
+            self.store.mark_synced([row[0] for row in rows])
+            self.pushed += len(rows)
+            print(f"Synced {len(rows)} score(s) to MongoDB")
+
+    def pull(self):
+        """Merge scores pushed by other kiosks; returns False if MongoDB failed"""
+        collection = self.get_collection()
+        if collection is None:
+            return False
+        mark = self.store.get_state("pulled_synced_at")
+        added = []
+        try:
+            if mark is None:
+                # Take the marker before the full read, so scores pushed meanwhile are pulled next time
+                latest = collection.find_one({"synced_at": {"$exists": True}}, {"synced_at": 1},
+                                             sort=[("synced_at", -1)])
+                self._pull_pages(collection, {}, [("_id", 1)],
+                                 lambda doc: {"_id": {"$gt": doc["_id"]}}, added)
+                mark = latest["synced_at"] if latest else datetime(1970, 1, 1)
+            else:
+                mark = datetime.fromisoformat(mark)
+                query = {"synced_at": {"$gte": mark - timedelta(seconds=self.pull_overlap)}}
+                last = self._pull_pages(
+                    collection, query, [("synced_at", 1), ("_id", 1)],
+                    lambda doc: {"$or": [{"synced_at": {"$gt": doc["synced_at"]}},
+                                         {"synced_at": doc["synced_at"], "_id": {"$gt": doc["_id"]}}]},
+                    added)
+                if last is not None:
+                    mark = max(mark, last["synced_at"])
+        except Exception as e:
+            return self._failed("pulling scores", e)
+        finally:
+            if added:
+                self.pulled += len(added)
+                print(f"Merged {len(added)} score(s) from MongoDB")
+                if self.on_change:
+                    self.on_change(added)
+
+        self.store.set_state("pulled_synced_at", mark.isoformat())
+        return True
+
+    def _pull_pages(self, collection, query, sort, after, added):
+        """Merge every document matching query, page by page; returns the last one read"""
+        last = None
+        while True:
+            with metrics.timed("db_call_seconds", call="pull"):
+                docs = list(collection.find(query, {"username": 1, "score": 1, "timestamp": 1, "synced_at": 1})
+                            .sort(sort).limit(self.page_size))
+            rows = [(str(doc["_id"]), doc["username"], doc["score"], doc["timestamp"])
+                    for doc in docs if {"username", "score", "timestamp"} <= doc.keys()]
+            added += self.store.merge(rows)
+            if docs:
+                last = docs[-1]
+            if len(docs) < self.page_size:
+                return last
+            query = after(last)
+
+    def _failed(self, action, error):
+        print(f"Error {action}: {error}")
+        self._next_attempt = time.time() + self.retry_interval
+        if self.breaker is not None:
+            self.breaker.record_failure(error)
+        return False
+
+
+def import_spool(store, path):
+    """Move scores left in the old write-behind spool file into the store"""
+    if not path or not os.path.exists(path):
+        return 0
+    imported = 0
+    with open(path, 'r') as spool:
+        for line in spool:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                imported += store.add(record["_id"], record["username"], record["score"],
+                                      datetime.fromisoformat(record["timestamp"]))
+            except (ValueError, KeyError) as e:
+                print(f"Skipping corrupt spool entry: {e}")
+    os.remove(path)
+    print(f"Imported {imported} spooled score(s) into the local store")
+    return imported
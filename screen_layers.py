@@ -0,0 +1,78 @@
+import pygame
+
+
+class Compositor:
+    """
+    Retained layers for the idle screens plus dirty-rect tracking.
+
+    A screen builds its static parts into cached layer surfaces (rebuilt only
+    when their key changes) and registers each dynamic widget as a region
+    with a key describing what it shows. Only regions whose key or position
+    changed since the last frame are redrawn and pushed to the display.
+
+    With a viewport the screen is a subsurface of the window at that rect:
+    a full redraw updates only the viewport and dirty rects are shifted into
+    window coordinates.
+    """
+
+    def __init__(self, viewport=None):
+        self.viewport = pygame.Rect(viewport) if viewport is not None else None
+        self.layout = None
+        self.full_redraw = True
+        self.dirty = []
+        self._layers = {}   # name -> (key, surface)
+        self._regions = {}  # name -> (key, rect)
+
+    def begin(self, layout):
+        """Start a frame; returns True when the whole screen must be repainted"""
+        self.dirty = []
+        self.full_redraw = layout != self.layout
+        if self.full_redraw:
+            self.layout = layout
+            self._regions.clear()
+        return self.full_redraw
+
+    def layer(self, name, key, size, draw):
+        """Return the cached layer surface, calling draw(surface) when key changed"""
+        cached = self._layers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        surface = pygame.Surface(size)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        draw(surface)
+        self._layers[name] = (key, surface)
+        return surface
+
+    def region_changed(self, name, rect, key):
+        """Record a widget's key; returns True (and marks it dirty) if it must be redrawn"""
+        rect = pygame.Rect(rect)
+        previous = self._regions.get(name)
+        self._regions[name] = (key, rect)
+        if self.full_redraw:
+            return True
+        if previous is not None and previous[0] == key and previous[1] == rect:
+            return False
+        self.dirty.append(rect if previous is None else rect.union(previous[1]))
+        return True
+
+    def present(self):
+        """Push the frame: everything after a layout change, otherwise just the dirty rects"""
+        if self.viewport is not None:
+            if self.full_redraw:
+                pygame.display.update(self.viewport)
+            elif self.dirty:
+                pygame.display.update([rect.move(self.viewport.topleft) for rect in self.dirty])
+        elif self.full_redraw:
+            pygame.display.flip()
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+
+    def invalidate(self):
+        """Force a full repaint next frame (another screen drew over ours)"""
+        self.layout = None
+
+    def clear(self):
+        self.layout = None
+        self._layers.clear()
+        self._regions.clear()
@@ -0,0 +1,68 @@
+"""
+Capture file format for raw Arduino serial streams.
+
+    PPCAP1\\n
+    {"protocol": "binary", "baud": 250000, ...}\\n       metadata, one JSON line
+    records: <Q t_us><H length><length raw bytes>       repeated
+
+t_us is microseconds since the capture started, measured on the host when
+the chunk was read, so a replay can reproduce the original timing. The bytes
+are stored exactly as read, which keeps the format independent of the text or
+binary protocol.
+"""
+import json
+import struct
+import time
+
+MAGIC = b"PPCAP1\n"
+RECORD_HEADER = struct.Struct('<QH')
+MAX_CHUNK = 0xFFFF
+
+
+class CaptureWriter:
+    def __init__(self, path, meta):
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._file.write(json.dumps(meta).encode('utf-8') + b"\n")
+        self._start = time.perf_counter()
+        self.chunks = 0
+        self.bytes = 0
+
+    def write(self, data, t_us=None):
+        """Append a chunk; t_us defaults to the time since the capture started"""
+        if t_us is None:
+            t_us = int((time.perf_counter() - self._start) * 1_000_000)
+        for offset in range(0, len(data), MAX_CHUNK):
+            chunk = data[offset:offset + MAX_CHUNK]
+            self._file.write(RECORD_HEADER.pack(t_us, len(chunk)))
+            self._file.write(chunk)
+            self.chunks += 1
+            self.bytes += len(chunk)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_capture(path):
+    """Load a capture; returns (metadata dict, [(t_us, bytes), ...])"""
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Power Punch capture")
+        meta = json.loads(file.readline().decode('utf-8'))
+        data = file.read()
+
+    chunks = []
+    view = memoryview(data)
+    pos = 0
+    while pos + RECORD_HEADER.size <= len(data):
+        t_us, length = RECORD_HEADER.unpack_from(view, pos)
+        pos += RECORD_HEADER.size
+        chunks.append((t_us, bytes(view[pos:pos + length])))
+        pos += length
+    return meta, chunks
@@ -0,0 +1,59 @@
+"""
+Find the punching-bag Arduino among the serial ports.
+
+Ports are matched on USB vendor/product id, so the game no longer depends
+on the device name macOS or Linux happened to assign (/dev/cu.usbmodem1401,
+/dev/cu.usbmodem1301, /dev/ttyACM0, ...).
+"""
+import os
+
+from serial.tools import list_ports
+
+# Boards and USB-serial bridges the sketch is known to run on
+KNOWN_BOARDS = {
+    (0x2341, None): "Arduino",           # any Arduino LLC product id
+    (0x2A03, None): "Arduino (.org)",
+    (0x1A86, 0x7523): "CH340 clone",
+    (0x0403, 0x6001): "FTDI FT232",
+    (0x10C4, 0xEA60): "CP210x",
+}
+
+
+def parse_vid_pid_list(text):
+    """Parse "2341:0043,1a86:7523" (pid may be "*") into {(vid, pid): label}"""
+    boards = {}
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        vid, _, pid = item.partition(":")
+        boards[(int(vid, 16), None if pid in ("", "*") else int(pid, 16))] = item
+    return boards
+
+
+def board_matchers():
+    override = os.getenv('SERIAL_VID_PID')
+    return parse_vid_pid_list(override) if override else KNOWN_BOARDS
+
+
+def matches_board(port_info, boards):
+    if port_info.vid is None:
+        return None
+    return boards.get((port_info.vid, port_info.pid)) or boards.get((port_info.vid, None))
+
+
+def candidate_ports(preferred=None):
+    """
+    Ports worth trying, best first: the configured port (if it exists), then
+    every port whose VID/PID matches a known board. Returns (device, label) pairs.
+    """
+    boards = board_matchers()
+    candidates = []
+    if preferred and os.path.exists(preferred):
+        candidates.append((preferred, "configured"))
+
+    for port_info in sorted(list_ports.comports(), key=lambda p: p.device):
+        label = matches_board(port_info, boards)
+        if label and port_info.device != preferred:
+            candidates.append((port_info.device, label))
+    return candidates
@@ -0,0 +1,155 @@
+"""
+Host side of the boxing.ino serial protocol.
+
+Binary frames (little endian, 10 bytes):
+
+    offset  size  field
+    0       1     sync byte 0xA5
+    1       1     sequence number (wraps at 256)
+    2       4     timestamp, microseconds since the board booted (wraps)
+    6       3     two 10-bit channels: fsr1 in bits 0-9, fsr2 in bits 10-19
+    9       1     CRC-8 (poly 0x07, init 0x00) over bytes 1-8
+
+The board starts in the legacy text mode ("FSR 1: 500, FSR 2: 600, ...")
+and only switches to binary frames after the host sends HANDSHAKE_REQUEST
+and it answers with HANDSHAKE_ACK, so old firmware keeps working. The board
+acknowledges every HANDSHAKE_REQUEST, also when it is already streaming
+frames, and TEXT_REQUEST switches it back to text.
+"""
+import struct
+import time
+from collections import namedtuple
+
+SYNC_BYTE = 0xA5
+FRAME_SIZE = 10
+FRAME_STRUCT = struct.Struct('<BBIBBBB')
+
+BINARY_BAUD = 250000  # exact divisor on 16 MHz AVR boards
+HANDSHAKE_REQUEST = b'B'
+HANDSHAKE_ACK = b'PPBIN1'
+TEXT_REQUEST = b'T'
+
+Sample = namedtuple('Sample', ['seq', 'timestamp_us', 'fsr1', 'fsr2'])
+
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_frame(seq, timestamp_us, fsr1, fsr2):
+    """Build one binary frame, byte-for-byte what boxing.ino sends"""
+    body = struct.pack('<BIBBB', seq & 0xFF, timestamp_us & 0xFFFFFFFF,
+                       fsr1 & 0xFF,
+                       ((fsr1 >> 8) & 0x03) | ((fsr2 & 0x3F) << 2),
+                       (fsr2 >> 6) & 0x0F)
+    return bytes([SYNC_BYTE]) + body + bytes([crc8(body)])
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for the binary stream.
+
+    feed() takes whatever a bulk ser.read() returned and yields every complete
+    frame in it; partial frames are kept for the next call. Corrupt frames are
+    skipped by resynchronising on the next sync byte.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._last_seq = None
+        self.frames = 0
+        self.crc_errors = 0
+        self.dropped = 0
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer.extend(data)
+        samples = []
+        view = memoryview(buffer)
+        pos = 0
+        end = len(buffer)
+        try:
+            while end - pos >= FRAME_SIZE:
+                if buffer[pos] != SYNC_BYTE:
+                    pos = buffer.find(SYNC_BYTE, pos + 1)
+                    if pos < 0:
+                        pos = end
+                    continue
+                _, seq, timestamp_us, b0, b1, b2, crc = FRAME_STRUCT.unpack_from(view, pos)
+                if crc8(view[pos + 1:pos + FRAME_SIZE - 1]) != crc:
+                    self.crc_errors += 1
+                    pos += 1
+                    continue
+                fsr1 = b0 | ((b1 & 0x03) << 8)
+                fsr2 = (b1 >> 2) | ((b2 & 0x0F) << 6)
+                if self._last_seq is not None:
+                    self.dropped += (seq - self._last_seq - 1) & 0xFF
+                self._last_seq = seq
+                samples.append(Sample(seq, timestamp_us, fsr1, fsr2))
+                pos += FRAME_SIZE
+        finally:
+            view.release()
+        del buffer[:pos]
+        self.frames += len(samples)
+        return samples
+
+    def stats(self):
+        return {"frames": self.frames, "crc_errors": self.crc_errors, "dropped": self.dropped}
+
+
+def parse_text_line(line):
+    """Parse a legacy "FSR 1: x, FSR 2: y, ..." line into (fsr1, fsr2), or None"""
+    parts = line.split(",")
+    if len(parts) != 3:
+        return None
+    try:
+        return int(parts[0].split(": ")[1]), int(parts[1].split(": ")[1])
+    except (ValueError, IndexError):
+        return None
+
+
+def negotiate_binary(ser, timeout=3.0, interval=0.25):
+    """
+    Ask the board to switch to binary frames.
+
+    Opening the port resets most Arduinos, so the request is repeated until
+    the ACK arrives or timeout passes. Returns True if the board acknowledged;
+    False means it is running firmware that only speaks the text format.
+    """
+    deadline = time.time() + timeout
+    received = bytearray()
+    previous_timeout = ser.timeout
+    ser.timeout = interval
+    try:
+        while time.time() < deadline:
+            ser.write(HANDSHAKE_REQUEST)
+            ser.flush()
+            received.extend(ser.read(max(1, ser.in_waiting)))
+            ack_at = received.find(HANDSHAKE_ACK)
+            if ack_at >= 0:
+                # Discard the rest of the ACK line; frames follow it
+                newline = received.find(b"\n", ack_at)
+                if newline < 0:
+                    ser.read_until(b"\n")
+                return True
+            # Keep just enough to spot an ACK split across reads
+            del received[:-len(HANDSHAKE_ACK)]
+        return False
+    finally:
+        ser.timeout = previous_timeout
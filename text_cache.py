@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+import pygame
+
+_fonts = {}
+
+
+def get_font(size, name=None):
+    """Return the shared Font for (name, size), loading it on first use"""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, color, antialias)"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        with self._lock:
+            surface = self._surfaces.get(key)
+            if surface is not None:
+                self._surfaces.move_to_end(key)
+                self.hits += 1
+                return surface
+            self.misses += 1
+
+        surface = font.render(text, antialias, color)
+        with self._lock:
+            self._surfaces[key] = surface
+            while len(self._surfaces) > self.max_entries:
+                self._surfaces.popitem(last=False)
+                self.evictions += 1
+        return surface
+
+    def clear(self):
+        with self._lock:
+            self._surfaces.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._surfaces),
+                "fonts": len(_fonts),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    """Render text through the shared cache (treat the result as read-only)"""
+    return text_cache.render(font, text, color, antialias)
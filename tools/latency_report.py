@@ -0,0 +1,80 @@
+"""
+Summarise punch latency traces written by the game (PUNCH_TRACE_FILE).
+
+    PUNCH_TRACE_FILE=punch_traces.jsonl python boxing.py
+    python tools/latency_report.py punch_traces.jsonl
+    python tools/latency_report.py punch_traces.jsonl --budget-ms 80 --worst 10
+
+Prints p50/p95/p99/max per pipeline stage (sensor, decode, wake, score,
+render) and for the whole peak-to-screen latency, each stage's share of the
+mean total, how many punches met the budget, the slowest punches with their
+breakdown, and why the punches that never reached the screen were dropped.
+Exits with status 1 when the p95 total is over budget.
+"""
+import argparse
+import collections
+import json
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from punch_trace import STAGES, percentile
+
+
+def load(path):
+    records = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # a line cut short by a crash
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace_file")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv('PUNCH_LATENCY_BUDGET_MS', '100')))
+    parser.add_argument("--worst", type=int, default=5, help="slowest punches to list")
+    args = parser.parse_args()
+
+    records = load(args.trace_file)
+    shown = [record for record in records if record["outcome"] == "shown" and record["total_ms"] is not None]
+    outcomes = collections.Counter(record["outcome"] for record in records)
+    print(f"{len(records)} punches traced: " + ", ".join(f"{count} {outcome}" for outcome, count in outcomes.items()))
+    if not shown:
+        return
+
+    totals = [record["total_ms"] for record in shown]
+    mean_total = statistics.mean(totals)
+    print(f"\n{'stage':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'share':>6}")
+    for stage, _, _ in STAGES:
+        values = [record["stages_ms"][stage] for record in shown if stage in record["stages_ms"]]
+        if values:
+            share = statistics.mean(values) * len(values) / len(shown) / mean_total if mean_total else 0
+            print(f"{stage:<8} {percentile(values, 0.5):>8.1f} {percentile(values, 0.95):>8.1f} "
+                  f"{percentile(values, 0.99):>8.1f} {max(values):>8.1f} {share:>6.0%}")
+    print(f"{'total':<8} {percentile(totals, 0.5):>8.1f} {percentile(totals, 0.95):>8.1f} "
+          f"{percentile(totals, 0.99):>8.1f} {max(totals):>8.1f}")
+
+    within = sum(1 for total in totals if total <= args.budget_ms)
+    print(f"\n{within}/{len(totals)} punches ({within / len(totals):.0%}) on screen within {args.budget_ms:.0f} ms")
+
+    print(f"\nSlowest {min(args.worst, len(shown))}:")
+    for record in sorted(shown, key=lambda record: -record["total_ms"])[:args.worst]:
+        breakdown = "  ".join(f"{stage} {ms:.1f}" for stage, ms in record["stages_ms"].items())
+        print(f"  punch {record['id']:>5}  {record['total_ms']:7.1f} ms   {breakdown}")
+
+    if percentile(totals, 0.95) > args.budget_ms:
+        print(f"\np95 latency {percentile(totals, 0.95):.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Record the raw Arduino sensor stream to a capture file.
+
+    python tools/record_serial.py punches.ppcap                       # until Ctrl-C
+    python tools/record_serial.py punches.ppcap --duration 60 --protocol text
+    python tools/record_serial.py synthetic.ppcap --synthetic 50      # no board needed
+
+Captures keep host timestamps for every chunk so tools/replay_serial.py can
+play them back through a pseudo-terminal at the original speed.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from serial_capture import CaptureWriter
+from serial_protocol import BINARY_BAUD, TEXT_REQUEST, encode_frame, negotiate_binary
+
+
+def record(args):
+    import serial
+    from serial_discovery import candidate_ports
+
+    if args.port is None:
+        candidates = candidate_ports()
+        if not candidates:
+            sys.exit("No Arduino found; pass --port")
+        args.port = candidates[0][0]
+    ser = serial.Serial(args.port, args.baud, timeout=0.05)
+    protocol = "text"
+    if args.protocol != "text" and negotiate_binary(ser):
+        protocol = "binary"
+    elif args.protocol == "binary":
+        sys.exit("Board did not acknowledge the binary protocol")
+    else:
+        # A board left streaming frames by an earlier session must switch back
+        ser.write(TEXT_REQUEST)
+        ser.flush()
+
+    meta = {"protocol": protocol, "baud": args.baud, "port": args.port,
+            "recorded_at": datetime.now().isoformat()}
+    print(f"Recording {protocol} stream from {args.port} to {args.output} (Ctrl-C to stop)")
+    deadline = time.time() + args.duration if args.duration else None
+    with CaptureWriter(args.output, meta) as writer:
+        try:
+            while deadline is None or time.time() < deadline:
+                data = ser.read(max(1, ser.in_waiting))
+                if data:
+                    writer.write(data)
+        except KeyboardInterrupt:
+            pass
+        print(f"Recorded {writer.bytes} bytes in {writer.chunks} chunks")
+    ser.close()
+
+
+def synthesize(args):
+    """Write a 1 kHz binary capture with random punches between idle noise"""
+    rng = random.Random(args.seed)
+    meta = {"protocol": "binary", "baud": BINARY_BAUD, "synthetic": True,
+            "punches": args.synthetic, "recorded_at": datetime.now().isoformat()}
+    chunk_samples = 32  # roughly what one bulk read returns at 250000 baud
+    sample_period_us = 1000
+    seq = 0
+    t_us = 0
+    peaks = []
+    with CaptureWriter(args.output, meta) as writer:
+        chunk = bytearray()
+        for _ in range(args.synthetic):
+            idle = rng.randint(1500, 4000)
+            peak = rng.uniform(400, 1023)
+            width = rng.uniform(15, 40)  # ms, half-width of the impact
+            peaks.append(round(peak))
+            for i in range(idle + int(width * 6)):
+                x = (i - idle - width * 3) / width
+                force = rng.gauss(15, 4) + peak * math.exp(-x * x * 4)
+                fsr1 = max(0, min(1023, int(force)))
+                fsr2 = max(0, min(1023, int(force * rng.uniform(0.85, 1.0))))
+                chunk += encode_frame(seq, t_us, fsr1, fsr2)
+                seq = (seq + 1) & 0xFF
+                t_us += sample_period_us
+                if len(chunk) >= chunk_samples * 10:
+                    writer.write(bytes(chunk), t_us)
+                    chunk.clear()
+        if chunk:
+            writer.write(bytes(chunk), t_us)
+        print(f"Wrote {args.synthetic} synthetic punches ({t_us / 1e6:.1f} s) to {args.output}")
+        print(f"Peaks: {peaks}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output")
+    parser.add_argument("--port", default=os.getenv('SERIAL_PORT'),
+                        help="serial device (default: first Arduino found by USB VID/PID)")
+    parser.add_argument("--baud", type=int, default=int(os.getenv('SERIAL_BAUD', str(BINARY_BAUD))))
+    parser.add_argument("--protocol", choices=["auto", "binary", "text"], default="auto")
+    parser.add_argument("--duration", type=float, help="seconds to record (default: until Ctrl-C)")
+    parser.add_argument("--synthetic", type=int, metavar="PUNCHES",
+                        help="generate a synthetic capture instead of reading a board")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        synthesize(args)
+    else:
+        record(args)
+
+
+if __name__ == "__main__":
+    main()
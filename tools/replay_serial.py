@@ -0,0 +1,161 @@
+"""
+Replay a capture as a virtual Arduino on a pseudo-terminal.
+
+    python tools/replay_serial.py punches.ppcap --link /tmp/ttyPUNCH
+    SERIAL_PORT=/tmp/ttyPUNCH python boxing.py                 # in another shell
+
+    python tools/replay_serial.py punches.ppcap --speed 10 --loop
+    python tools/replay_serial.py punches.ppcap --disconnect-every 20 --downtime 3
+
+The pty behaves like the board that made the capture: binary captures are
+only streamed after the host's handshake request (answered with the
+firmware's ACK); text captures stream straight away and never answer the
+handshake, like old text-only firmware, so the host falls back to text.
+Bytes nobody reads are dropped rather than queued.
+--disconnect-every tears the pty down and recreates it (re-pointing --link)
+to exercise the game's reconnect path.
+"""
+import argparse
+import os
+import select
+import sys
+import time
+import tty
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from serial_capture import read_capture
+from serial_protocol import HANDSHAKE_ACK, HANDSHAKE_REQUEST, TEXT_REQUEST
+
+
+class VirtualArduino:
+    def __init__(self, link=None, binary=True):
+        self.link = link
+        self.binary = binary  # False: text-only firmware, the handshake goes unanswered
+        self.master = None
+        self.slave = None
+        self.binary_mode = False
+
+    def plug_in(self):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.binary_mode = False
+        name = os.ttyname(self.slave)
+        if self.link:
+            if os.path.lexists(self.link):
+                os.remove(self.link)
+            os.symlink(name, self.link)
+            print(f"Virtual Arduino on {name} (linked from {self.link})")
+        else:
+            print(f"Virtual Arduino on {name}")
+
+    def unplug(self):
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self.slave = None
+        if self.link and os.path.lexists(self.link):
+            os.remove(self.link)
+        print("Virtual Arduino unplugged")
+
+    def poll(self, timeout):
+        """Wait up to timeout seconds for host commands and answer them like the firmware"""
+        readable, _, _ = select.select([self.master], [], [], max(0.0, timeout))
+        if not readable:
+            return
+        try:
+            commands = os.read(self.master, 1024)
+        except OSError:
+            return
+        if not self.binary:
+            return
+        if HANDSHAKE_REQUEST in commands:
+            self.send(HANDSHAKE_ACK + b"\r\n")
+            self.binary_mode = True
+        if TEXT_REQUEST in commands:
+            self.binary_mode = False
+
+    def send(self, data):
+        """Write to the host; returns False if the bytes were dropped"""
+        try:
+            os.write(self.master, data)
+            return True
+        except (BlockingIOError, OSError):
+            return False
+
+
+def replay(args):
+    meta, chunks = read_capture(args.capture)
+    if not chunks:
+        sys.exit("Capture is empty")
+    binary = meta.get("protocol") == "binary"
+    print(f"Loaded {len(chunks)} chunks ({meta.get('protocol')} protocol, "
+          f"{chunks[-1][0] / 1e6:.1f} s at 1x)")
+
+    board = VirtualArduino(args.link, binary)
+    board.plug_in()
+    plugged_at = time.perf_counter()
+    sent_bytes = dropped_bytes = 0
+
+    try:
+        while True:
+            # Binary firmware only streams after the handshake
+            while binary and not board.binary_mode:
+                board.poll(0.1)
+
+            start = time.perf_counter()
+            for t_us, data in chunks:
+                if args.speed > 0:
+                    due = start + t_us / 1e6 / args.speed
+                    while True:
+                        remaining = due - time.perf_counter()
+                        if remaining <= 0:
+                            break
+                        board.poll(remaining)
+                else:
+                    board.poll(0)
+
+                if board.send(data):
+                    sent_bytes += len(data)
+                else:
+                    dropped_bytes += len(data)
+
+                if args.disconnect_every and time.perf_counter() - plugged_at >= args.disconnect_every:
+                    unplugged_at = time.perf_counter()
+                    board.unplug()
+                    time.sleep(args.downtime)
+                    board.plug_in()
+                    while binary and not board.binary_mode:
+                        board.poll(0.1)
+                    # Resume at the recorded pace instead of bursting what was due while unplugged
+                    plugged_at = time.perf_counter()
+                    start += plugged_at - unplugged_at
+
+            elapsed = time.perf_counter() - start
+            print(f"Replayed capture in {elapsed:.2f} s ({sent_bytes} bytes sent, {dropped_bytes} dropped)")
+            if not args.loop:
+                break
+        # Give the host a moment to drain the last bytes
+        board.poll(args.linger)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        board.unplug()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture")
+    parser.add_argument("--link", help="create a symlink to the pty at this path (stable across reconnects)")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier, 0 = as fast as possible")
+    parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--disconnect-every", type=float, metavar="SECONDS",
+                        help="simulate unplugging the board this often")
+    parser.add_argument("--downtime", type=float, default=2.0, help="seconds the board stays unplugged")
+    parser.add_argument("--linger", type=float, default=1.0, help="seconds to keep the pty open after the last chunk")
+    replay(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
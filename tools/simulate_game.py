@@ -0,0 +1,232 @@
+"""
+Headless simulation: synthetic players and punches through the real game loop.
+
+    python tools/simulate_game.py --players 200                  # as fast as possible
+    python tools/simulate_game.py --players 50 --speed 10        # 10x real time
+    python tools/simulate_game.py --ramp 5,20,50,100 --step-seconds 10
+    BENCH_MONGODB_URI=mongodb://localhost:27017/ python tools/simulate_game.py --players 500 --drop
+
+Runs boxing.py's state machine on SDL's dummy video driver: every turn types
+the player's name, hands a punch to the punch channel (the same path the
+serial thread uses), plays the score animation and the result screen, and
+stores the score in the local store, which syncs it to MongoDB. Animation and result-screen
+durations are divided by --speed; --speed 0 removes every wait, which skips
+the count-up frames but still draws the flashes and the result screen.
+
+Scores go to a temporary local store. With BENCH_MONGODB_URI (or
+--mongodb-uri) they are also synced to the DATABASE_NAME database (default
+boxing_game_sim), never to the game's own.
+
+--ramp schedules player arrivals at each rate in turn. A step is saturated
+when the loop falls behind its schedule (rendering or scoring is the
+bottleneck) or when the unsynced backlog grows (MongoDB is the bottleneck).
+"""
+import argparse
+import contextlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from punch_detector import PunchEvent
+from punch_trace import percentile
+from text_cache import text_cache
+
+
+class Simulation:
+    def __init__(self, boxing, args):
+        self.boxing = boxing
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.names = [f"sim-{i:04d}" for i in range(args.players)]
+        self.stage_times = {"username": [], "punch": [], "result": []}
+        self.turns = 0
+        self.scored = 0
+        self.lost = 0
+        self.weak = 0
+        # The game prints a few lines per turn; keep them out of the measurement unless asked
+        self.output = sys.stdout if args.verbose else open(os.devnull, 'w')
+
+    def key(self, key, unicode=""):
+        pygame = self.boxing.pygame
+        self.boxing.handle_event(pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0, scancode=0))
+        self.boxing.update_frame()
+
+    def punch_event(self, peak):
+        fsr1 = int(min(1023, peak * self.rng.uniform(0.9, 1.1)))
+        return PunchEvent(peak, peak * 0.02, 0.015, 0.03, 0, 0, fsr1, int(min(1023, 2 * peak - fsr1)))
+
+    def turn(self, name):
+        with contextlib.redirect_stdout(self.output):
+            self.play_turn(name)
+
+    def play_turn(self, name):
+        """One player turn: name entry, a punch, the result screen"""
+        boxing = self.boxing
+        pygame = boxing.pygame
+        self.turns += 1
+
+        started = time.perf_counter()
+        for char in name:
+            self.key(getattr(pygame, f"K_{char}", pygame.K_MINUS), char)
+        self.key(pygame.K_RETURN, "\r")
+        self.stage_times["username"].append(time.perf_counter() - started)
+
+        # Impacts under the scoring threshold are detected but must be ignored
+        if self.rng.random() < self.args.weak_fraction:
+            boxing.punch_channel.put(self.punch_event(self.rng.uniform(boxing.minimum_threshold,
+                                                                       boxing.PUNCH_SCORE_THRESHOLD - 1)))
+            self.weak += 1
+        peak = max(boxing.PUNCH_SCORE_THRESHOLD, min(1023, self.rng.gauss(self.args.peak_mean, self.args.peak_sd)))
+
+        started = time.perf_counter()
+        boxing.punch_channel.put(self.punch_event(peak))
+        boxing.update_frame()  # scores the punch and draws the first animation frame
+        while boxing.current_state == "animating":
+            for event in boxing.wait_for_events():
+                boxing.handle_event(event)
+            boxing.update_frame()
+        self.stage_times["punch"].append(time.perf_counter() - started)
+        # Without waits the result screen may already have timed out, so only
+        # a punch left unconsumed on the main screen counts as lost
+        if boxing.current_state != "initial":
+            self.scored += 1
+        else:
+            self.lost += 1
+            print(f"Turn {self.turns}: punch for {name} not scored (state {boxing.current_state})",
+                  file=sys.__stdout__)
+
+        started = time.perf_counter()
+        if self.rng.random() < self.args.leave_early:
+            self.key(pygame.K_SPACE, " ")
+        while boxing.current_state == "punch_result":
+            boxing.update_frame()
+            if boxing.current_state == "punch_result":
+                time.sleep(0.001)
+        self.stage_times["result"].append(time.perf_counter() - started)
+
+    def run_players(self, count):
+        for _ in range(count):
+            self.turn(self.rng.choice(self.names))
+
+    def run_ramp(self, rates, step_seconds):
+        """Players arrive at each rate for step_seconds; report what was achieved"""
+        sync = self.boxing.score_sync
+        print(f"{'target/s':>9} {'achieved/s':>11} {'behind s':>9} {'turn p95 ms':>12} "
+              f"{'unsynced':>9} {'synced/s':>9}")
+        for rate in rates:
+            start = time.perf_counter()
+            synced_before = sync.pushed
+            turns_before = len(self.stage_times["punch"])
+            arrivals = 0
+            behind = 0.0
+            while time.perf_counter() - start < step_seconds:
+                due = start + arrivals / rate
+                now = time.perf_counter()
+                if now < due:
+                    time.sleep(due - now)
+                else:
+                    behind = max(behind, now - due)
+                turn_start = time.perf_counter()
+                self.turn(self.rng.choice(self.names))
+                self.stage_times.setdefault("turn", []).append(time.perf_counter() - turn_start)
+                arrivals += 1
+            elapsed = time.perf_counter() - start
+            turns = len(self.stage_times["punch"]) - turns_before
+            synced = sync.pushed - synced_before
+            turn_p95 = percentile(self.stage_times["turn"][-turns:], 0.95) * 1000 if turns else 0
+            print(f"{rate:>9g} {turns / elapsed:>11.1f} {behind:>9.2f} {turn_p95:>12.1f} "
+                  f"{sync.pending():>9} {synced / elapsed:>9.1f}")
+
+    def report(self, elapsed):
+        boxing = self.boxing
+        sync = boxing.score_sync
+        print(f"\n{self.turns} turns in {elapsed:.2f} s -> {self.turns / elapsed:.1f} turns/s "
+              f"({self.scored} scored, {self.lost} lost, {self.weak} weak punches ignored)")
+        for stage, times in self.stage_times.items():
+            if times:
+                print(f"  {stage:<9} p50 {statistics.median(times) * 1000:7.2f} ms   "
+                      f"p95 {percentile(times, 0.95) * 1000:7.2f} ms   max {max(times) * 1000:7.2f} ms")
+
+        # Sync throughput: how long MongoDB needs to catch up after the last punch
+        if boxing.scores_collection is not None:
+            drain_start = time.perf_counter()
+            while sync.pending() and time.perf_counter() - drain_start < 60:
+                time.sleep(0.01)
+            print(f"  sync: {sync.pushed} pushed, {sync.pending()} unsynced, "
+                  f"drained {(time.perf_counter() - drain_start) * 1000:.0f} ms after the last turn")
+        sync.stop()
+        print(f"  local store: {boxing.score_store.count()} scores")
+        print(f"  punch channel: {boxing.punch_channel.stats()}")
+        print("  " + boxing.punch_tracer.report().replace("\n", "\n  "))
+        print(f"  leaderboard cache: {boxing.score_cache.stats()}")
+        print(f"  text cache: {text_cache.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=100, help="turns to play (and size of the name pool)")
+    parser.add_argument("--speed", type=float, default=0.0, help="time multiplier, 0 = no waits at all")
+    parser.add_argument("--ramp", help="comma-separated player arrival rates per second")
+    parser.add_argument("--step-seconds", type=float, default=10.0, help="duration of each ramp step")
+    parser.add_argument("--peak-mean", type=float, default=800)
+    parser.add_argument("--peak-sd", type=float, default=120)
+    parser.add_argument("--weak-fraction", type=float, default=0.2,
+                        help="share of turns with an ignored sub-threshold impact first")
+    parser.add_argument("--leave-early", type=float, default=0.5,
+                        help="share of players who press a key instead of waiting out the result screen")
+    parser.add_argument("--size", default="1920x1080", help="virtual screen size")
+    parser.add_argument("--mongodb-uri", default=os.getenv('BENCH_MONGODB_URI'))
+    parser.add_argument("--database", default="boxing_game_sim")
+    parser.add_argument("--drop", action="store_true", help="drop the simulation's score collection first")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="show the game's own output")
+    args = parser.parse_args()
+
+    # Must be in place before boxing.py (and pygame) are imported
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    os.environ["DATABASE_NAME"] = args.database
+    os.environ["MONGODB_URI"] = args.mongodb_uri or ""
+    os.environ["SCORE_STORE_FILE"] = os.path.join(tempfile.mkdtemp(), "sim_scores.db")
+    os.environ["SCORE_SPOOL_FILE"] = ""
+    import boxing
+
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    boxing.screen = boxing.pygame.display.set_mode((width, height))
+    boxing.screen_width, boxing.screen_height = width, height
+
+    scale = 0.0 if args.speed <= 0 else 1.0 / args.speed
+    boxing.SCORE_COUNT_DURATION *= scale
+    boxing.FLASH_INTERVAL *= scale
+    boxing.update_screen_display_time *= scale
+    boxing.UPDATE_DELAY *= scale
+    boxing.TARGET_FPS = 1000 if args.speed <= 0 else boxing.TARGET_FPS
+
+    if args.mongodb_uri:
+        if args.drop:
+            # Before connecting, so the first sync doesn't pull the old scores
+            mongo_client, collection = boxing.open_mongodb(args.mongodb_uri)
+            collection.delete_many({})
+            mongo_client.close()
+        boxing.local_mongodb_uri = args.mongodb_uri
+        boxing.connect_mongodb()
+    else:
+        print(f"No database: scores are only stored in {os.environ['SCORE_STORE_FILE']}")
+
+    simulation = Simulation(boxing, args)
+    boxing.display_username_input()
+    start = time.perf_counter()
+    if args.ramp:
+        simulation.run_ramp([float(rate) for rate in args.ramp.split(",")], args.step_seconds)
+    else:
+        simulation.run_players(args.players)
+    simulation.report(time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
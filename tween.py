@@ -0,0 +1,91 @@
+"""
+Time-based tweens and timelines, advanced by the main loop.
+
+Nothing here sleeps or draws. The main loop calls Timeline.update() once per
+frame and draws from the values it reads back, so an animation plays at
+whatever rate frames are produced, takes the same wall time at 30 or 144
+FPS, and never keeps the loop from handling input, resizes or serial data.
+A timeline can be cancelled at any point.
+"""
+import time
+
+
+# Easing curves: progress 0..1 in, eased progress out
+def linear(t):
+    return t
+
+
+def ease_out_quad(t):
+    return 1 - (1 - t) ** 2
+
+
+def ease_out_cubic(t):
+    return 1 - (1 - t) ** 3
+
+
+def ease_in_out_cubic(t):
+    return 4 * t ** 3 if t < 0.5 else 1 - (-2 * t + 2) ** 3 / 2
+
+
+class Tween:
+    """A value going from start to end over duration seconds, after delay seconds"""
+
+    def __init__(self, start, end, duration, easing=linear, delay=0.0):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = easing
+        self.delay = delay
+
+    def progress(self, elapsed):
+        if self.duration <= 0:
+            return 1.0 if elapsed >= self.delay else 0.0
+        return min(1.0, max(0.0, (elapsed - self.delay) / self.duration))
+
+    def value(self, elapsed):
+        return self.start + (self.end - self.start) * self.easing(self.progress(elapsed))
+
+    def end_time(self):
+        return self.delay + self.duration
+
+
+class Timeline:
+    """Named tweens on one clock; finished once the last one ends or it is cancelled"""
+
+    def __init__(self):
+        self.tweens = {}
+        self.started_at = None
+        self.elapsed = 0.0
+        self.cancelled = False
+
+    def tween(self, name, start, end, duration, easing=linear, delay=0.0):
+        self.tweens[name] = Tween(start, end, duration, easing, delay)
+        return self
+
+    def duration(self):
+        return max((tween.end_time() for tween in self.tweens.values()), default=0.0)
+
+    def start(self, now=None):
+        self.started_at = time.perf_counter() if now is None else now
+        self.elapsed = 0.0
+        return self
+
+    def update(self, now=None):
+        """Advance to now (perf_counter time); returns False once the timeline is over"""
+        now = time.perf_counter() if now is None else now
+        if self.started_at is None:
+            self.start(now)
+        self.elapsed = now - self.started_at
+        return not self.finished()
+
+    def value(self, name):
+        return self.tweens[name].value(self.elapsed)
+
+    def progress(self, name):
+        return self.tweens[name].progress(self.elapsed)
+
+    def finished(self):
+        return self.cancelled or self.elapsed >= self.duration()
+
+    def cancel(self):
+        self.cancelled = True